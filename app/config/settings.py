@@ -6,10 +6,110 @@ from dotenv import load_dotenv
 logger = logging.getLogger(__name__)
 
 env_path = ".env.development"
-breakpoint()
 if os.path.exists(env_path):
     load_dotenv(env_path, override=True)
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY is None:
     logger.critical("Please add an API key for the Genai model...")
+
+# Encoder backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime on CPU, no
+# torch needed). The ONNX model is the hub export at the revision unless a path is given;
+# with quantize it is dynamically quantized to int8 once and cached, keyed by the source
+# model, revision and quantization config. 0 threads lets ONNX Runtime decide
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_MODEL_PATH = os.getenv("EMBEDDING_ONNX_MODEL_PATH") or None
+EMBEDDING_ONNX_QUANTIZE = os.getenv("EMBEDDING_ONNX_QUANTIZE", "false").lower() == "true"
+EMBEDDING_ONNX_CACHE_DIR = os.getenv("EMBEDDING_ONNX_CACHE_DIR", ".cache/onnx")
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+EMBEDDING_ONNX_REVISION = os.getenv("EMBEDDING_ONNX_REVISION") or None
+
+# Embedding inference runs on a dedicated thread pool so it never blocks the event loop
+EMBEDDING_EXECUTOR_WORKERS = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "4"))
+EMBEDDING_EXECUTOR_MAX_QUEUE = int(os.getenv("EMBEDDING_EXECUTOR_MAX_QUEUE", "64"))
+
+# Micro-batching window for concurrent encode calls, 0 disables it
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "2"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+
+# In-process LRU cache for prompt/phrase embeddings, 0 disables it
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64"))
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+
+# On-disk store for store-key and policy-chunk embeddings, empty disables it
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", ".cache/embeddings")
+
+# Streamed bulk evaluation: records per column chunk and the longest accepted NDJSON line
+STREAM_EVAL_CHUNK_SIZE = int(os.getenv("STREAM_EVAL_CHUNK_SIZE", "10000"))
+STREAM_EVAL_MAX_LINE_BYTES = int(os.getenv("STREAM_EVAL_MAX_LINE_BYTES", str(1024 * 1024)))
+
+# Generated rules kept in memory so they can be evaluated later by id
+RULE_STORE_MAX_RULES = int(os.getenv("RULE_STORE_MAX_RULES", "1024"))
+
+# Generated-rule cache: exact prompt matches plus near-duplicate prompts above the
+# similarity threshold (above 1 disables the semantic tier), 0 entries disables it
+RULE_CACHE_MAX_ENTRIES = int(os.getenv("RULE_CACHE_MAX_ENTRIES", "1024"))
+RULE_CACHE_TTL_SECONDS = float(os.getenv("RULE_CACHE_TTL_SECONDS", "3600"))
+RULE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RULE_CACHE_SIMILARITY_THRESHOLD", "0.97"))
+
+# Server-side Gemini context caching of the system prompt, 0 disables it. Falls back to
+# sending the prompt inline when the provider rejects it (e.g. below the minimum size)
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "0"))
+
+# Limits on Gemini calls shared by /generate-rule and /generate-rules/batch,
+# a rate of 0 disables the token bucket
+GEMINI_MAX_CONCURRENT_REQUESTS = int(os.getenv("GEMINI_MAX_CONCURRENT_REQUESTS", "8"))
+GEMINI_REQUESTS_PER_SECOND = float(os.getenv("GEMINI_REQUESTS_PER_SECOND", "0"))
+GEMINI_RATE_LIMIT_BURST = float(os.getenv("GEMINI_RATE_LIMIT_BURST", "1"))
+
+# Most prompts accepted by one /generate-rules/batch request
+BATCH_MAX_PROMPTS = int(os.getenv("BATCH_MAX_PROMPTS", "500"))
+
+# Deterministic fast path for simple prompts, skipping the LLM when every field
+# resolves with at least this similarity and margin over the next-best key
+RULE_PARSER_ENABLED = os.getenv("RULE_PARSER_ENABLED", "true").lower() == "true"
+RULE_PARSER_MIN_SIMILARITY = float(os.getenv("RULE_PARSER_MIN_SIMILARITY", "0.6"))
+RULE_PARSER_MIN_MARGIN = float(os.getenv("RULE_PARSER_MIN_MARGIN", "0.05"))
+
+# Store-key vector index: "exact", "ivf" or "auto" (IVF from 20k keys). IVF lists
+# default to sqrt(vectors); more probes raise recall at the cost of latency
+KEY_INDEX_BACKEND = os.getenv("KEY_INDEX_BACKEND", "auto")
+KEY_INDEX_IVF_LISTS = int(os.getenv("KEY_INDEX_IVF_LISTS", "0"))
+KEY_INDEX_IVF_PROBES = int(os.getenv("KEY_INDEX_IVF_PROBES", "8"))
+
+# Multi-vector keys: a vector for the full key text, the label and each synonym, a key
+# scoring as its best one. KEY_INDEX_BACKEND indexes the vector rows either way
+KEY_MULTI_VECTOR = os.getenv("KEY_MULTI_VECTOR", "true").lower() == "true"
+
+# Storage type of key and policy-chunk vectors: "float32", "float16" or "int8" (a scale
+# per vector). Quantized key scores can be re-scored exactly for the top
+# KEY_INDEX_RERANK_FACTOR * k candidates from the embedding store, 0 disables that
+KEY_INDEX_DTYPE = os.getenv("KEY_INDEX_DTYPE", "float32")
+KEY_INDEX_RERANK_FACTOR = int(os.getenv("KEY_INDEX_RERANK_FACTOR", "4"))
+RAG_VECTOR_DTYPE = os.getenv("RAG_VECTOR_DTYPE", "float32")
+
+# Request context_docs: chunk embeddings kept for this many distinct documents
+CONTEXT_DOC_CACHE_MAX_DOCS = int(os.getenv("CONTEXT_DOC_CACHE_MAX_DOCS", "256"))
+
+# Hybrid policy retrieval: BM25 keyword ranking fused with the dense ranking by
+# reciprocal rank fusion. The weight is relative to the dense side, 0 is dense only
+RAG_SPARSE_WEIGHT = float(os.getenv("RAG_SPARSE_WEIGHT", "1.0"))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+# Policy chunking: token-bounded windows within a markdown section, overlapping by
+# whole paragraphs/list items. Tokens are counted with the embedding model's tokenizer,
+# keep RAG_CHUNK_MAX_TOKENS below its max sequence length (256 for MiniLM)
+RAG_CHUNK_MAX_TOKENS = int(os.getenv("RAG_CHUNK_MAX_TOKENS", "160"))
+RAG_CHUNK_OVERLAP_TOKENS = int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "24"))
+
+# Input token budget of a Gemini request, system plus user prompt. Field mappings and
+# policies are added best first until it is spent
+PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", "2000"))
+
+# Store-key aliases, a JSON object of key value -> phrases. The file is polled at this
+# interval and only keys whose aliases changed are re-embedded, 0 disables polling. The
+# default is the bundled file, found from here so the working directory does not matter
+SYNONYMS_PATH = os.getenv("SYNONYMS_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "synonyms.json"
+)
+SYNONYMS_RELOAD_INTERVAL_SECONDS = float(os.getenv("SYNONYMS_RELOAD_INTERVAL_SECONDS", "30"))
@@ -1,15 +1,76 @@
+import asyncio
+import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 from app.config.policy_docs import POLICY_DOCUMENTS
+from app.config.settings import (
+    CONTEXT_DOC_CACHE_MAX_DOCS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_CACHE_DTYPE,
+    EMBEDDING_CACHE_MAX_MB,
+    EMBEDDING_EXECUTOR_MAX_QUEUE,
+    EMBEDDING_EXECUTOR_WORKERS,
+    EMBEDDING_MAX_BATCH_SIZE,
+    EMBEDDING_ONNX_CACHE_DIR,
+    EMBEDDING_ONNX_MODEL_PATH,
+    EMBEDDING_ONNX_QUANTIZE,
+    EMBEDDING_ONNX_REVISION,
+    EMBEDDING_ONNX_THREADS,
+    BATCH_MAX_PROMPTS,
+    EMBEDDING_STORE_DIR,
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS,
+    GEMINI_MAX_CONCURRENT_REQUESTS,
+    GEMINI_RATE_LIMIT_BURST,
+    GEMINI_REQUESTS_PER_SECOND,
+    KEY_INDEX_BACKEND,
+    KEY_INDEX_DTYPE,
+    KEY_INDEX_IVF_LISTS,
+    KEY_INDEX_IVF_PROBES,
+    KEY_INDEX_RERANK_FACTOR,
+    KEY_MULTI_VECTOR,
+    PROMPT_MAX_TOKENS,
+    RAG_CHUNK_MAX_TOKENS,
+    RAG_CHUNK_OVERLAP_TOKENS,
+    RAG_RRF_K,
+    RAG_SPARSE_WEIGHT,
+    RAG_VECTOR_DTYPE,
+    RULE_PARSER_ENABLED,
+    RULE_PARSER_MIN_MARGIN,
+    RULE_PARSER_MIN_SIMILARITY,
+    RULE_CACHE_MAX_ENTRIES,
+    RULE_CACHE_SIMILARITY_THRESHOLD,
+    RULE_CACHE_TTL_SECONDS,
+    RULE_STORE_MAX_RULES,
+    STREAM_EVAL_CHUNK_SIZE,
+    STREAM_EVAL_MAX_LINE_BYTES,
+    SYNONYMS_PATH,
+    SYNONYMS_RELOAD_INTERVAL_SECONDS,
+)
 from app.config.store_keys import SAMPLE_STORE_KEYS
+from app.services.embedding_cache import EmbeddingCache
 from app.services.embedding_service import EmbeddingService
+from app.services.inference_executor import ExecutorSaturatedError, InferenceExecutor
+from app.services.json_logic_vectorized import compile_vectorized
+from app.services.policy_chunker import PolicyChunker
+from app.services.prompt_budget import PromptBudget
 from app.services.rag_service import RAGService
+from app.services.rule_cache import RuleCache
 from app.services.rule_generator import RuleGenerator
+from app.services.rule_parser import RuleParser
+from app.services.rule_store import RuleStore
+from app.services.stream_evaluator import (
+    RequestBodyStreamingResponse,
+    evaluate_ndjson_stream,
+    iter_ndjson_lines,
+)
+from app.services.synonym_registry import SynonymRegistry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -41,6 +102,21 @@ class RuleRequest(BaseModel):
         }
 
 
+class BatchRuleRequest(BaseModel):
+    prompts: List[str]
+    context_docs: Optional[List[str]] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "prompts": [
+                    "Approve if bureau score > 700 and business vintage at least 3 years",
+                    "Reject if GST missed returns > 2",
+                ]
+            }
+        }
+
+
 class KeyMapping(BaseModel):
     user_phrase: str
     mapped_to: str
@@ -58,33 +134,160 @@ class RuleResponse(BaseModel):
     used_keys: List[str]
     key_mappings: List[KeyMapping]
     confidence_score: float
+    rule_id: str
+    generation_path: str
+    # Gemini input tokens for this request, None when the LLM wasn't called
+    prompt_tokens: Optional[int] = None
+
+
+embedding_cache = (
+    EmbeddingCache(
+        max_bytes=int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+        dtype=EMBEDDING_CACHE_DTYPE,
+    )
+    if EMBEDDING_CACHE_MAX_MB > 0
+    else None
+)
 
-
-embedding_service = EmbeddingService(store_keys=SAMPLE_STORE_KEYS)
+embedding_service = EmbeddingService(
+    store_keys=SAMPLE_STORE_KEYS,
+    batch_window_ms=EMBEDDING_BATCH_WINDOW_MS,
+    max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+    embedding_cache=embedding_cache,
+    embedding_store_dir=EMBEDDING_STORE_DIR,
+    key_index_backend=KEY_INDEX_BACKEND,
+    key_index_params={
+        "ivf": {"n_lists": KEY_INDEX_IVF_LISTS or None, "n_probe": KEY_INDEX_IVF_PROBES}
+    },
+    synonym_registry=SynonymRegistry(SYNONYMS_PATH),
+    multi_vector_keys=KEY_MULTI_VECTOR,
+    key_index_dtype=KEY_INDEX_DTYPE,
+    key_index_rerank_factor=KEY_INDEX_RERANK_FACTOR,
+    encoder_backend=EMBEDDING_BACKEND,
+    encoder_options={
+        "model_path": EMBEDDING_ONNX_MODEL_PATH,
+        "quantize": EMBEDDING_ONNX_QUANTIZE,
+        "cache_dir": EMBEDDING_ONNX_CACHE_DIR,
+        "threads": EMBEDDING_ONNX_THREADS,
+        "revision": EMBEDDING_ONNX_REVISION,
+    },
+)
 
 rag_service = RAGService(
-    embedding_service=embedding_service, policy_documents=POLICY_DOCUMENTS
+    embedding_service=embedding_service,
+    policy_documents=POLICY_DOCUMENTS,
+    context_doc_cache_size=CONTEXT_DOC_CACHE_MAX_DOCS,
+    sparse_weight=RAG_SPARSE_WEIGHT,
+    rrf_k=RAG_RRF_K,
+    chunker=PolicyChunker(
+        max_tokens=RAG_CHUNK_MAX_TOKENS,
+        overlap_tokens=RAG_CHUNK_OVERLAP_TOKENS,
+        count_tokens=embedding_service.count_tokens,
+    ),
+    vector_dtype=RAG_VECTOR_DTYPE,
+)
+
+rule_cache = (
+    RuleCache(
+        max_entries=RULE_CACHE_MAX_ENTRIES,
+        ttl_seconds=RULE_CACHE_TTL_SECONDS,
+        similarity_threshold=RULE_CACHE_SIMILARITY_THRESHOLD,
+    )
+    if RULE_CACHE_MAX_ENTRIES > 0
+    else None
 )
 
 rule_generator = RuleGenerator(
     embedding_service=embedding_service,
     rag_service=rag_service,
     store_keys=SAMPLE_STORE_KEYS,
+    rule_cache=rule_cache,
+    context_cache_ttl_seconds=GEMINI_CONTEXT_CACHE_TTL_SECONDS,
+    max_concurrent_requests=GEMINI_MAX_CONCURRENT_REQUESTS,
+    requests_per_second=GEMINI_REQUESTS_PER_SECOND,
+    rate_limit_burst=GEMINI_RATE_LIMIT_BURST,
+    # Counted with the embedding model's tokenizer, calibrated against Gemini's usage
+    prompt_budget=PromptBudget(
+        max_tokens=PROMPT_MAX_TOKENS, count_tokens=embedding_service.count_tokens
+    ),
+    policy_chunk_tokens=RAG_CHUNK_MAX_TOKENS,
 )
 
+rule_parser = (
+    RuleParser(
+        embedding_service=embedding_service,
+        store_keys=SAMPLE_STORE_KEYS,
+        min_similarity=RULE_PARSER_MIN_SIMILARITY,
+        min_margin=RULE_PARSER_MIN_MARGIN,
+    )
+    if RULE_PARSER_ENABLED
+    else None
+)
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting up JSON Logic Rule Generator...")
-    logger.info("Initializing embeddings for store keys...")
+inference_executor = InferenceExecutor(
+    max_workers=EMBEDDING_EXECUTOR_WORKERS,
+    max_queue_size=EMBEDDING_EXECUTOR_MAX_QUEUE,
+)
+
+rule_store = RuleStore(max_rules=RULE_STORE_MAX_RULES)
+
+
+warmup_state: Dict[str, Any] = {"ready": False, "error": None}
+
+
+def warm_up():
+    embedding_service.load_model()
 
+    logger.info("Initializing embeddings for store keys...")
     embedding_service.initialize_key_embeddings()
 
     rag_service.initialize_policy_embeddings()
 
+    # The first forward pass allocates buffers, pay for it before taking traffic
+    embedding_service.embed_text("warm up")
+
+
+async def run_warm_up():
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}", exc_info=True)
+        warmup_state["error"] = str(e)
+        return
+
+    warmup_state["ready"] = True
     logger.info("Server ready to generate rules!")
 
 
+async def watch_synonyms():
+    # Re-embedding changed keys runs off the event loop, requests keep the old keys meanwhile
+    while True:
+        await asyncio.sleep(SYNONYMS_RELOAD_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(embedding_service.reload_synonyms)
+        except Exception as e:
+            logger.error(f"Synonym reload failed: {str(e)}", exc_info=True)
+
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Starting up JSON Logic Rule Generator...")
+
+    # Warm up in the background so liveness answers while /ready still reports 503
+    app.state.warmup_task = asyncio.create_task(run_warm_up())
+
+    if SYNONYMS_RELOAD_INTERVAL_SECONDS > 0:
+        app.state.synonym_watch_task = asyncio.create_task(watch_synonyms())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if hasattr(app.state, "synonym_watch_task"):
+        app.state.synonym_watch_task.cancel()
+    inference_executor.shutdown()
+    embedding_service.close()
+
+
 @app.get("/")
 async def root():
     return {
@@ -94,47 +297,178 @@ async def root():
     }
 
 
+@app.get("/ready")
+async def ready():
+    if not warmup_state["ready"]:
+        status = "failed" if warmup_state["error"] else "warming_up"
+        return JSONResponse(
+            status_code=503,
+            content={"status": status, "detail": warmup_state["error"]},
+        )
+
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "embedding_executor": inference_executor.stats(),
+        "embedding_service": embedding_service.stats(),
+        "rag_service": rag_service.stats(),
+        "rule_generator": rule_generator.stats(),
+        "rule_parser": rule_parser.stats() if rule_parser is not None else None,
+    }
+
+
+def retrieve_context(prompt: str, context_docs: Optional[List[str]] = None):
+    # Shared across both services so the prompt is only embedded once
+    embedding_context = embedding_service.create_context()
+
+    # Simple prompts compile straight to JSON Logic, no retrieval or LLM needed
+    if rule_parser is not None:
+        parsed = rule_parser.parse(prompt, context=embedding_context)
+        if parsed is not None:
+            return parsed, [], [], None
+
+    # The prompt embedding is reused for the semantic rule cache lookup
+    [(key_mappings, relevant_policies, prompt_embedding)] = retrieve_many(
+        [prompt], context_docs, embedding_context
+    )
+
+    return None, key_mappings, relevant_policies, prompt_embedding
+
+
+def retrieve_context_batch(prompts: List[str], context_docs: Optional[List[str]] = None):
+    """
+    Batched retrieve_context. Also returns, per prompt, the exception its parsing or
+    retrieval raised (None when it succeeded), so one bad prompt doesn't fail the batch.
+    """
+    embedding_context = embedding_service.create_context()
+
+    parsed: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+    errors: List[Optional[Exception]] = [None] * len(prompts)
+    if rule_parser is not None:
+        try:
+            # One forward pass for every prompt's field phrases
+            rule_parser.prefetch(prompts, embedding_context)
+        except Exception as e:
+            logger.warning(f"Batched field embedding failed: {str(e)}")
+        for i, prompt in enumerate(prompts):
+            try:
+                parsed[i] = rule_parser.parse(prompt, context=embedding_context)
+            except Exception as e:
+                errors[i] = e
+
+    key_mappings: List[List[Dict[str, Any]]] = [[] for _ in prompts]
+    relevant_policies: List[List[str]] = [[] for _ in prompts]
+    prompt_embeddings: List[Any] = [None] * len(prompts)
+
+    pending = [i for i, p in enumerate(parsed) if p is None and errors[i] is None]
+    if pending:
+        try:
+            retrieved = retrieve_many(
+                [prompts[i] for i in pending], context_docs, embedding_context
+            )
+        except Exception as e:
+            # Retried one by one to find the prompts that fail
+            logger.warning(f"Batched retrieval failed, retrying prompts one by one: {str(e)}")
+            retrieved = []
+            for i in pending:
+                try:
+                    retrieved.extend(
+                        retrieve_many([prompts[i]], context_docs, embedding_context)
+                    )
+                except Exception as item_error:
+                    errors[i] = item_error
+                    retrieved.append(([], [], None))
+
+        for i, (mappings, policies, embedding) in zip(pending, retrieved):
+            key_mappings[i] = mappings
+            relevant_policies[i] = policies
+            prompt_embeddings[i] = embedding
+
+    return parsed, key_mappings, relevant_policies, prompt_embeddings, errors
+
+
+def retrieve_many(
+    prompts: List[str], context_docs: Optional[List[str]], embedding_context
+) -> List[Tuple[List[Dict[str, Any]], List[str], Any]]:
+    """Key mappings, policies and prompt embedding per prompt, in one embedding pass."""
+    # Sized from the prompt budget, which then picks what fits
+    key_top_k, policy_top_k = rule_generator.retrieval_limits()
+    mappings = embedding_service.find_relevant_keys_many(
+        prompts=prompts,
+        top_k=key_top_k,
+        threshold=0.3,
+        context=embedding_context,
+    )
+    policies = rag_service.retrieve_relevant_policies_many(
+        queries=prompts,
+        top_k=policy_top_k,
+        context=embedding_context,
+        context_docs=context_docs,
+    )
+    embeddings = embedding_context.embed_texts(prompts)
+    return list(zip(mappings, policies, embeddings))
+
+
+def to_rule_response(result: Dict[str, Any]) -> RuleResponse:
+    return RuleResponse(
+        json_logic=result["json_logic"],
+        explanation=result["explanation"],
+        used_keys=result["used_keys"],
+        key_mappings=[
+            KeyMapping(
+                user_phrase=m["user_phrase"],
+                mapped_to=m["mapped_to"],
+                similarity=round(m["similarity"], 4),
+            )
+            for m in result["key_mappings"]
+        ],
+        confidence_score=round(result["confidence_score"], 4),
+        rule_id=rule_store.put(result["json_logic"]),
+        generation_path=result["generation_path"],
+        prompt_tokens=result.get("prompt_tokens"),
+    )
+
+
 @app.post("/generate-rule", response_model=RuleResponse)
 async def generate_rule(request: RuleRequest):
     logger.info(f"Received prompt: {request.prompt}")
 
+    if not warmup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Service is still warming up")
+
     try:
-        key_mappings = embedding_service.find_relevant_keys(
-            prompt=request.prompt, top_k=10, threshold=0.3
+        # Torch inference is CPU-bound, keep it off the event loop
+        parsed, key_mappings, relevant_policies, prompt_embedding = (
+            await inference_executor.run(
+                retrieve_context, request.prompt, request.context_docs
+            )
         )
 
-        logger.info(f" Found {len(key_mappings)} potential key mappings")
-        combined_docs = POLICY_DOCUMENTS.copy()
-        if request.context_docs:
-            combined_docs.extend(request.context_docs)
-
-        relevant_policies = rag_service.retrieve_relevant_policies(
-            query=request.prompt, top_k=3
+        if parsed is not None:
+            logger.info("Compiled prompt without the LLM")
+            result = parsed
+        else:
+            logger.info(f" Found {len(key_mappings)} potential key mappings")
+            logger.info(f"Retrieved {len(relevant_policies)} relevant policy snippets")
+            result = await rule_generator.generate(
+                prompt=request.prompt,
+                key_mappings=key_mappings,
+                relevant_policies=relevant_policies,
+                prompt_embedding=prompt_embedding,
+            )
+
+        logger.info(
+            f"Generated rule with {len(result['used_keys'])} keys via {result['generation_path']}"
         )
 
-        logger.info(f"Retrieved {len(relevant_policies)} relevant policy snippets")
-        result = await rule_generator.generate(
-            prompt=request.prompt,
-            key_mappings=key_mappings,
-            relevant_policies=relevant_policies,
-        )
+        return to_rule_response(result)
 
-        logger.info(f"Generated rule with {len(result['used_keys'])} keys")
-
-        return RuleResponse(
-            json_logic=result["json_logic"],
-            explanation=result["explanation"],
-            used_keys=result["used_keys"],
-            key_mappings=[
-                KeyMapping(
-                    user_phrase=m["user_phrase"],
-                    mapped_to=m["mapped_to"],
-                    similarity=round(m["similarity"], 4),
-                )
-                for m in result["key_mappings"]
-            ],
-            confidence_score=round(result["confidence_score"], 4),
-        )
+    except ExecutorSaturatedError as e:
+        logger.warning(f"Rejected request: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
 
     except ValueError as e:
         logger.warning(f"Validation error: {str(e)}")
@@ -147,6 +481,111 @@ async def generate_rule(request: RuleRequest):
         )
 
 
+@app.post("/generate-rules/batch")
+async def generate_rules_batch(request: BatchRuleRequest):
+    """
+    Generate a rule per prompt. Retrieval for the whole batch shares one forward pass,
+    then the LLM calls fan out under the generator's concurrency and rate limits.
+    Results stream back as NDJSON in completion order, each tagged with its `index`.
+    """
+    logger.info(f"Received batch of {len(request.prompts)} prompts")
+
+    if not warmup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Service is still warming up")
+
+    if not request.prompts:
+        raise HTTPException(status_code=400, detail="No prompts given")
+    if len(request.prompts) > BATCH_MAX_PROMPTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BATCH_MAX_PROMPTS} prompts per batch, got {len(request.prompts)}",
+        )
+
+    try:
+        parsed, key_mappings, relevant_policies, prompt_embeddings, errors = (
+            await inference_executor.run(
+                retrieve_context_batch, request.prompts, request.context_docs
+            )
+        )
+    except ExecutorSaturatedError as e:
+        logger.warning(f"Rejected batch: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    def error_line(index: int, e: Exception) -> Dict[str, Any]:
+        if isinstance(e, ValueError):
+            logger.warning(f"Validation error for prompt {index}: {str(e)}")
+            return {"index": index, "status_code": 400, "error": str(e)}
+        logger.error(f"Error generating rule for prompt {index}: {str(e)}")
+        return {"index": index, "status_code": 500, "error": str(e)}
+
+    async def generate_one(index: int) -> Dict[str, Any]:
+        if errors[index] is not None:
+            return error_line(index, errors[index])  # type: ignore
+        if parsed[index] is not None:
+            return {"index": index, "result": to_rule_response(parsed[index]).model_dump()}  # type: ignore
+
+        try:
+            result = await rule_generator.generate(
+                prompt=request.prompts[index],
+                key_mappings=key_mappings[index],
+                relevant_policies=relevant_policies[index],
+                prompt_embedding=prompt_embeddings[index],
+            )
+            return {"index": index, "result": to_rule_response(result).model_dump()}
+        except Exception as e:
+            return error_line(index, e)
+
+    async def stream_results():
+        tasks = [asyncio.create_task(generate_one(i)) for i in range(len(request.prompts))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # The client went away, don't keep spending LLM quota on it
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post("/evaluate-rule/stream")
+async def evaluate_rule_stream(
+    request: Request, rule_id: Optional[str] = None, rule: Optional[str] = None
+):
+    """
+    Evaluate a rule over an NDJSON body of applicant records, one JSON object per line.
+    The rule is either a `rule_id` returned by /generate-rule or the JSON Logic itself
+    in the `rule` query parameter. Decisions stream back as NDJSON in input order,
+    followed by a summary line with the throughput.
+    """
+    if (rule_id is None) == (rule is None):
+        raise HTTPException(
+            status_code=400, detail="Provide exactly one of 'rule_id' or 'rule'"
+        )
+
+    if rule_id is not None:
+        json_logic = rule_store.get(rule_id)
+        if json_logic is None:
+            raise HTTPException(status_code=404, detail=f"Unknown rule id: {rule_id}")
+    else:
+        try:
+            json_logic = json.loads(rule)  # type: ignore
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid rule JSON: {str(e)}")
+
+    try:
+        vectorized = compile_vectorized(json_logic)
+    except ValueError as e:
+        logger.warning(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    lines = iter_ndjson_lines(request.stream(), max_line_bytes=STREAM_EVAL_MAX_LINE_BYTES)
+    return RequestBodyStreamingResponse(
+        evaluate_ndjson_stream(lines, vectorized, chunk_size=STREAM_EVAL_CHUNK_SIZE),
+        media_type="application/x-ndjson",
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,5 +1,5 @@
-from .embedding_service import EmbeddingService
+from .embedding_service import EmbeddingContext, EmbeddingService
 from .rag_service import RAGService
 from .rule_generator import RuleGenerator
 
-__all__ = ["EmbeddingService", "RAGService", "RuleGenerator"]
+__all__ = ["EmbeddingContext", "EmbeddingService", "RAGService", "RuleGenerator"]
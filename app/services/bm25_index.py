@@ -0,0 +1,188 @@
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Numbers keep their decimal point and drop grouping commas, so "₹1,00,000" and
+# "100000" are the same term, as are "0.7" in a prompt and in a policy
+_TOKEN = re.compile(r"\d[\d,]*(?:\.\d+)?|[a-z][a-z0-9_]*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have if in is it of on or should than "
+    "that the their this to was which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token[0].isdigit():
+            token = token.replace(",", "")
+        elif token in _STOPWORDS:
+            continue
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index of text chunks grouped by document id, each
+    chunk carrying a metadata dict that search results hand back.
+
+    Postings and corpus statistics are updated per document, so adding, replacing
+    or deleting a document costs its own chunk count, and a query only walks the
+    posting lists of its own terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._terms: Dict[int, Counter] = {}
+        self._texts: Dict[int, str] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+        self._doc_rows: Dict[str, List[int]] = {}
+        self._next_row = 0
+        self._total_length = 0
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(
+        self,
+        doc_id: str,
+        texts: Sequence[str],
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+    ):
+        """Indexes a document's chunks, replacing any chunks stored under `doc_id`."""
+        self.add_many([(doc_id, texts, metadata)])
+
+    def add_many(self, documents: Sequence[Tuple[Any, ...]]):
+        """Entries are (doc_id, texts), optionally followed by per-chunk metadata."""
+        tokenized = [
+            (
+                doc_id,
+                [(text, Counter(tokenize(text))) for text in texts],
+                (rest[0] if rest else None) or [{} for _ in texts],
+            )
+            for doc_id, texts, *rest in documents
+        ]
+
+        with self._lock:
+            for doc_id, chunks, metadata in tokenized:
+                self._delete(doc_id)
+
+                rows = []
+                for (text, terms), chunk_metadata in zip(chunks, metadata):
+                    row = self._next_row
+                    self._next_row += 1
+                    for term, count in terms.items():
+                        self._postings.setdefault(term, {})[row] = count
+                    length = sum(terms.values())
+                    self._lengths[row] = length
+                    self._terms[row] = terms
+                    self._texts[row] = text
+                    self._metadata[row] = chunk_metadata
+                    self._total_length += length
+                    rows.append(row)
+                self._doc_rows[doc_id] = rows
+
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._delete(doc_id)
+
+    def _delete(self, doc_id: str) -> bool:
+        rows = self._doc_rows.pop(doc_id, None)
+        if rows is None:
+            return False
+
+        for row in rows:
+            for term in self._terms.pop(row):
+                posting = self._postings[term]
+                del posting[row]
+                if not posting:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop(row)
+            del self._texts[row]
+            del self._metadata[row]
+        return True
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Top-k chunks sharing a query term as (text, score, metadata), best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            scores: Dict[int, float] = {}
+            average_length = self._average_length()
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = self._idf(len(posting))
+                for row, count in posting.items():
+                    scores[row] = scores.get(row, 0.0) + idf * self._saturate(
+                        count, self._lengths[row], average_length
+                    )
+
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(self._texts[row], score, self._metadata[row]) for row, score in top]
+
+    def score_texts(self, query: str, texts: Sequence[str]) -> List[float]:
+        """Scores chunks outside the index, e.g. request documents, with its stats."""
+        terms = set(tokenize(query))
+        chunks = [Counter(tokenize(t)) for t in texts]
+        with self._lock:
+            average_length = self._average_length()
+            idfs = {t: self._idf(len(self._postings.get(t, ()))) for t in terms}
+
+        scores = []
+        for chunk in chunks:
+            length = sum(chunk.values())
+            scores.append(
+                sum(
+                    idfs[t] * self._saturate(chunk[t], length, average_length)
+                    for t in terms
+                    if chunk[t]
+                )
+            )
+        return scores
+
+    def _average_length(self) -> float:
+        return self._total_length / len(self._lengths) if self._lengths else 0.0
+
+    def _idf(self, document_frequency: int) -> float:
+        n = len(self._lengths)
+        return math.log(1 + (n - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _saturate(self, count: int, length: int, average_length: float) -> float:
+        relative_length = length / average_length if average_length else 1.0
+        norm = 1 - self.b + self.b * relative_length
+        return count * (self.k1 + 1) / (count + self.k1 * norm)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "chunks": len(self._lengths),
+                "terms": len(self._postings),
+            }
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    weights: Optional[Sequence[float]] = None,
+    k: int = 60,
+) -> List[Tuple[str, float]]:
+    """Fuses ranked lists into one, scoring each item sum(weight / (k + rank))."""
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, 1):
+            fused[item] = fused.get(item, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -1,38 +1,244 @@
 import logging
 import re
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Set
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_store import EmbeddingStore
+from app.services.encoder_backends import EncoderBackend, create_encoder
+from app.services.micro_batcher import MicroBatcher
+from app.services.phrase_matcher import PhraseMatcher
+from app.services.synonym_registry import SynonymRegistry
+from app.services.vector_index import MultiVectorIndex, VectorIndex, build_index
 
 logger = logging.getLogger(__name__)
 
+# Free-form field phrases: whatever precedes a comparison, or follows "with"/"having"
+_OPERATOR_PHRASE = re.compile(
+    r"([a-z_\s]+?)\s*(?:>|<|>=|<=|==|=|is|equals?|greater|less|above|below|at least|minimum|maximum)"
+)
+_WITH_PHRASE = re.compile(r'(?:with|having)\s+([a-z_\s]+?)(?:\s+[\'"]|\s+>|\s+<|$)')
+
+_KNOWN_TERMS = [
+    "credit score",
+    "bureau score",
+    "cibil",
+    "cibil score",
+    "business vintage",
+    "business age",
+    "company age",
+    "vintage",
+    "applicant age",
+    "age",
+    "customer age",
+    "monthly income",
+    "income",
+    "salary",
+    "dpd",
+    "days past due",
+    "overdue",
+    "wilful default",
+    "willful default",
+    "default",
+    "overdue amount",
+    "outstanding",
+    "turnover",
+    "gst turnover",
+    "revenue",
+    "bank balance",
+    "abb",
+    "bounces",
+    "cheque bounce",
+    "foir",
+    "debt to income",
+    "tags",
+    "veteran",
+    "new to credit",
+    "ntc",
+]
+
+
+class EmbeddingContext:
+    """
+    Request-scoped embedding memo. Services that accept a context encode through it,
+    so a text shared between them (e.g. the prompt) only goes through the model once.
+    """
+
+    def __init__(self, embedding_service: "EmbeddingService"):
+        self.embedding_service = embedding_service
+        self._vectors: Dict[str, np.ndarray] = {}
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        missing = [t for t in dict.fromkeys(texts) if t not in self._vectors]
+        if missing:
+            vectors = self.embedding_service.embed_texts(missing)
+            self._vectors.update(zip(missing, vectors))
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([self._vectors[t] for t in texts])
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_texts([text])[0]
+
 
 class EmbeddingService:
     def __init__(
-        self, store_keys: List[Dict[str, str]], model_name: str = "all-MiniLM-L6-v2"
+        self,
+        store_keys: List[Dict[str, str]],
+        model_name: str = "all-MiniLM-L6-v2",
+        batch_window_ms: float = 0.0,
+        max_batch_size: int = 64,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_store_dir: Optional[str] = None,
+        key_index_backend: str = "auto",
+        key_index_params: Optional[Dict[str, Dict[str, Any]]] = None,
+        synonym_registry: Optional[SynonymRegistry] = None,
+        multi_vector_keys: bool = False,
+        key_index_dtype: str = "float32",
+        key_index_rerank_factor: int = 0,
+        encoder_backend: str = "torch",
+        encoder_options: Optional[Dict[str, Any]] = None,
     ):
         self.store_keys = store_keys
         self.model_name = model_name
 
-        logger.info(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        # "torch" (sentence-transformers) or "onnx" (ONNX Runtime, optionally int8).
+        # Backends differ slightly in their vectors, so caches and stores are scoped by
+        # the backend as well as the model; torch keeps the bare model name
+        self.encoder_backend = encoder_backend
+        self.encoder_options = encoder_options or {}
+        self.embedding_namespace = model_name
+        if encoder_backend != "torch":
+            quantized = "-int8" if self.encoder_options.get("quantize") else ""
+            self.embedding_namespace = f"{model_name}@{encoder_backend}{quantized}"
+
+        # Key aliases live in a data file, reload_synonyms re-embeds the keys they touch
+        self.synonym_registry = synonym_registry or SynonymRegistry()
+        self._reload_lock = threading.Lock()
+
+        # The model (and torch or onnxruntime) is loaded on first use or during startup
+        self._model: Optional[EncoderBackend] = None
+        self._model_lock = threading.Lock()
 
         self.key_embeddings: Optional[np.ndarray] = None
         self.key_texts: List[str] = []
 
+        # With multi_vector_keys each key also gets a vector for its label and each
+        # synonym, and scores as its best one (exact search, the backend is not used)
+        self.multi_vector_keys = multi_vector_keys
+        self.key_vector_texts: List[List[str]] = []
+
+        # Top-k search over the key embeddings, exact for small catalogs
+        self.key_index: Optional[VectorIndex] = None
+        self.key_index_backend = key_index_backend
+        self.key_index_params = key_index_params or {}
+
+        # float16/int8 key vectors cut index memory 2-4x; the float32 key_embeddings are
+        # then not kept. With a rerank factor (and an embedding store to read float32
+        # vectors from) the top rerank_factor * k candidates are re-scored exactly
+        self.key_index_dtype = key_index_dtype
+        self.key_index_rerank_factor = key_index_rerank_factor
+
+        # Known terms, key labels and synonyms, compiled once for phrase extraction
+        self._phrase_matcher: Optional[PhraseMatcher] = None
+
+        # Concurrent embed_texts calls share one forward pass when batching is on
+        self.micro_batcher: Optional[MicroBatcher] = None
+        if batch_window_ms > 0:
+            self.micro_batcher = MicroBatcher(
+                self._encode, max_wait_ms=batch_window_ms, max_batch_size=max_batch_size
+            )
+
+        # Prompts and phrases repeat a lot across requests, skip the model for those
+        self.embedding_cache = embedding_cache
+
+        # Corpus embeddings persisted across restarts, keyed by content hash
+        self.embedding_store: Optional[EmbeddingStore] = None
+        if embedding_store_dir:
+            self.embedding_store = EmbeddingStore(
+                embedding_store_dir, self.embedding_namespace
+            )
+
+    @property
+    def model(self) -> EncoderBackend:
+        if self._model is None:
+            self.load_model()
+        return self._model  # type: ignore
+
+    def load_model(self) -> EncoderBackend:
+        with self._model_lock:
+            if self._model is None:
+                logger.info(
+                    f"Loading embedding model: {self.model_name} ({self.encoder_backend})"
+                )
+                self._model = create_encoder(
+                    self.encoder_backend, self.model_name, self.encoder_options
+                )
+        return self._model
+
+    @property
+    def is_ready(self) -> bool:
+        return self._model is not None and self.key_index is not None
+
     def initialize_key_embeddings(self):
         logger.info("Computing embeddings for store keys...")
-        self.key_texts = []
-        for key in self.store_keys:
-            text = self._build_key_text(key)
-            self.key_texts.append(text)
-        self.key_embeddings = self.model.encode(
-            self.key_texts, convert_to_numpy=True, normalize_embeddings=True
-        )
+        with self._reload_lock:
+            self.key_vector_texts = [self._key_vector_texts(key) for key in self.store_keys]
+            self.key_texts = [texts[0] for texts in self.key_vector_texts]
+
+            if self.multi_vector_keys:
+                groups = self._embed_key_groups(self.key_vector_texts)
+                key_embeddings = np.stack([group[0] for group in groups])
+                key_index: VectorIndex = MultiVectorIndex.from_groups(
+                    groups,
+                    backend=self.key_index_backend,
+                    params=self.key_index_params,
+                    dtype=self.key_index_dtype,
+                )
+            else:
+                key_embeddings = self.embed_corpus(self.key_texts)
+                key_index = build_index(
+                    key_embeddings,
+                    self.key_index_backend,
+                    self.key_index_params,
+                    dtype=self.key_index_dtype,
+                )
+
+            self._set_key_rerank(key_index, self.key_vector_texts)
+            self.key_embeddings = key_embeddings if self.key_index_dtype == "float32" else None
+            self.key_index = key_index
+            self._phrase_matcher = self._build_phrase_matcher()
 
         logger.info(f"Computed embeddings for {len(self.store_keys)} keys")
 
+    def _key_vector_texts(self, key: Dict[str, str]) -> List[str]:
+        """Texts embedded for a key: the full key text, then the label and each synonym."""
+        texts = [self._build_key_text(key)]
+        if self.multi_vector_keys:
+            texts.append(key["label"])
+            texts.extend(self._get_synonyms(key["value"], key["label"]))
+        return list(dict.fromkeys(texts))
+
+    def _embed_key_groups(self, key_vector_texts: List[List[str]]) -> List[np.ndarray]:
+        # One corpus call for every key's texts, split back into a block per key
+        vectors = self.embed_corpus([text for texts in key_vector_texts for text in texts])
+        return np.split(vectors, np.cumsum([len(texts) for texts in key_vector_texts])[:-1])
+
+    def _set_key_rerank(self, key_index: VectorIndex, key_vector_texts: List[List[str]]):
+        if self.key_index_dtype == "float32" or self.key_index_rerank_factor <= 0:
+            return
+        if self.embedding_store is None:
+            logger.warning("Key re-ranking needs an embedding store, searching quantized only")
+            return
+
+        # Index rows line up with the flattened key texts in both single and multi mode
+        texts = [text for group in key_vector_texts for text in group]
+        key_index.rerank = lambda rows: self.embed_corpus([texts[row] for row in rows])
+        key_index.rerank_factor = self.key_index_rerank_factor
+
     def _build_key_text(self, key: Dict[str, str]) -> str:
         value = key["value"]
         label = key["label"]
@@ -44,184 +250,238 @@ class EmbeddingService:
         return " ".join(text_parts)
 
     def _get_synonyms(self, value: str, label: str) -> List[str]:
-        synonym_map = {
-            "bureau.score": [
-                "credit score",
-                "cibil score",
-                "cibil",
-                "credit rating",
-                "credit bureau score",
-            ],
-            "bureau.dpd": [
-                "days past due",
-                "dpd",
-                "overdue days",
-                "delay days",
-                "payment delay",
-            ],
-            "bureau.wilful_default": [
-                "willful default",
-                "intentional default",
-                "deliberate default",
-            ],
-            "bureau.is_ntc": [
-                "new to credit",
-                "ntc",
-                "no credit history",
-                "first time borrower",
-            ],
-            "bureau.overdue_amount": [
-                "outstanding amount",
-                "pending amount",
-                "dues",
-                "arrears",
-            ],
-            "bureau.enquiries": [
-                "credit inquiries",
-                "credit checks",
-                "hard pulls",
-                "credit applications",
-            ],
-            "bureau.suit_filed": [
-                "legal case",
-                "court case",
-                "lawsuit",
-                "legal action",
-            ],
-            "business.vintage_in_years": [
-                "business age",
-                "company age",
-                "years in business",
-                "business duration",
-                "establishment years",
-                "vintage",
-            ],
-            "business.commercial_cibil_score": [
-                "commercial credit score",
-                "business credit score",
-                "company cibil",
-            ],
-            "primary_applicant.age": [
-                "applicant age",
-                "customer age",
-                "borrower age",
-                "age",
-            ],
-            "primary_applicant.monthly_income": [
-                "income",
-                "salary",
-                "monthly salary",
-                "earnings",
-                "monthly earnings",
-            ],
-            "primary_applicant.tags": [
-                "applicant tags",
-                "customer tags",
-                "labels",
-                "categories",
-                "veteran",
-                "employee type",
-            ],
-            "banking.abb": [
-                "average bank balance",
-                "abb",
-                "average balance",
-                "bank balance",
-            ],
-            "banking.avg_monthly_turnover": [
-                "monthly turnover",
-                "bank turnover",
-                "account turnover",
-            ],
-            "banking.inward_bounces": [
-                "cheque bounce",
-                "check bounce",
-                "inward return",
-                "deposit bounce",
-            ],
-            "banking.outward_bounces": [
-                "issued cheque bounce",
-                "payment bounce",
-                "outward return",
-            ],
-            "gst.turnover": ["gst turnover", "sales turnover", "revenue", "sales"],
-            "gst.missed_returns": ["gst default", "filing default", "missed filings"],
-            "gst.registration_age_months": [
-                "gst age",
-                "gst vintage",
-                "registration duration",
-            ],
-            "foir": [
-                "fixed obligation to income ratio",
-                "foir ratio",
-                "obligation ratio",
-                "emi to income",
-            ],
-            "debt_to_income": ["dti", "debt ratio", "leverage ratio", "debt burden"],
-            "itr.years_filed": ["tax returns filed", "itr filings", "income tax years"],
-        }
-
-        return synonym_map.get(value, [])
+        return self.synonym_registry.get(value)
+
+    def reload_synonyms(self) -> List[str]:
+        """
+        Applies synonym registry changes and returns the key values they touched.
+
+        Only keys whose aliases changed are re-embedded. The new key matrix, index and
+        phrase matcher are built on the side and each is swapped in whole, requests in
+        flight finish on the ones they already hold.
+        """
+        with self._reload_lock:
+            changed = self.synonym_registry.reload(commit=False)
+            if not changed:
+                return []
+
+            try:
+                rows = self._apply_synonym_changes(set(changed))
+            except Exception:
+                # Keeps the registry in step with the index, the next poll retries
+                self.synonym_registry.rollback()
+                raise
+            self.synonym_registry.commit()
+
+        logger.info(f"Re-embedded {len(rows)} keys after a synonym change")
+        return changed
+
+    def _apply_synonym_changes(self, changed_values: Set[str]) -> List[int]:
+        if self.key_index is None:
+            # Not initialized yet, initialize_key_embeddings reads the new aliases
+            self._phrase_matcher = None
+            return []
+
+        key_vector_texts = list(self.key_vector_texts)
+        rows = []
+        for i, key in enumerate(self.store_keys):
+            if key["value"] in changed_values:
+                key_vector_texts[i] = self._key_vector_texts(key)
+                if key_vector_texts[i] != self.key_vector_texts[i]:
+                    rows.append(i)
+
+        # Everything is built before anything is swapped in, so a failure leaves the
+        # service on the previous aliases
+        phrase_matcher = self._build_phrase_matcher()
+        if rows:
+            groups = self._embed_key_groups([key_vector_texts[i] for i in rows])
+            first_vectors = np.stack([group[0] for group in groups])
+            if self.multi_vector_keys:
+                key_index = self.key_index.replace(rows, groups)  # type: ignore
+            else:
+                key_index = self.key_index.replace(np.array(rows), first_vectors)
+            self._set_key_rerank(key_index, key_vector_texts)
+
+            key_embeddings = self.key_embeddings
+            if key_embeddings is not None:
+                key_embeddings = key_embeddings.copy()
+                key_embeddings[rows] = first_vectors
+
+            self.key_vector_texts = key_vector_texts
+            self.key_texts = [texts[0] for texts in key_vector_texts]
+            self.key_embeddings = key_embeddings
+            self.key_index = key_index
+        self._phrase_matcher = phrase_matcher
+        return rows
 
     def embed_text(self, text: str) -> np.ndarray:
-        return self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+        if self.micro_batcher is not None or self.embedding_cache is not None:
+            return self.embed_texts([text])[0]
+        return self._encode([text])[0]
 
     def embed_texts(self, texts: List[str]) -> np.ndarray:
-        return self.model.encode(
-            texts, convert_to_numpy=True, normalize_embeddings=True
-        )
+        if self.embedding_cache is None or not texts:
+            return self._embed_uncached(texts)
+
+        vectors = [self.embedding_cache.get(self.embedding_namespace, t) for t in texts]
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+
+        if missing:
+            encoded = dict(zip(missing, self._embed_uncached(missing)))
+            for text, vector in encoded.items():
+                self.embedding_cache.put(self.embedding_namespace, text, vector)
+            vectors = [encoded[t] if v is None else v for t, v in zip(texts, vectors)]
+
+        return np.stack(vectors)
+
+    def _embed_uncached(self, texts: List[str]) -> np.ndarray:
+        if self.micro_batcher is not None and texts:
+            return self.micro_batcher.encode(texts)
+        return self._encode(texts)
+
+    def embed_corpus(self, texts: List[str]) -> np.ndarray:
+        if self.embedding_store is None or not texts:
+            return self._encode(texts)
+
+        vectors = self.embedding_store.get_many(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+
+        if missing:
+            logger.info(f"Encoding {len(missing)} of {len(texts)} corpus texts")
+            encoded = dict(zip(missing, self._encode(missing)))
+            self.embedding_store.put_many(missing, np.stack(list(encoded.values())))
+            vectors = [encoded[t] if v is None else v for t, v in zip(texts, vectors)]
+
+        return np.stack(vectors).astype(np.float32)
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens of `text` under the encoder's tokenizer, special tokens excluded."""
+        return self.model.count_tokens(text)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "model_name": self.model_name,
+            "encoder_backend": self.encoder_backend,
+        }
+        if self.micro_batcher is not None:
+            stats["micro_batching"] = self.micro_batcher.stats()
+        if self.embedding_cache is not None:
+            stats["cache"] = self.embedding_cache.stats()
+        if self.key_index is not None:
+            stats["key_index"] = self.key_index.stats()
+        stats["synonyms"] = self.synonym_registry.stats()
+        return stats
+
+    def close(self):
+        if self.micro_batcher is not None:
+            self.micro_batcher.close()
 
     def cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         return float(np.dot(vec1, vec2))
 
+    def create_context(self) -> EmbeddingContext:
+        return EmbeddingContext(self)
+
     def find_relevant_keys(
-        self, prompt: str, top_k: int = 5, threshold: float = 0.3
+        self,
+        prompt: str,
+        top_k: int = 5,
+        threshold: float = 0.3,
+        context: Optional[EmbeddingContext] = None,
     ) -> List[Dict[str, Any]]:
-        if self.key_embeddings is None:
+        return self.find_relevant_keys_many([prompt], top_k, threshold, context)[0]
+
+    def find_relevant_keys_many(
+        self,
+        prompts: List[str],
+        top_k: int = 5,
+        threshold: float = 0.3,
+        context: Optional[EmbeddingContext] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        # Bound once, a synonym reload may swap in a new index mid-request
+        key_index = self.key_index
+        if key_index is None:
             raise RuntimeError(
                 "Key embeddings not initialized! Call initialize_key_embeddings() first."
             )
+        if not prompts:
+            return []
 
-        mappings = []
-        phrases = self._extract_field_phrases(prompt)
+        phrases_per_prompt = [self._extract_field_phrases(p) for p in prompts]
+        for phrases in phrases_per_prompt:
+            logger.info(f"Extracted phrases from prompt: {phrases}")
 
-        logger.info(f"Extracted phrases from prompt: {phrases}")
-        seen_keys = set()
+        # One forward pass and one index search for every phrase plus the prompts
+        phrases = [phrase for group in phrases_per_prompt for phrase in group]
+        encoder = context or self
+        embeddings = encoder.embed_texts(phrases + list(prompts))
 
-        for phrase in phrases:
-            phrase_embedding = self.embed_text(phrase)
-
-            similarities = np.dot(self.key_embeddings, phrase_embedding)
+        phrase_scores, phrase_indices = key_index.search(embeddings[: len(phrases)], 1)
+        prompt_scores, prompt_indices = key_index.search(
+            embeddings[len(phrases) :], top_k * 2
+        )
 
-            best_idx = np.argmax(similarities)
-            best_similarity = similarities[best_idx]
+        results = []
+        offset = 0
+        for i, group in enumerate(phrases_per_prompt):
+            best = slice(offset, offset + len(group))
+            offset += len(group)
+
+            results.append(
+                self._collect_mappings(
+                    group,
+                    phrase_indices[best, 0],
+                    phrase_scores[best, 0],
+                    prompt_indices[i],
+                    prompt_scores[i],
+                    top_k,
+                    threshold,
+                )
+            )
 
-            if best_similarity >= threshold:
-                key_value = self.store_keys[best_idx]["value"]
+        return results
+
+    def _collect_mappings(
+        self,
+        phrases: List[str],
+        best_indices: np.ndarray,
+        best_similarities: np.ndarray,
+        top_indices: np.ndarray,
+        top_similarities: np.ndarray,
+        top_k: int,
+        threshold: float,
+    ) -> List[Dict[str, Any]]:
+        mappings = []
+        seen_keys = set()
 
-                # Avoid duplicates
-                if key_value not in seen_keys:
-                    seen_keys.add(key_value)
-                    mappings.append(
-                        {
-                            "user_phrase": phrase,
-                            "mapped_to": key_value,
-                            "similarity": float(best_similarity),
-                            "label": self.store_keys[best_idx]["label"],
-                        }
-                    )
+        for phrase, best_idx, best_similarity in zip(
+            phrases, best_indices, best_similarities
+        ):
+            if best_similarity < threshold:
+                continue
 
-        prompt_embedding = self.embed_text(prompt)
-        all_similarities = np.dot(self.key_embeddings, prompt_embedding)
+            key_value = self.store_keys[best_idx]["value"]
 
-        top_indices = np.argsort(all_similarities)[::-1][: top_k * 2]
+            # Avoid duplicates
+            if key_value not in seen_keys:
+                seen_keys.add(key_value)
+                mappings.append(
+                    {
+                        "user_phrase": phrase,
+                        "mapped_to": key_value,
+                        "similarity": float(best_similarity),
+                        "label": self.store_keys[best_idx]["label"],
+                    }
+                )
 
-        for idx in top_indices:
+        for idx, similarity in zip(top_indices, top_similarities):
             if len(mappings) >= top_k:
                 break
 
             key_value = self.store_keys[idx]["value"]
-            similarity = all_similarities[idx]
 
             if key_value not in seen_keys and similarity >= threshold:
                 seen_keys.add(key_value)
@@ -243,55 +503,14 @@ class EmbeddingService:
         phrases = []
         prompt_lower = prompt.lower()
 
-        operator_pattern = r"([a-z_\s]+?)\s*(?:>|<|>=|<=|==|=|is|equals?|greater|less|above|below|at least|minimum|maximum)"
-        matches = re.findall(operator_pattern, prompt_lower)
+        matches = _OPERATOR_PHRASE.findall(prompt_lower)
         phrases.extend([m.strip() for m in matches if len(m.strip()) > 2])
 
-        with_pattern = r'(?:with|having)\s+([a-z_\s]+?)(?:\s+[\'"]|\s+>|\s+<|$)'
-        matches = re.findall(with_pattern, prompt_lower)
+        matches = _WITH_PHRASE.findall(prompt_lower)
         phrases.extend([m.strip() for m in matches if len(m.strip()) > 2])
 
-        known_terms = [
-            "credit score",
-            "bureau score",
-            "cibil",
-            "cibil score",
-            "business vintage",
-            "business age",
-            "company age",
-            "vintage",
-            "applicant age",
-            "age",
-            "customer age",
-            "monthly income",
-            "income",
-            "salary",
-            "dpd",
-            "days past due",
-            "overdue",
-            "wilful default",
-            "willful default",
-            "default",
-            "overdue amount",
-            "outstanding",
-            "turnover",
-            "gst turnover",
-            "revenue",
-            "bank balance",
-            "abb",
-            "bounces",
-            "cheque bounce",
-            "foir",
-            "debt to income",
-            "tags",
-            "veteran",
-            "new to credit",
-            "ntc",
-        ]
-
-        for term in known_terms:
-            if term in prompt_lower:
-                phrases.append(term)
+        # Known terms, labels and synonyms, matched on whole words in one pass
+        phrases.extend(self.phrase_matcher.find_phrases(prompt))
 
         seen = set()
         unique_phrases = []
@@ -302,21 +521,34 @@ class EmbeddingService:
 
         return unique_phrases
 
+    @property
+    def phrase_matcher(self) -> PhraseMatcher:
+        if self._phrase_matcher is None:
+            with self._model_lock:
+                if self._phrase_matcher is None:
+                    self._phrase_matcher = self._build_phrase_matcher()
+        return self._phrase_matcher
+
+    def _build_phrase_matcher(self) -> PhraseMatcher:
+        phrases = list(_KNOWN_TERMS)
+        for key in self.store_keys:
+            phrases.append(key["label"])
+            phrases.extend(self._get_synonyms(key["value"], key["label"]))
+        return PhraseMatcher(phrases)
+
     def get_suggestions_for_unknown_field(
         self, field_phrase: str, top_k: int = 3
     ) -> List[Dict[str, Any]]:
         phrase_embedding = self.embed_text(field_phrase)
-        similarities = np.dot(self.key_embeddings, phrase_embedding)  # type: ignore
-
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        similarities, top_indices = self.key_index.search(phrase_embedding, top_k)  # type: ignore
 
         suggestions = []
-        for idx in top_indices:
+        for idx, similarity in zip(top_indices[0], similarities[0]):
             suggestions.append(
                 {
                     "value": self.store_keys[idx]["value"],
                     "label": self.store_keys[idx]["label"],
-                    "similarity": float(similarities[idx]),
+                    "similarity": float(similarity),
                 }
             )
 
@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX, compaction is skipped
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """
+    Content-addressed on-disk store for corpus embeddings (store keys, policy chunks).
+
+    Each model gets its own directory of immutable segments. A segment is one `.npy`
+    file of (sha256 of model name + text, float32 vector) records, opened
+    memory-mapped, so a restart or a new replica only encodes texts whose content
+    changed.
+
+    Every `put_many` writes a new segment under a unique name with a single
+    `os.replace`, so processes sharing the directory never overwrite each other's
+    rows and never see a key paired with another writer's vector. Segments are
+    picked up from disk on load and whenever a lookup misses. Once there are more
+    than `max_segments`, the smaller ones are merged under an exclusive file lock.
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".npy"
+    LOCK_FILE = "compact.lock"
+
+    def __init__(self, directory: str, model_name: str, max_segments: int = 32):
+        self.model_name = model_name
+        self.directory = os.path.join(directory, model_name.replace("/", "__"))
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+        self._segments: Dict[str, np.ndarray] = {}
+        self._rows: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._refresh()
+        if self._rows:
+            logger.info(f"Loaded {len(self._rows)} stored embeddings from {self.directory}")
+
+    def content_hash(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _segment_names(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        # Sorted by the time prefix, oldest first
+        return sorted(
+            n
+            for n in names
+            if n.startswith(self.SEGMENT_PREFIX) and n.endswith(self.SEGMENT_SUFFIX)
+        )
+
+    def _read_segment(self, name: str) -> Optional[np.ndarray]:
+        try:
+            records = np.load(os.path.join(self.directory, name), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            # Removed by a concurrent compaction, its rows are in the merged segment
+            logger.debug(f"Skipping embedding segment {name}: {e}")
+            return None
+        if records.dtype.names != ("key", "vector"):
+            logger.warning(f"Ignoring malformed embedding segment {name}")
+            return None
+        return records
+
+    def _refresh(self):
+        """Maps segments written since the last look, by this or another process."""
+        with self._lock:
+            names = [n for n in self._segment_names() if n not in self._segments]
+            segments = dict(self._segments)
+            rows = dict(self._rows)
+
+        for name in names:
+            records = self._read_segment(name)
+            if records is None:
+                continue
+            segments[name] = records
+            vectors = records["vector"]
+            for row, key in enumerate(records["key"]):
+                rows.setdefault(key.decode("ascii"), (vectors, row))
+
+        if names:
+            with self._lock:
+                # Rows put by this process meanwhile are kept
+                rows.update(self._rows)
+                self._segments, self._rows = segments, rows
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        keys = [self.content_hash(text) for text in texts]
+        rows = self._rows
+        if any(key not in rows for key in keys):
+            self._refresh()
+            rows = self._rows
+
+        results: List[Optional[np.ndarray]] = []
+        for key in keys:
+            found = rows.get(key)
+            results.append(None if found is None else np.array(found[0][found[1]]))
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        new: Dict[str, np.ndarray] = {}
+        for text, vector in zip(texts, vectors):
+            key = self.content_hash(text)
+            if key not in self._rows:
+                new.setdefault(key, vector)
+        if not new:
+            return
+
+        name, records = self._write(list(new), np.asarray(list(new.values())))
+        with self._lock:
+            self._segments[name] = records
+            self._rows = dict(self._rows)
+            for row, key in enumerate(new):
+                self._rows.setdefault(key, (records["vector"], row))
+            segment_count = len(self._segments)
+
+        logger.info(f"Stored {len(new)} new embeddings in {self.directory}")
+
+        if segment_count > self.max_segments:
+            self._compact()
+
+    def _write(self, keys: List[str], vectors: np.ndarray) -> Tuple[str, np.ndarray]:
+        os.makedirs(self.directory, exist_ok=True)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        records = np.empty(
+            len(keys), dtype=[("key", "S64"), ("vector", "<f4", vectors.shape[1:])]
+        )
+        records["key"] = keys
+        records["vector"] = vectors
+
+        name = (
+            f"{self.SEGMENT_PREFIX}{time.time_ns():020d}-{os.getpid()}-"
+            f"{uuid.uuid4().hex[:8]}{self.SEGMENT_SUFFIX}"
+        )
+        path = os.path.join(self.directory, name)
+        # Hidden until complete, readers only list the final name
+        partial_path = os.path.join(self.directory, f".{name}.tmp")
+        with open(partial_path, "wb") as f:
+            np.save(f, records)
+        os.replace(partial_path, path)
+        return name, np.load(path, mmap_mode="r")
+
+    def _compact(self):
+        """
+        Merges segments into one. The largest is left alone while it holds most rows,
+        so each row is rewritten O(log n) times rather than on every put.
+        """
+        if fcntl is None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, self.LOCK_FILE), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # Another process is compacting
+
+            # Re-read under the lock, other processes may have added or merged segments
+            segments = {}
+            for name in self._segment_names():
+                records = self._read_segment(name)
+                if records is not None:
+                    segments[name] = records
+            if len(segments) <= self.max_segments:
+                return
+
+            largest = max(segments, key=lambda n: len(segments[n]))
+            total = sum(len(records) for records in segments.values())
+            if len(segments[largest]) * 2 > total:
+                del segments[largest]
+
+            merged: Dict[str, np.ndarray] = {}
+            for records in segments.values():
+                for key, vector in zip(records["key"], records["vector"]):
+                    merged.setdefault(key.decode("ascii"), vector)
+            name, records = self._write(list(merged), np.stack(list(merged.values())))
+
+            # Open memory maps of the removed files stay valid
+            for old in segments:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+
+        with self._lock:
+            for old in segments:
+                self._segments.pop(old, None)
+        self._refresh()
+        logger.info(f"Compacted {len(segments)} embedding segments into {name}")
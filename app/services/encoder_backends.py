@@ -0,0 +1,240 @@
+import abc
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Arguments of onnxruntime's quantize_dynamic, part of the cached model's key
+QUANTIZE_CONFIG: Dict[str, Any] = {
+    "weight_type": "QInt8",
+    "per_channel": False,
+    "reduce_range": False,
+}
+
+
+class EncoderBackend(abc.ABC):
+    """Turns texts into L2-normalized float32 sentence embeddings, one row per text."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        ...
+
+    @abc.abstractmethod
+    def count_tokens(self, text: str) -> int:
+        """Tokens of `text` under the model's tokenizer, special tokens excluded."""
+
+
+class TorchEncoder(EncoderBackend):
+    """The sentence-transformers model on PyTorch."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.model.tokenizer.encode(text, add_special_tokens=False))
+
+
+class OnnxEncoder(EncoderBackend):
+    """
+    The same transformer exported to ONNX and run on ONNX Runtime's CPU provider, with
+    the sentence-transformers mean pooling and normalization done in numpy. Needs
+    neither torch nor sentence-transformers, so it loads faster and in less memory.
+
+    Texts are encoded in batches of similar length to keep padding short.
+    """
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        session: Any,
+        tokenizer: Any,
+        max_seq_length: int = 256,
+        batch_size: int = 32,
+    ):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+        self.batch_size = batch_size
+
+        self._input_names = [i.name for i in session.get_inputs()]
+        dim = session.get_outputs()[0].shape[-1]
+        self.dimension = dim if isinstance(dim, int) else 0
+
+    @classmethod
+    def load(
+        cls,
+        model_name: str,
+        model_path: Optional[str] = None,
+        quantize: bool = False,
+        cache_dir: str = ".cache/onnx",
+        threads: int = 0,
+        revision: Optional[str] = None,
+        **kwargs,
+    ) -> "OnnxEncoder":
+        """
+        Loads `model_path`, or the ONNX export published with the model on the Hugging
+        Face hub at `revision` (branch, tag or commit, default main). With `quantize`
+        the weights are dynamically quantized to int8 once and the result is cached in
+        `cache_dir`, keyed by the source model, revision and quantization config.
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        # Bare names refer to the sentence-transformers organisation, as in the library
+        repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        if model_path is None:
+            from huggingface_hub import hf_hub_download
+
+            model_path = hf_hub_download(repo_id, "onnx/model.onnx", revision=revision)
+
+        if quantize:
+            model_path = _quantized_model(model_path, repo_id, cache_dir, revision)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+
+        start = time.perf_counter()
+        session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        logger.info(
+            f"Loaded ONNX encoder {model_path} in {time.perf_counter() - start:.2f}s"
+        )
+        tokenizer = AutoTokenizer.from_pretrained(repo_id, revision=revision)
+        return cls(session, tokenizer, **kwargs)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [texts[i] for i in order[start : start + self.batch_size]]
+            batches.append(self._encode_batch(batch))
+
+        vectors = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(batches)
+        return vectors
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        mask = encoded["attention_mask"].astype(np.int64)
+        feed = {}
+        for name in self._input_names:
+            if name in encoded:
+                feed[name] = encoded[name].astype(np.int64)
+            elif name == "token_type_ids":
+                feed[name] = np.zeros_like(mask)
+
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean over real tokens, then unit length, as the model's pooling config does
+        weights = mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * weights).sum(axis=1) / np.maximum(
+            weights.sum(axis=1), 1e-9
+        )
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+
+def _quantized_path(
+    model_path: str,
+    repo_id: str,
+    cache_dir: str,
+    revision: Optional[str] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Cache file of the quantized model. Its name hashes everything the output depends
+    on, so a new revision, a replaced source file or other settings never reuse it.
+    """
+    config = QUANTIZE_CONFIG if config is None else config
+    stat = os.stat(model_path)
+    try:
+        import onnxruntime
+
+        runtime = onnxruntime.__version__
+    except ImportError:
+        runtime = None
+
+    key = json.dumps(
+        {
+            "model_path": os.path.abspath(model_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "revision": revision,
+            "config": config,
+            "onnxruntime": runtime,
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    weight_type = config["weight_type"].lower()
+    return os.path.join(
+        cache_dir, repo_id.replace("/", "__"), f"{stem}_{weight_type}_{digest}.onnx"
+    )
+
+
+def _quantized_model(
+    model_path: str, repo_id: str, cache_dir: str, revision: Optional[str] = None
+) -> str:
+    quantized_path = _quantized_path(model_path, repo_id, cache_dir, revision)
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(os.path.dirname(quantized_path), exist_ok=True)
+    # Written aside and renamed, so a concurrent start never loads a partial file
+    partial_path = quantized_path.replace(".onnx", f".{os.getpid()}.tmp.onnx")
+    logger.info(f"Quantizing {model_path} to {QUANTIZE_CONFIG['weight_type']}")
+    quantize_dynamic(
+        model_path,
+        partial_path,
+        weight_type=getattr(QuantType, QUANTIZE_CONFIG["weight_type"]),
+        per_channel=QUANTIZE_CONFIG["per_channel"],
+        reduce_range=QUANTIZE_CONFIG["reduce_range"],
+    )
+    os.replace(partial_path, quantized_path)
+    return quantized_path
+
+
+def create_encoder(
+    backend: str, model_name: str, options: Optional[Dict[str, Any]] = None
+) -> EncoderBackend:
+    """`options` go to the ONNX loader (model_path, quantize, cache_dir, revision, ...)."""
+    if backend == "torch":
+        return TorchEncoder(model_name)
+    if backend == "onnx":
+        return OnnxEncoder.load(model_name, **(options or {}))
+    raise ValueError(f"Unknown encoder backend: {backend}")
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(RuntimeError):
+    pass
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for CPU-bound embedding work called from async handlers.
+    At most `max_workers` jobs run at once and at most `max_queue_size` wait for a
+    worker; anything beyond that is rejected instead of piling up behind the pool.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue_size: int = 64):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="embedding"
+        )
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait_seconds = 0.0
+        self._total_run_seconds = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            if self._queued >= self.max_queue_size:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Embedding queue is full ({self.max_queue_size} jobs waiting)"
+                )
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        submitted_at = time.perf_counter()
+        started = False
+        abandoned = False
+
+        def job():
+            nonlocal started
+            started_at = time.perf_counter()
+            with self._lock:
+                if abandoned:
+                    return None
+                started = True
+                self._queued -= 1
+                self._running += 1
+                self._total_wait_seconds += started_at - submitted_at
+
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._total_run_seconds += time.perf_counter() - started_at
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, job)
+        finally:
+            # A caller cancelled while its job waited: the pool drops the work item (or
+            # the job skips it), so the queue slot is given back here
+            with self._lock:
+                if not started:
+                    abandoned = True
+                    self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": (
+                    1000 * self._total_wait_seconds / finished if finished else 0.0
+                ),
+                "avg_run_ms": (
+                    1000 * self._total_run_seconds / finished if finished else 0.0
+                ),
+            }
+
+    def shutdown(self, wait: bool = True):
+        logger.info("Shutting down embedding executor")
+        self._executor.shutdown(wait=wait)
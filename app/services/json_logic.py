@@ -0,0 +1,297 @@
+import json
+import logging
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+Evaluator = Callable[[Any], Any]
+
+_MISSING = object()
+
+
+class JsonLogicError(ValueError):
+    pass
+
+
+class CompiledRule:
+    """
+    A JSON Logic rule compiled once into a tree of Python closures.
+
+    `var` paths are split at compile time and comparisons against literals are
+    specialised, so evaluating a record is just a handful of function calls.
+    Comparisons involving a missing (null) value are false, `!=` against a
+    missing value is true.
+    """
+
+    def __init__(self, rule: Any, evaluator: Evaluator, variables: Set[str]):
+        self.rule = rule
+        self.variables = variables
+        self._evaluator = evaluator
+
+    def __call__(self, data: Any) -> Any:
+        return self._evaluator(data)
+
+    def matches(self, data: Any) -> bool:
+        return bool(self._evaluator(data))
+
+    def evaluate_many(self, records: List[Any]) -> List[bool]:
+        evaluator = self._evaluator
+        return [bool(evaluator(record)) for record in records]
+
+
+def compile_rule(rule: Any) -> CompiledRule:
+    return _compile_canonical(json.dumps(rule, sort_keys=True))
+
+
+def evaluate(rule: Any, data: Any) -> Any:
+    return compile_rule(rule)(data)
+
+
+@lru_cache(maxsize=1024)
+def _compile_canonical(canonical_rule: str) -> CompiledRule:
+    rule = json.loads(canonical_rule)
+    variables: Set[str] = set()
+    evaluator = _compile(rule, variables)
+    return CompiledRule(rule, evaluator, variables)
+
+
+def _compile(node: Any, variables: Set[str]) -> Evaluator:
+    if isinstance(node, list):
+        items = [_compile(item, variables) for item in node]
+        return lambda data: [item(data) for item in items]
+
+    if not isinstance(node, dict):
+        return lambda data: node
+
+    if len(node) != 1:
+        raise JsonLogicError(f"Expected a single operator, got {sorted(node)}")
+
+    op, args = next(iter(node.items()))
+    if op not in _COMPILERS:
+        raise JsonLogicError(f"Unsupported operator: {op!r}")
+
+    return _COMPILERS[op](args if isinstance(args, list) else [args], variables)
+
+
+def _compile_var(args: List[Any], variables: Set[str]) -> Evaluator:
+    path = args[0] if args else ""
+    default = args[1] if len(args) > 1 else None
+
+    if isinstance(path, (dict, list)):
+        raise JsonLogicError("Dynamic var paths are not supported")
+
+    dotted = str(path)
+    if dotted == "":
+        return lambda data: data
+
+    variables.add(dotted)
+    keys = tuple(int(k) if k.isdigit() else k for k in dotted.split("."))
+
+    def get(data):
+        # Flattened records keep the whole dotted path as a single key
+        if isinstance(data, dict) and dotted in data:
+            value = data[dotted]
+            return default if value is None else value
+
+        current = data
+        for key in keys:
+            if isinstance(current, dict):
+                current = current.get(key if isinstance(key, str) else str(key), _MISSING)
+            elif isinstance(current, (list, tuple)) and isinstance(key, int):
+                current = current[key] if key < len(current) else _MISSING
+            else:
+                return default
+            if current is _MISSING or current is None:
+                return default
+        return current
+
+    return get
+
+
+def _compile_and(args: List[Any], variables: Set[str]) -> Evaluator:
+    items = [_compile(arg, variables) for arg in args]
+
+    def and_(data):
+        value = None
+        for item in items:
+            value = item(data)
+            if not value:
+                return value
+        return value
+
+    return and_
+
+
+def _compile_or(args: List[Any], variables: Set[str]) -> Evaluator:
+    items = [_compile(arg, variables) for arg in args]
+
+    def or_(data):
+        value = None
+        for item in items:
+            value = item(data)
+            if value:
+                return value
+        return value
+
+    return or_
+
+
+def _compile_if(args: List[Any], variables: Set[str]) -> Evaluator:
+    items = [_compile(arg, variables) for arg in args]
+    pairs = [(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+    fallback = items[-1] if len(items) % 2 == 1 else (lambda data: None)
+
+    def if_(data):
+        for condition, then in pairs:
+            if condition(data):
+                return then(data)
+        return fallback(data)
+
+    return if_
+
+
+def _compile_not(args: List[Any], variables: Set[str]) -> Evaluator:
+    item = _compile(args[0] if args else None, variables)
+    return lambda data: not item(data)
+
+
+def _compile_truthy(args: List[Any], variables: Set[str]) -> Evaluator:
+    item = _compile(args[0] if args else None, variables)
+    return lambda data: bool(item(data))
+
+
+def _loose_equals(a: Any, b: Any) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, str) != isinstance(b, str):
+        try:
+            return float(a) == float(b)
+        except (TypeError, ValueError):
+            return False
+    return a == b
+
+
+def _strict_equals(a: Any, b: Any) -> bool:
+    return type(a) is type(b) and a == b
+
+
+def _compile_equality(compare: Callable[[Any, Any], bool], negate: bool):
+    def compile_(args: List[Any], variables: Set[str]) -> Evaluator:
+        left, right = (_compile(arg, variables) for arg in _pad(args, 2))
+        if negate:
+            return lambda data: not compare(left(data), right(data))
+        return lambda data: compare(left(data), right(data))
+
+    return compile_
+
+
+def _compare(op: Callable[[Any, Any], bool], a: Any, b: Any) -> bool:
+    if a is None or b is None:
+        return False
+    try:
+        return op(a, b)
+    except TypeError:
+        try:
+            return op(float(a), float(b))
+        except (TypeError, ValueError):
+            return False
+
+
+def _compile_comparison(op: Callable[[Any, Any], bool], allow_between: bool):
+    def compile_(args: List[Any], variables: Set[str]) -> Evaluator:
+        # {"<": [a, b, c]} is the JSON Logic "between" form: a < b < c
+        if allow_between and len(args) == 3:
+            low, mid, high = (_compile(arg, variables) for arg in args)
+
+            def between(data):
+                value = mid(data)
+                return _compare(op, low(data), value) and _compare(op, value, high(data))
+
+            return between
+
+        left_node, right_node = _pad(args, 2)
+        left = _compile(left_node, variables)
+
+        # Most generated rules compare a var against a number, skip the right-hand call
+        if _is_number(right_node):
+
+            def compare_literal(data):
+                value = left(data)
+                if value is None:
+                    return False
+                try:
+                    return op(value, right_node)
+                except TypeError:
+                    return _compare(op, value, right_node)
+
+            return compare_literal
+
+        right = _compile(right_node, variables)
+        return lambda data: _compare(op, left(data), right(data))
+
+    return compile_
+
+
+def _compile_in(args: List[Any], variables: Set[str]) -> Evaluator:
+    needle_node, haystack_node = _pad(args, 2)
+    needle = _compile(needle_node, variables)
+
+    if isinstance(haystack_node, list) and all(
+        not isinstance(item, (dict, list)) for item in haystack_node
+    ):
+        members = set(item for item in haystack_node if _is_hashable(item))
+
+        def in_literal(data):
+            value = needle(data)
+            return _is_hashable(value) and value in members
+
+        return in_literal
+
+    haystack = _compile(haystack_node, variables)
+
+    def in_(data):
+        value, container = needle(data), haystack(data)
+        if container is None or value is None:
+            return False
+        if isinstance(container, str):
+            return isinstance(value, str) and value in container
+        try:
+            return value in container
+        except TypeError:
+            return False
+
+    return in_
+
+
+def _pad(args: List[Any], size: int) -> List[Any]:
+    return (list(args) + [None] * size)[:size]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_hashable(value: Any) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+_COMPILERS: Dict[str, Callable[[List[Any], Set[str]], Evaluator]] = {
+    "var": _compile_var,
+    "and": _compile_and,
+    "or": _compile_or,
+    "if": _compile_if,
+    "?:": _compile_if,
+    "!": _compile_not,
+    "!!": _compile_truthy,
+    "==": _compile_equality(_loose_equals, negate=False),
+    "!=": _compile_equality(_loose_equals, negate=True),
+    "===": _compile_equality(_strict_equals, negate=False),
+    "!==": _compile_equality(_strict_equals, negate=True),
+    ">": _compile_comparison(operator.gt, allow_between=False),
+    ">=": _compile_comparison(operator.ge, allow_between=False),
+    "<": _compile_comparison(operator.lt, allow_between=True),
+    "<=": _compile_comparison(operator.le, allow_between=True),
+    "in": _compile_in,
+}
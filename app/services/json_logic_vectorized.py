@@ -0,0 +1,444 @@
+import json
+import logging
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set
+
+import numpy as np
+
+from app.services.json_logic import (
+    JsonLogicError,
+    _compare as _compare_values,
+    _loose_equals,
+    _strict_equals,
+    compile_rule,
+)
+
+logger = logging.getLogger(__name__)
+
+Columns = Mapping[str, np.ndarray]
+VectorEvaluator = Callable[[Columns, int], Any]
+
+
+class VectorizedRule:
+    """
+    A JSON Logic rule compiled for columnar data: one NumPy array per `var` path.
+
+    Numeric columns use NaN for missing values, object columns use None. As in the
+    scalar engine, comparisons against a missing value are false and `!=` is true;
+    `and`/`or` produce boolean masks rather than JSON Logic's pass-through values.
+    """
+
+    def __init__(self, rule: Any, evaluator: VectorEvaluator, variables: Set[str]):
+        self.rule = rule
+        self.variables = variables
+        self._evaluator = evaluator
+
+    def __call__(self, columns: Columns, n_rows: int = None) -> Any:  # type: ignore
+        return self._evaluator(columns, _row_count(columns, n_rows))
+
+    def mask(self, columns: Columns, n_rows: int = None) -> np.ndarray:  # type: ignore
+        n = _row_count(columns, n_rows)
+        return _broadcast(_truthy(self._evaluator(columns, n)), n)
+
+
+def compile_vectorized(rule: Any) -> VectorizedRule:
+    return _compile_canonical(json.dumps(rule, sort_keys=True))
+
+
+def evaluate_columns(rule: Any, columns: Columns, n_rows: int = None) -> np.ndarray:  # type: ignore
+    return compile_vectorized(rule).mask(columns, n_rows)
+
+
+def records_to_columns(
+    records: List[Any], paths: Iterable[str]
+) -> Dict[str, np.ndarray]:
+    columns = {}
+    for path in paths:
+        getter = compile_rule({"var": path})
+        columns[path] = _to_column([getter(record) for record in records])
+    return columns
+
+
+def _to_column(values: List[Any]) -> np.ndarray:
+    present = [v for v in values if v is not None]
+    if present and len(present) == len(values) and all(
+        isinstance(v, bool) for v in present
+    ):
+        return np.array(values, dtype=bool)
+
+    # Bools mixed with numbers stay objects, True === 1.0 must stay false
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return np.array(
+            [np.nan if v is None else v for v in values], dtype=np.float64
+        )
+
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _row_count(columns: Columns, n_rows: int = None) -> int:  # type: ignore
+    if n_rows is not None:
+        return n_rows
+    for column in columns.values():
+        return len(column)
+    return 0
+
+
+@lru_cache(maxsize=256)
+def _compile_canonical(canonical_rule: str) -> VectorizedRule:
+    rule = json.loads(canonical_rule)
+    variables: Set[str] = set()
+    evaluator = _compile(rule, variables)
+    return VectorizedRule(rule, evaluator, variables)
+
+
+def _compile(node: Any, variables: Set[str]) -> VectorEvaluator:
+    if isinstance(node, list):
+        raise JsonLogicError("Array literals are only supported as 'in' haystacks")
+
+    if not isinstance(node, dict):
+        return lambda columns, n: node
+
+    if len(node) != 1:
+        raise JsonLogicError(f"Expected a single operator, got {sorted(node)}")
+
+    op, args = next(iter(node.items()))
+    if op not in _COMPILERS:
+        raise JsonLogicError(f"Unsupported operator: {op!r}")
+
+    return _COMPILERS[op](args if isinstance(args, list) else [args], variables)
+
+
+def _is_array(value: Any) -> bool:
+    return isinstance(value, np.ndarray)
+
+
+def _broadcast(value: Any, n: int) -> np.ndarray:
+    if _is_array(value):
+        return value
+    return np.full(n, value)
+
+
+def _missing(values: Any) -> Any:
+    if not _is_array(values):
+        return values is None
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    if values.dtype == object:
+        return np.fromiter(
+            (v is None or (isinstance(v, float) and v != v) for v in values),
+            dtype=bool,
+            count=len(values),
+        )
+    return np.zeros(len(values), dtype=bool)
+
+
+def _truthy(values: Any) -> Any:
+    if not _is_array(values):
+        return bool(values)
+    if values.dtype == bool:
+        return values
+    if values.dtype.kind in "iuf":
+        return (values != 0) & ~np.isnan(values.astype(np.float64, copy=False))
+    return np.fromiter(
+        (bool(v) and not (isinstance(v, float) and v != v) for v in values),
+        dtype=bool,
+        count=len(values),
+    )
+
+
+def _numeric(values: Any) -> Any:
+    """Numeric view of an operand, or None when it isn't a number or numeric column."""
+    if not _is_array(values):
+        if isinstance(values, (int, float)) and not isinstance(values, bool):
+            return values
+        return None
+    if values.dtype.kind in "biuf":
+        return values
+    return None
+
+
+def _parse_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _numeric_pair(left: Any, right: Any) -> Any:
+    """
+    Both operands as numbers when the scalar engine would compare them as numbers:
+    two numbers, or a number and a string literal (which it converts with float()).
+    An unparseable string becomes NaN, so comparisons and `==` are false as there.
+    """
+    left_number, right_number = _numeric(left), _numeric(right)
+    if left_number is None and right_number is not None and isinstance(left, str):
+        left_number = _parse_float(left)
+        left_number = np.nan if left_number is None else left_number
+    if right_number is None and left_number is not None and isinstance(right, str):
+        right_number = _parse_float(right)
+        right_number = np.nan if right_number is None else right_number
+    if left_number is None or right_number is None:
+        return None
+    return left_number, right_number
+
+
+def _scalar(value: Any) -> Any:
+    # Row values as the scalar engine sees them: Python objects, None when missing
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _elementwise(function: Callable[[Any, Any], Any], left: Any, right: Any) -> Any:
+    """Applies a scalar-engine function row by row, for mixed and object operands."""
+    if not _is_array(left) and not _is_array(right):
+        return bool(function(left, right))
+
+    n = len(left) if _is_array(left) else len(right)
+    lefts = left if _is_array(left) else [left] * n
+    rights = right if _is_array(right) else [right] * n
+    return np.fromiter(
+        (bool(function(_scalar(a), _scalar(b))) for a, b in zip(lefts, rights)),
+        dtype=bool,
+        count=n,
+    )
+
+
+def _compile_var(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+    path = args[0] if args else ""
+    default = args[1] if len(args) > 1 else None
+
+    if isinstance(path, (dict, list)) or path == "":
+        raise JsonLogicError("Columnar evaluation needs a literal var path")
+
+    dotted = str(path)
+    variables.add(dotted)
+
+    def get(columns, n):
+        column = columns.get(dotted)
+        if column is None:
+            return np.full(n, np.nan if default is None else default)
+        if default is None:
+            return column
+        return np.where(_missing(column), default, column)
+
+    return get
+
+
+def _compile_and(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+    items = [_compile(arg, variables) for arg in args]
+
+    def and_(columns, n):
+        result = np.ones(n, dtype=bool)
+        for item in items:
+            np.logical_and(result, _truthy(item(columns, n)), out=result)
+        return result
+
+    return and_
+
+
+def _compile_or(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+    items = [_compile(arg, variables) for arg in args]
+
+    def or_(columns, n):
+        result = np.zeros(n, dtype=bool)
+        for item in items:
+            np.logical_or(result, _truthy(item(columns, n)), out=result)
+        return result
+
+    return or_
+
+
+def _compile_if(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+    items = [_compile(arg, variables) for arg in args]
+    pairs = [(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+    fallback = items[-1] if len(items) % 2 == 1 else (lambda columns, n: None)
+
+    def if_(columns, n):
+        result = fallback(columns, n)
+        for condition, then in reversed(pairs):
+            result = np.where(_truthy(condition(columns, n)), then(columns, n), result)
+        return result
+
+    return if_
+
+
+def _compile_not(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+    item = _compile(args[0] if args else None, variables)
+    return lambda columns, n: np.logical_not(_truthy(item(columns, n)))
+
+
+def _compile_truthy(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+    item = _compile(args[0] if args else None, variables)
+    return lambda columns, n: _truthy(item(columns, n))
+
+
+def _equals(left: Any, right: Any, strict: bool) -> Any:
+    if left is None or right is None:
+        return _missing(right) if left is None else _missing(left)
+
+    if not strict:
+        pair = _numeric_pair(left, right)
+        if pair is not None:
+            with np.errstate(invalid="ignore"):
+                return np.equal(*pair)
+
+    if _is_array(left) != _is_array(right):
+        array, scalar = (left, right) if _is_array(left) else (right, left)
+        if strict and _kind_mismatch(array, scalar):
+            return np.zeros(len(array), dtype=bool)
+        if array.dtype.kind in "biuf" and (strict or isinstance(scalar, bool)):
+            with np.errstate(invalid="ignore"):
+                return np.equal(array, scalar)
+        if isinstance(scalar, str) and (strict or _parse_float(scalar) is None):
+            # Only strings equal a string that isn't a number, in both modes
+            return np.equal(array, scalar, dtype=object).astype(bool)
+
+    # Mixed object columns take the scalar engine's rules row by row, so a row's
+    # result doesn't depend on which other rows share its chunk
+    return _elementwise(_strict_equals if strict else _loose_equals, left, right)
+
+
+def _kind_mismatch(array: np.ndarray, scalar: Any) -> bool:
+    if array.dtype.kind in "iuf":
+        return not isinstance(scalar, (int, float)) or isinstance(scalar, bool)
+    if array.dtype.kind == "b":
+        return not isinstance(scalar, bool)
+    return False
+
+
+def _compile_equality(strict: bool, negate: bool):
+    def compile_(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+        left_node, right_node = (list(args) + [None] * 2)[:2]
+        left, right = _compile(left_node, variables), _compile(right_node, variables)
+
+        def equals(columns, n):
+            result = _equals(left(columns, n), right(columns, n), strict)
+            return np.logical_not(result) if negate else result
+
+        return equals
+
+    return compile_
+
+
+def _compare(op: Callable[[Any, Any], Any], left: Any, right: Any) -> Any:
+    pair = _numeric_pair(left, right)
+    if pair is not None:
+        # NaN (missing) compares false, which is exactly the semantics we want
+        with np.errstate(invalid="ignore"):
+            return op(*pair)
+
+    return _elementwise(lambda a, b: _compare_values(op, a, b), left, right)
+
+
+def _compile_comparison(op: Callable[[Any, Any], Any], allow_between: bool):
+    def compile_(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+        items = [_compile(arg, variables) for arg in args]
+
+        # {"<": [a, b, c]} is the JSON Logic "between" form: a < b < c
+        if allow_between and len(items) == 3:
+            low, mid, high = items
+
+            def between(columns, n):
+                value = mid(columns, n)
+                return np.logical_and(
+                    _compare(op, low(columns, n), value),
+                    _compare(op, value, high(columns, n)),
+                )
+
+            return between
+
+        left, right = (items + [lambda columns, n: None] * 2)[:2]
+        return lambda columns, n: _compare(op, left(columns, n), right(columns, n))
+
+    return compile_
+
+
+def _compile_in(args: List[Any], variables: Set[str]) -> VectorEvaluator:
+    needle_node, haystack_node = (list(args) + [None] * 2)[:2]
+    needle = _compile(needle_node, variables)
+
+    # Column membership in a literal list: {"in": [{"var": "state"}, ["KA", "MH"]]}
+    if isinstance(haystack_node, list):
+        members = list(haystack_node)
+
+        def in_literal(columns, n):
+            value = needle(columns, n)
+            if not _is_array(value):
+                return value is not None and value in members
+            result = np.zeros(n, dtype=bool)
+            for member in members:
+                if member is not None:
+                    np.logical_or(result, _equals(value, member, strict=True), out=result)
+            return result
+
+        return in_literal
+
+    haystack = _compile(haystack_node, variables)
+
+    # Literal membership in an array/string column: {"in": ["veteran", {"var": "tags"}]}
+    def in_column(columns, n):
+        value, container = needle(columns, n), haystack(columns, n)
+        if not _is_array(value) and not _is_array(container):
+            return _contains(container, value)
+
+        # Common case (tags): one literal against a column of lists
+        if _is_array(container) and isinstance(value, (str, int, float, bool)):
+            return np.fromiter(
+                (
+                    type(c) in _SEQUENCE_TYPES and value in c
+                    or type(c) is str and isinstance(value, str) and value in c
+                    for c in container
+                ),
+                dtype=bool,
+                count=n,
+            )
+
+        containers = container if _is_array(container) else [container] * n
+        values = value if _is_array(value) else [value] * n
+        return np.fromiter(
+            (_contains(c, v) for c, v in zip(containers, values)),
+            dtype=bool,
+            count=n,
+        )
+
+    return in_column
+
+
+_SEQUENCE_TYPES = (list, tuple, set, frozenset)
+
+
+def _contains(container: Any, value: Any) -> bool:
+    if container is None or value is None or isinstance(container, float):
+        return False
+    if isinstance(container, str):
+        return isinstance(value, str) and value in container
+    try:
+        return value in container
+    except TypeError:
+        return False
+
+
+_COMPILERS: Dict[str, Callable[[List[Any], Set[str]], VectorEvaluator]] = {
+    "var": _compile_var,
+    "and": _compile_and,
+    "or": _compile_or,
+    "if": _compile_if,
+    "?:": _compile_if,
+    "!": _compile_not,
+    "!!": _compile_truthy,
+    "==": _compile_equality(strict=False, negate=False),
+    "!=": _compile_equality(strict=False, negate=True),
+    "===": _compile_equality(strict=True, negate=False),
+    "!==": _compile_equality(strict=True, negate=True),
+    ">": _compile_comparison(operator.gt, allow_between=False),
+    ">=": _compile_comparison(operator.ge, allow_between=False),
+    "<": _compile_comparison(operator.lt, allow_between=True),
+    "<=": _compile_comparison(operator.le, allow_between=True),
+    "in": _compile_in,
+}
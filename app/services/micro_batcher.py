@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesces encode calls from concurrent callers into one batched forward pass.
+
+    The first request opens a window of `max_wait_ms`; everything that arrives before
+    the window closes (or until `max_batch_size` texts are collected) is encoded
+    together and each caller gets its own rows back through a Future.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_wait_ms: float = 2.0,
+        max_batch_size: int = 64,
+    ):
+        self.encode_fn = encode_fn
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._texts = 0
+        self._encoded_texts = 0
+        self._batches = 0
+        self._max_batch = 0
+
+    def submit(self, texts: List[str]) -> "Future[np.ndarray]":
+        self._ensure_started()
+        future: "Future[np.ndarray]" = Future()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            batch_size = len(item[0])
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            stopping = False
+
+            while batch_size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                batch_size += len(item[0])
+
+            self._run_batch(batch)
+            if stopping:
+                return
+
+    def _run_batch(self, batch: List[Tuple[List[str], "Future[np.ndarray]"]]):
+        # Concurrent requests often share texts, encode each distinct one once
+        unique_texts = list(dict.fromkeys(t for texts, _ in batch for t in texts))
+        try:
+            vectors = self.encode_fn(unique_texts)
+        except Exception as e:
+            logger.error(f"Batched encode of {len(unique_texts)} texts failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        rows = {text: i for i, text in enumerate(unique_texts)}
+        for texts, future in batch:
+            future.set_result(vectors[[rows[t] for t in texts]])
+
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._texts += sum(len(texts) for texts, _ in batch)
+            self._encoded_texts += len(unique_texts)
+            self._batches += 1
+            self._max_batch = max(self._max_batch, len(unique_texts))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_wait_ms": self.max_wait_ms,
+                "max_batch_size": self.max_batch_size,
+                "requests": self._requests,
+                "texts": self._texts,
+                "encoded_texts": self._encoded_texts,
+                "batches": self._batches,
+                "avg_batch_size": (
+                    self._encoded_texts / self._batches if self._batches else 0.0
+                ),
+                "max_batch_size_seen": self._max_batch,
+            }
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,78 @@
+import logging
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_phrase(text: str) -> str:
+    """Lowercase words joined by single spaces, so "Monthly_Income" == "monthly income"."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+class PhraseMatcher:
+    """
+    Finds every known phrase in a text in one left-to-right pass over its words.
+
+    Phrases are indexed as a word trie flattened into hash sets: the full phrases and
+    all of their proper word prefixes. From each word of the text the match extends
+    only while the words so far are a known prefix, so the cost per text depends on
+    its length and the longest phrase, not on how many phrases are indexed. Matching
+    is on whole words, "age" never fires inside "average".
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self._phrases: Set[str] = set()
+        self._prefixes: Set[str] = set()
+
+        for phrase in phrases:
+            words = _WORD.findall(phrase.lower())
+            if not words:
+                continue
+            self._phrases.add(" ".join(words))
+            for end in range(1, len(words)):
+                self._prefixes.add(" ".join(words[:end]))
+
+        logger.debug(f"Indexed {len(self._phrases)} phrases")
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def __contains__(self, phrase: str) -> bool:
+        return normalize_phrase(phrase) in self._phrases
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """All matches as (start word, end word, phrase), including nested ones."""
+        words = _WORD.findall(text.lower())
+        matches = []
+
+        for start in range(len(words)):
+            candidate = words[start]
+            end = start + 1
+            while True:
+                if candidate in self._phrases:
+                    matches.append((start, end, candidate))
+                if candidate not in self._prefixes or end == len(words):
+                    break
+                candidate = f"{candidate} {words[end]}"
+                end += 1
+
+        return matches
+
+    def find_phrases(self, text: str) -> List[str]:
+        """
+        Distinct matched phrases in order of appearance, leaving out any that only
+        occur inside a longer match ("cibil" within "cibil score").
+        """
+        matches = sorted(self.find(text), key=lambda m: (m[0], m[0] - m[1]))
+
+        covered_until = 0
+        phrases: Dict[str, None] = {}
+        for start, end, phrase in matches:
+            if end <= covered_until:
+                continue
+            phrases[phrase] = None
+            covered_until = max(covered_until, end)
+        return list(phrases)
@@ -0,0 +1,177 @@
+import logging
+import re
+import textwrap
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+_LIST_ITEM = re.compile(r"^(?:[-*+]|\d+[.)])\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# WordPiece splits rare words, amounts and codes into several pieces, so an estimated
+# window is held to max_tokens / margin to stay within the encoder's real budget
+ESTIMATE_SAFETY_MARGIN = 1.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Words plus punctuation marks, a lower bound on the encoder's WordPiece count."""
+    return len(_TOKEN.findall(text))
+
+
+class PolicyChunker:
+    """
+    Structure-aware chunker for markdown policy documents.
+
+    Headings open sections and a chunk never spans two of them. Within a section,
+    paragraphs and list items are packed whole into windows of up to `max_tokens`
+    (section title included), and consecutive windows share trailing units worth up
+    to `overlap_tokens` so a rule near a boundary keeps its neighbours. Units longer
+    than a window are split by sentence, then by words. Nothing is dropped for being
+    short, a one-line rule is still a rule.
+
+    Tokens are measured with `count_tokens`, which should be the encoder's tokenizer
+    so a chunk is never truncated at its max sequence length. With the default
+    `estimate_tokens`, which undercounts WordPiece tokens, windows are packed to
+    `max_tokens / safety_margin` (ESTIMATE_SAFETY_MARGIN unless given).
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 160,
+        overlap_tokens: int = 24,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        safety_margin: Optional[float] = None,
+    ):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        if safety_margin is None:
+            safety_margin = ESTIMATE_SAFETY_MARGIN if count_tokens is estimate_tokens else 1.0
+        if safety_margin < 1.0:
+            raise ValueError("safety_margin must be at least 1")
+
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens
+        self.safety_margin = safety_margin
+        # Budgets in count_tokens units
+        self._window_tokens = int(max_tokens / safety_margin)
+        self._overlap_window = int(overlap_tokens / safety_margin)
+
+    def chunk(
+        self, document: str, doc_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Chunks as dicts with `text`, `doc_id`, `section`, `index` and `tokens`."""
+        chunks = []
+        for section, units in self._sections(document):
+            for body in self._pack(section, units):
+                text = f"{section}\n{body}" if section else body
+                chunks.append(
+                    {
+                        "text": text,
+                        "doc_id": doc_id,
+                        "section": section,
+                        "index": len(chunks),
+                        "tokens": self.count_tokens(text),
+                    }
+                )
+        return chunks
+
+    def _sections(self, document: str) -> List[Tuple[str, List[str]]]:
+        sections: List[Tuple[str, List[str]]] = []
+        headings: List[Tuple[int, str]] = []
+        units: List[str] = []
+        block: List[str] = []
+
+        def flush_block():
+            if block:
+                units.append(" ".join(block))
+                block.clear()
+
+        def flush_section():
+            flush_block()
+            if units:
+                section = " > ".join(title for _, title in headings)
+                sections.append((section, units.copy()))
+                units.clear()
+
+        for line in textwrap.dedent(document).splitlines():
+            line = line.strip()
+            heading = _HEADING.match(line)
+
+            if heading:
+                flush_section()
+                level = len(heading.group(1))
+                # A heading closes every open heading at its level or deeper
+                headings = [h for h in headings if h[0] < level]
+                headings.append((level, heading.group(2)))
+            elif not line:
+                flush_block()
+            else:
+                if _LIST_ITEM.match(line):
+                    flush_block()
+                block.append(line)
+
+        flush_section()
+        return sections
+
+    def _pack(self, section: str, units: List[str]) -> List[str]:
+        budget = self._window_tokens - (self.count_tokens(section) if section else 0)
+        budget = max(budget, self._overlap_window + 1)
+
+        pieces = [
+            (piece, self.count_tokens(piece))
+            for unit in units
+            for piece in self._split(unit, budget)
+        ]
+
+        windows: List[str] = []
+        window: List[Tuple[str, int]] = []
+        for piece, tokens in pieces:
+            if window and sum(t for _, t in window) + tokens > budget:
+                windows.append("\n".join(p for p, _ in window))
+                window = self._overlap(window, budget - tokens)
+            window.append((piece, tokens))
+
+        if window:
+            windows.append("\n".join(p for p, _ in window))
+        return windows
+
+    def _overlap(
+        self, window: List[Tuple[str, int]], room: int
+    ) -> List[Tuple[str, int]]:
+        # Trailing units of the last window, as many as fit the overlap and the budget
+        limit = min(self._overlap_window, room)
+        tail: List[Tuple[str, int]] = []
+        total = 0
+        for piece, tokens in reversed(window):
+            if total + tokens > limit:
+                break
+            tail.insert(0, (piece, tokens))
+            total += tokens
+        return tail
+
+    def _split(self, unit: str, budget: int) -> List[str]:
+        if self.count_tokens(unit) <= budget:
+            return [unit]
+
+        pieces = []
+        for sentence in _SENTENCE_END.split(unit):
+            if self.count_tokens(sentence) <= budget:
+                pieces.append(sentence)
+                continue
+
+            # Run-on sentence, fall back to word windows
+            current: List[str] = []
+            current_tokens = 0
+            for word in sentence.split():
+                tokens = self.count_tokens(word)
+                if current and current_tokens + tokens > budget:
+                    pieces.append(" ".join(current))
+                    current, current_tokens = [], 0
+                current.append(word)
+                current_tokens += tokens
+            if current:
+                pieces.append(" ".join(current))
+        return pieces
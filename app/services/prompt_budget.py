@@ -0,0 +1,110 @@
+import logging
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services.policy_chunker import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class PromptBudget:
+    """
+    Token accounting for LLM prompts.
+
+    Text is counted locally with `count_tokens` (the embedding model's tokenizer in
+    the app) and scaled by a running ratio of the provider's measured prompt tokens
+    to the local count, so budgets track the LLM's own tokenizer without a
+    count-tokens round trip per request.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        calibration_weight: float = 0.1,
+    ):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.calibration_weight = calibration_weight
+
+        self._ratio = 1.0
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._estimated_tokens = 0
+        self._measured_requests = 0
+        self._measured_tokens = 0
+        self._dropped_items = 0
+
+    def count(self, text: str) -> int:
+        return self.scale(self.count_tokens(text))
+
+    def scale(self, local_tokens: int) -> int:
+        """Converts a local token count to the provider's, as calibrated so far."""
+        return math.ceil(local_tokens * self._ratio)
+
+    def fill(
+        self,
+        items: Sequence[str],
+        budget: int,
+        header: str = "",
+        separator: str = "",
+    ) -> Tuple[List[str], int]:
+        """
+        Takes items in the given (best first) order while they fit in `budget`,
+        skipping any that don't. The header and separators are only paid for once an
+        item is taken. Returns the chosen items and the tokens they use.
+        """
+        header_tokens = self.count(header) if header else 0
+        separator_tokens = self.count(separator) if separator else 0
+
+        chosen: List[str] = []
+        used = 0
+        for item in items:
+            tokens = self.count(item) + (separator_tokens if chosen else header_tokens)
+            if used + tokens > budget:
+                continue
+            chosen.append(item)
+            used += tokens
+
+        dropped = len(items) - len(chosen)
+        if dropped:
+            with self._lock:
+                self._dropped_items += dropped
+            logger.debug(f"Dropped {dropped} of {len(items)} items to fit {budget} tokens")
+        return chosen, used
+
+    def record(self, local_tokens: int, measured_tokens: Optional[int] = None) -> int:
+        """
+        Records one prompt's local token count and, when the provider reports it, the
+        measured count, which also updates the calibration. Returns the estimate.
+        """
+        with self._lock:
+            estimated = self.scale(local_tokens)
+            self._requests += 1
+            self._estimated_tokens += estimated
+
+            if measured_tokens and local_tokens:
+                self._measured_requests += 1
+                self._measured_tokens += measured_tokens
+                ratio = measured_tokens / local_tokens
+                self._ratio += self.calibration_weight * (ratio - self._ratio)
+
+        return estimated
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_tokens": self.max_tokens,
+                "requests": self._requests,
+                "avg_estimated_tokens": (
+                    self._estimated_tokens / self._requests if self._requests else 0.0
+                ),
+                "avg_measured_tokens": (
+                    self._measured_tokens / self._measured_requests
+                    if self._measured_requests
+                    else 0.0
+                ),
+                "calibration_ratio": self._ratio,
+                "dropped_items": self._dropped_items,
+            }
@@ -0,0 +1,59 @@
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DTYPES = ("float32", "float16", "int8")
+
+# Rows dequantized at a time, small enough that the float32 block stays in cache
+_BLOCK_ROWS = 4096
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Stores float vectors as `dtype`. Returns the codes and, for int8, a float32 scale
+    per row (symmetric, the row's largest magnitude maps to 127).
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float32":
+        return np.ascontiguousarray(vectors), None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+
+    scales = np.abs(vectors).max(axis=-1) / 127.0 if vectors.size else np.zeros(len(vectors))
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.rint(vectors / scales[..., None]).astype(np.int8)
+    return codes, scales
+
+
+def dequantize(codes: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    vectors = np.asarray(codes, dtype=np.float32)
+    if scales is not None:
+        vectors = vectors * scales[..., None]
+    return vectors
+
+
+def quantized_scores(
+    queries: np.ndarray, codes: np.ndarray, scales: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    float32 queries x stored rows inner products. Quantized rows are widened a block
+    at a time so the matmul still runs in BLAS without a float32 copy of the matrix;
+    int8 scales are applied to the (queries x rows) result instead of the rows.
+    """
+    if codes.dtype == np.float32:
+        return queries @ codes.T
+
+    scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), _BLOCK_ROWS):
+        block = codes[start : start + _BLOCK_ROWS].astype(np.float32)
+        scores[:, start : start + len(block)] = queries @ block.T
+
+    if scales is not None:
+        scores *= scales
+    return scores
@@ -1,47 +1,183 @@
+import hashlib
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
+from app.services.bm25_index import BM25Index, reciprocal_rank_fusion
+from app.services.embedding_service import EmbeddingContext
+from app.services.policy_chunker import PolicyChunker
+from app.services.vector_store import VectorStore
+
 logger = logging.getLogger(__name__)
 
+# Chunk dicts of a document and their embeddings, row for row
+_EmbeddedChunks = Tuple[List[Dict[str, Any]], np.ndarray]
+
 
 class RAGService:
-    def __init__(self, embedding_service, policy_documents: List[str]):
+    def __init__(
+        self,
+        embedding_service,
+        policy_documents: List[str],
+        context_doc_cache_size: int = 256,
+        sparse_weight: float = 1.0,
+        rrf_k: int = 60,
+        chunker: Optional[PolicyChunker] = None,
+        vector_dtype: str = "float32",
+    ):
         self.embedding_service = embedding_service
         self.policy_documents = policy_documents
-        self.policy_embeddings: Optional[np.ndarray] = None
+        self.chunker = chunker or PolicyChunker()
+        # Chunk vectors can be held as float16/int8, retrieval only needs their ranking
+        self.store = VectorStore(dtype=vector_dtype)
+
+        # Keyword side of hybrid retrieval, catches exact terms like "FOIR" or "50,000"
+        # that dense similarity ranks poorly. Fused with the dense ranking by RRF
+        self.sparse_weight = sparse_weight
+        self.rrf_k = rrf_k
+        self.bm25: Optional[BM25Index] = BM25Index() if sparse_weight > 0 else None
+
+        # Per-request context documents, chunked and embedded once per distinct content
+        self.context_doc_cache_size = context_doc_cache_size
+        self._context_docs: "OrderedDict[str, _EmbeddedChunks]" = OrderedDict()
+        self._context_lock = threading.Lock()
+        self._context_hits = 0
+        self._context_misses = 0
 
     def initialize_policy_embeddings(self):
         logger.info("Computing embeddings for policy documents...")
 
-        self.chunks = []
-        for doc in self.policy_documents:
-            paragraphs = doc.strip().split("\n\n")
-            for para in paragraphs:
-                para = para.strip()
-                if len(para) > 50:
-                    self.chunks.append(para)
+        self.add_documents(
+            {f"policy-{i}": doc for i, doc in enumerate(self.policy_documents)}
+        )
 
         logger.info(
-            f"Created {len(self.chunks)} chunks from {len(self.policy_documents)} documents"
+            f"Created {len(self.store)} chunks from {len(self.policy_documents)} documents"
         )
-
-        self.policy_embeddings = self.embedding_service.embed_texts(self.chunks)
-
         logger.info("Policy embeddings computed successfully")
 
+    def _chunk(self, document: str, doc_id: str) -> List[Dict[str, Any]]:
+        return self.chunker.chunk(document, doc_id)
+
     def retrieve_relevant_policies(
-        self, query: str, top_k: int = 3, threshold: float = 0.2
+        self,
+        query: str,
+        top_k: int = 3,
+        threshold: float = 0.2,
+        context: Optional[EmbeddingContext] = None,
+        context_docs: Optional[Sequence[str]] = None,
     ) -> List[str]:
-        if self.policy_embeddings is None:
-            logger.warning("Policy embeddings not initialized, skipping RAG")
+        return self.retrieve_relevant_policies_many(
+            [query], top_k, threshold, context, context_docs
+        )[0]
+
+    def retrieve_relevant_policies_many(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        threshold: float = 0.2,
+        context: Optional[EmbeddingContext] = None,
+        context_docs: Optional[Sequence[str]] = None,
+    ) -> List[List[str]]:
+        results = self.retrieve_relevant_chunks_many(
+            queries, top_k, threshold, context, context_docs
+        )
+        return [[chunk["text"] for chunk in chunks] for chunks in results]
+
+    def retrieve_relevant_chunks_many(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        threshold: float = 0.2,
+        context: Optional[EmbeddingContext] = None,
+        context_docs: Optional[Sequence[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Like `retrieve_relevant_policies_many`, but each chunk is a dict with its
+        `text`, `doc_id`, `section`, `index` and `tokens`.
+
+        `context_docs` are searched alongside the global index for this call only;
+        they are scored separately and never added to the shared store.
+        """
+        extra_chunks, extra_embeddings = self._embed_context_docs(context_docs or [])
+
+        if not len(self.store) and not extra_chunks:
+            logger.warning("No policy chunks indexed, skipping RAG")
+            return [[] for _ in queries]
+        if not queries:
             return []
 
-        query_embedding = self.embedding_service.embed_text(query)
+        encoder = context or self.embedding_service
+        query_embeddings = encoder.embed_texts(queries)
+
+        # One similarity matrix for the whole batch of queries, deleted chunks score -inf
+        similarities, texts, metadata = self.store.scores(query_embeddings)
+        if extra_chunks:
+            extra_similarities = np.atleast_2d(query_embeddings) @ extra_embeddings.T
+            similarities = np.concatenate([similarities, extra_similarities], axis=1)
+            texts = list(texts) + [chunk["text"] for chunk in extra_chunks]
+            metadata = list(metadata) + [_metadata(chunk) for chunk in extra_chunks]
+
+        if self.bm25 is None:
+            return [
+                [
+                    {"text": texts[i], **metadata[i]}
+                    for i in self._select_chunks(row, top_k, threshold)
+                ]
+                for row in similarities
+            ]
 
-        similarities = np.dot(self.policy_embeddings, query_embedding)
+        return [
+            self._fuse(query, row, texts, metadata, extra_chunks, top_k, threshold)
+            for query, row in zip(queries, similarities)
+        ]
 
+    def _fuse(
+        self,
+        query: str,
+        similarities: np.ndarray,
+        texts: List[str],
+        metadata: List[Dict[str, Any]],
+        extra_chunks: List[Dict[str, Any]],
+        top_k: int,
+        threshold: float,
+    ) -> List[Dict[str, Any]]:
+        # Each side nominates a few more candidates than needed, then ranks are fused
+        candidates = top_k * 4
+        dense = self._select_chunks(similarities, candidates, threshold)
+        found = {texts[i]: metadata[i] for i in dense}
+
+        sparse = self.bm25.search(query, candidates)  # type: ignore
+        if extra_chunks:
+            extra_scores = self.bm25.score_texts(  # type: ignore
+                query, [chunk["text"] for chunk in extra_chunks]
+            )
+            sparse = sorted(
+                sparse
+                + [
+                    (chunk["text"], score, _metadata(chunk))
+                    for chunk, score in zip(extra_chunks, extra_scores)
+                    if score > 0
+                ],
+                key=lambda item: item[1],
+                reverse=True,
+            )[:candidates]
+        for text, _, chunk_metadata in sparse:
+            found.setdefault(text, chunk_metadata)
+
+        fused = reciprocal_rank_fusion(
+            [[texts[i] for i in dense], [text for text, _, _ in sparse]],
+            weights=[1.0, self.sparse_weight],
+            k=self.rrf_k,
+        )
+        return [{"text": text, **found[text]} for text, _ in fused[:top_k]]
+
+    def _select_chunks(
+        self, similarities: np.ndarray, top_k: int, threshold: float
+    ) -> List[int]:
         # Get top-k chunks above threshold
         top_indices = np.argsort(similarities)[::-1][: top_k * 2]
 
@@ -52,47 +188,116 @@ class RAGService:
 
             similarity = similarities[idx]
             if similarity >= threshold:
-                relevant_chunks.append(self.chunks[idx])
+                relevant_chunks.append(int(idx))
                 logger.debug(f"Retrieved chunk with similarity {similarity:.3f}")
 
         return relevant_chunks
 
-    def get_policy_context(self, query: str, max_tokens: int = 1000) -> str:
-        relevant = self.retrieve_relevant_policies(query, top_k=5)
+    def _embed_context_docs(
+        self, documents: Sequence[str]
+    ) -> _EmbeddedChunks:
+        """Chunks and embeds request documents, one encode call for all uncached ones."""
+        if not documents:
+            return [], np.zeros((0, 0), dtype=np.float32)
 
-        if not relevant:
-            return ""
+        by_id: Dict[str, str] = {}
+        for doc in documents:
+            by_id.setdefault(self.document_id(doc), doc)
+        doc_ids = list(by_id)
 
-        context_parts = ["## Relevant Policy Guidelines:\n"]
+        cached: Dict[str, _EmbeddedChunks] = {}
+        with self._context_lock:
+            for doc_id in doc_ids:
+                entry = self._context_docs.get(doc_id)
+                if entry is not None:
+                    self._context_docs.move_to_end(doc_id)
+                    cached[doc_id] = entry
+            self._context_hits += len(cached)
+            self._context_misses += len(doc_ids) - len(cached)
 
-        total_chars = 0
-        max_chars = max_tokens * 4
+        missing = {
+            doc_id: self._chunk(by_id[doc_id], doc_id)
+            for doc_id in doc_ids
+            if doc_id not in cached
+        }
+        texts = [chunk["text"] for chunks in missing.values() for chunk in chunks]
+        if texts:
+            embeddings = self.embedding_service.embed_texts(texts)
+            offset = 0
+            for doc_id, chunks in missing.items():
+                cached[doc_id] = (chunks, embeddings[offset : offset + len(chunks)])
+                offset += len(chunks)
 
-        for i, chunk in enumerate(relevant, 1):
-            chunk_text = f"\n{i}. {chunk}\n"
+            with self._context_lock:
+                for doc_id in missing:
+                    self._context_docs[doc_id] = cached[doc_id]
+                while len(self._context_docs) > self.context_doc_cache_size:
+                    self._context_docs.popitem(last=False)
 
-            if total_chars + len(chunk_text) > max_chars:
-                break
+        entries = [cached[doc_id] for doc_id in doc_ids]
+        chunks = [chunk for doc_chunks, _ in entries for chunk in doc_chunks]
+        if not chunks:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        return chunks, np.concatenate([vectors for _, vectors in entries if len(vectors)])
+
+    def add_document(self, document: str, doc_id: Optional[str] = None) -> str:
+        """Indexes a document, replacing the previous version if `doc_id` already exists."""
+        doc_id = doc_id or self.document_id(document)
+        self.add_documents({doc_id: document})
+        return doc_id
 
-            context_parts.append(chunk_text)
-            total_chars += len(chunk_text)
+    def add_documents(self, documents: Dict[str, str]):
+        chunks_by_doc = {
+            doc_id: self._chunk(doc, doc_id) for doc_id, doc in documents.items()
+        }
+        all_chunks = [c["text"] for chunks in chunks_by_doc.values() for c in chunks]
+
+        # One encode call for the whole batch
+        embeddings = (
+            self.embedding_service.embed_corpus(all_chunks)
+            if all_chunks
+            else np.zeros((0, 0), dtype=np.float32)
+        )
 
-        return "".join(context_parts)
+        batch = []
+        offset = 0
+        for doc_id, chunks in chunks_by_doc.items():
+            texts = [chunk["text"] for chunk in chunks]
+            metadata = [_metadata(chunk) for chunk in chunks]
+            vectors = embeddings[offset : offset + len(chunks)]
+            batch.append((doc_id, texts, vectors, metadata))
+            offset += len(chunks)
+        self.store.add_many(batch)
+        if self.bm25 is not None:
+            self.bm25.add_many(
+                [(doc_id, texts, metadata) for doc_id, texts, _, metadata in batch]
+            )
 
-    def add_document(self, document: str):
-        paragraphs = document.strip().split("\n\n")
-        new_chunks = [p.strip() for p in paragraphs if len(p.strip()) > 50]
+        logger.info(f"Indexed {len(all_chunks)} policy chunks from {len(documents)} documents")
 
-        if not new_chunks:
-            return
+    def delete_document(self, doc_id: str) -> bool:
+        if self.bm25 is not None:
+            self.bm25.delete(doc_id)
+        return self.store.delete(doc_id)
 
-        new_embeddings = self.embedding_service.embed_texts(new_chunks)
+    @staticmethod
+    def document_id(document: str) -> str:
+        return hashlib.sha256(document.encode("utf-8")).hexdigest()[:16]
 
-        self.chunks.extend(new_chunks)
+    def stats(self) -> Dict[str, Any]:
+        stats = self.store.stats()
+        if self.bm25 is not None:
+            stats["bm25"] = self.bm25.stats()
+        with self._context_lock:
+            lookups = self._context_hits + self._context_misses
+            stats["context_doc_cache"] = {
+                "entries": len(self._context_docs),
+                "hits": self._context_hits,
+                "misses": self._context_misses,
+                "hit_rate": self._context_hits / lookups if lookups else 0.0,
+            }
+        return stats
 
-        if self.policy_embeddings is not None:
-            self.policy_embeddings = np.vstack([self.policy_embeddings, new_embeddings])
-        else:
-            self.policy_embeddings = new_embeddings
 
-        logger.info(f"Added {len(new_chunks)} new policy chunks")
+def _metadata(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in chunk.items() if key != "text"}
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: `rate` tokens per second refill a bucket of
+    `capacity` tokens and each acquire takes one, waiting until a token is available.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._clock = clock
+
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()
+        self._acquired = 0
+        self._total_wait_seconds = 0.0
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            started_at = self._clock()
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+
+            self._tokens -= 1
+            self._acquired += 1
+            self._total_wait_seconds += self._clock() - started_at
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "acquired": self._acquired,
+            "avg_wait_seconds": (
+                self._total_wait_seconds / self._acquired if self._acquired else 0.0
+            ),
+        }
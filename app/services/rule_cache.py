@@ -0,0 +1,257 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_PATTERN = r"\d[\d,]*(?:\.\d+)?"
+
+# Words that change a rule's meaning while barely moving its embedding, mapped to a
+# canonical form so "above 700" and "> 700" still compare equal
+_POLARITY_TERMS = {
+    ">=": ">=", "≥": ">=", "at least": ">=", "no less than": ">=", "not less than": ">=",
+    "minimum": ">=", "greater than or equal to": ">=", "more than or equal to": ">=",
+    "<=": "<=", "≤": "<=", "at most": "<=", "no more than": "<=", "not more than": "<=",
+    "maximum": "<=", "up to": "<=", "less than or equal to": "<=",
+    ">": ">", "above": ">", "over": ">", "exceed": ">", "exceeds": ">",
+    "exceeding": ">", "greater": ">", "more": ">", "higher": ">",
+    "<": "<", "below": "<", "under": "<", "less": "<", "fewer": "<", "lower": "<",
+    "=": "==", "==": "==", "equal": "==", "equals": "==",
+    "!=": "!=", "≠": "!=",
+    "not": "not", "no": "not", "never": "not", "without": "not", "none": "not",
+    "approve": "approve", "approved": "approve", "approval": "approve",
+    "accept": "approve", "accepted": "approve",
+    "reject": "reject", "rejected": "reject", "decline": "reject",
+    "declined": "reject", "deny": "reject", "denied": "reject",
+    "flag": "flag", "flagged": "flag",
+    "and": "and", "or": "or",
+}
+
+# Units and magnitudes, "2 years" and "2 months" embed almost identically
+_UNIT_TERMS = {
+    "year": "years", "years": "years", "yr": "years", "yrs": "years",
+    "month": "months", "months": "months", "mo": "months", "mos": "months",
+    "day": "days", "days": "days",
+    "rupees": "rupees", "rs": "rupees", "inr": "rupees", "₹": "rupees",
+    "lakh": "lakh", "lakhs": "lakh", "lac": "lakh", "lacs": "lakh",
+    "crore": "crore", "crores": "crore", "cr": "crore",
+    "thousand": "thousand", "million": "million",
+    "%": "percent", "percent": "percent", "percentage": "percent",
+}
+_GUARD_TERMS = {**_POLARITY_TERMS, **_UNIT_TERMS}
+
+# A quoted string value; an apostrophe inside a word ("applicant's") opens none
+_LITERAL_PATTERN = r"""(?<!\w)(?:'(?P<single>[^'\n]*)'|"(?P<double>[^"\n]*)")(?!\w)"""
+
+
+def _term_pattern(term: str) -> str:
+    pattern = r"\s+".join(re.escape(word) for word in term.split())
+    return rf"(?<!\w){pattern}(?!\w)" if term[0].isalpha() else pattern
+
+
+# Longest first, so "no less than" wins over "no" and ">=" over ">"
+_GUARD_PATTERN = re.compile(
+    "|".join(
+        [
+            _LITERAL_PATTERN,
+            rf"(?P<number>{_NUMBER_PATTERN})",
+            r"(?P<contraction>n't)(?!\w)",
+        ]
+        + [_term_pattern(t) for t in sorted(_GUARD_TERMS, key=len, reverse=True)]
+    ),
+    re.IGNORECASE,
+)
+
+
+class _Entry:
+    __slots__ = ("result", "embedding", "guard", "expires_at")
+
+    def __init__(
+        self,
+        result: Dict[str, Any],
+        embedding: Optional[np.ndarray],
+        guard: Tuple[Any, ...],
+        expires_at: float,
+    ):
+        self.result = result
+        self.embedding = embedding
+        self.guard = guard
+        self.expires_at = expires_at
+
+
+class RuleCache:
+    """
+    Two-tier cache of generated rules with TTL and LRU eviction.
+
+    The exact tier is keyed on the normalized prompt plus hashes of the key mappings and
+    policies it was generated with. The semantic tier reuses the closest earlier prompt
+    whose embedding is at least `similarity_threshold` cosine-similar and which has the
+    same guard: the same numbers, units, quoted literals, comparison operators,
+    negations, connectives and action verb in the same order, and the same mapped keys.
+    "score > 700", "score > 750", "score < 700", "Reject if score > 700", "age at least
+    2 years" and "age at least 2 months" embed almost identically.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: float = 0.97,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._clock = clock
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return " ".join(prompt.split())
+
+    @classmethod
+    def make_key(
+        cls,
+        prompt: str,
+        key_mappings: List[Dict[str, Any]],
+        relevant_policies: List[str],
+    ) -> str:
+        mappings = sorted((m["user_phrase"], m["mapped_to"]) for m in key_mappings)
+        payload = json.dumps(
+            [cls.normalize(prompt), _digest(mappings), _digest(relevant_policies)]
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        key: str,
+        prompt: str,
+        embedding: Optional[np.ndarray] = None,
+        key_mappings: Optional[List[Dict[str, Any]]] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Returns the cached result and the tier it came from ("exact" or "semantic")."""
+        with self._lock:
+            self._expire()
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counts["exact_hits"] += 1
+                return entry.result, "exact"
+
+            if embedding is not None:
+                match = self._closest(_unit(embedding), _guard(prompt, key_mappings))
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self._counts["semantic_hits"] += 1
+                    return self._entries[match].result, "semantic"
+
+            self._counts["misses"] += 1
+            return None, None
+
+    def put(
+        self,
+        key: str,
+        prompt: str,
+        result: Dict[str, Any],
+        embedding: Optional[np.ndarray] = None,
+        key_mappings: Optional[List[Dict[str, Any]]] = None,
+    ):
+        entry = _Entry(
+            result=result,
+            embedding=None if embedding is None else _unit(embedding),
+            guard=_guard(prompt, key_mappings),
+            expires_at=self._clock() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def _closest(self, embedding: np.ndarray, guard: Tuple[Any, ...]) -> Optional[str]:
+        best_key, best_score = None, self.similarity_threshold
+        for key, entry in self._entries.items():
+            if entry.embedding is None or entry.guard != guard:
+                continue
+            score = float(np.dot(entry.embedding, embedding))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _expire(self):
+        now = self._clock()
+        expired = [k for k, e in self._entries.items() if e.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self._counts["expirations"] += len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = (
+                self._counts["exact_hits"]
+                + self._counts["semantic_hits"]
+                + self._counts["misses"]
+            )
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                **self._counts,
+                "exact_hit_rate": self._counts["exact_hits"] / lookups if lookups else 0.0,
+                "semantic_hit_rate": (
+                    self._counts["semantic_hits"] / lookups if lookups else 0.0
+                ),
+            }
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value).encode("utf-8")).hexdigest()[:16]
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def _guard(
+    prompt: str, key_mappings: Optional[List[Dict[str, Any]]] = None
+) -> Tuple[Any, ...]:
+    """The meaning-bearing tokens of `prompt`, in order, plus the keys it maps to."""
+    tokens = []
+    for match in _GUARD_PATTERN.finditer(prompt):
+        literal = match.group("single")
+        if literal is None:
+            literal = match.group("double")
+        if literal is not None:
+            # Values compare case-sensitively, the quote style does not matter
+            tokens.append(f"'{literal}'")
+        elif match.group("number"):
+            tokens.append(match.group("number").replace(",", ""))
+        elif match.group("contraction"):
+            tokens.append("not")
+        else:
+            tokens.append(_GUARD_TERMS[" ".join(match.group(0).lower().split())])
+    keys = sorted({m["mapped_to"] for m in key_mappings or []})
+    return tuple(tokens), tuple(keys)
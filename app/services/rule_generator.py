@@ -1,14 +1,41 @@
+import asyncio
+import datetime
 import json
 import logging
+import math
 import re
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-import google.generativeai as genai
+import numpy as np
 
 from app.config.settings import GEMINI_API_KEY
+from app.services.json_logic import compile_rule
+from app.services.prompt_budget import PromptBudget
+from app.services.rate_limiter import TokenBucket
+from app.services.rule_cache import RuleCache
 
 logger = logging.getLogger(__name__)
 
+# Context cache creation errors that won't go away by retrying: the system prompt is
+# below the minimum cacheable size, or the model doesn't support caching
+_CACHE_UNSUPPORTED = re.compile(
+    r"too small|min_total_token_count|not supported|does not support|unsupported",
+    re.IGNORECASE,
+)
+
+# Backoff before retrying context caching after a transient failure, doubled per
+# consecutive failure
+_CACHE_RETRY_SECONDS = 30.0
+_CACHE_RETRY_MAX_SECONDS = 600.0
+
+_TASK = """
+## Your Task
+Generate the JSON Logic rule based on the user's request.
+Use the suggested field mappings to identify which fields to use.
+Consider the policy guidelines when choosing thresholds.
+Respond with valid JSON only."""
+
 
 class RuleGenerator:
     def __init__(
@@ -17,48 +44,160 @@ class RuleGenerator:
         rag_service,
         store_keys: List[Dict[str, str]],
         model: str = "gemini-2.5-flash",
+        rule_cache: Optional[RuleCache] = None,
+        context_cache_ttl_seconds: float = 0.0,
+        max_concurrent_requests: int = 8,
+        requests_per_second: float = 0.0,
+        rate_limit_burst: float = 1.0,
+        prompt_budget: Optional[PromptBudget] = None,
+        policy_chunk_tokens: int = 160,
     ):
         self.embedding_service = embedding_service
         self.rag_service = rag_service
         self.store_keys = store_keys
         self.model = model
+        self.rule_cache = rule_cache
+        self.context_cache_ttl_seconds = context_cache_ttl_seconds
 
         self.valid_keys = {key["value"]: key for key in store_keys}
-        genai.configure(api_key=GEMINI_API_KEY)  # type: ignore
+        self._genai = None
+
+        # Only depends on the static store keys, so it's built once
+        self.system_prompt = self._build_system_prompt()
+
+        # System plus user prompt tokens; mappings and policies fill what's left
+        self.prompt_budget = prompt_budget or PromptBudget(max_tokens=2000)
+        self._system_prompt_tokens: Optional[int] = None
+        self.policy_chunk_tokens = policy_chunk_tokens
+        self._mapping_line_tokens: Optional[float] = None
+
+        # One model (and with it one pooled async client) shared by every request
+        self._gen_model = None
+        self._gen_model_expires_at = 0.0
+        self._gen_model_lock: Optional[asyncio.Lock] = None
+        self._context_cache_name: Optional[str] = None
+        self._context_cache_failures = 0
+
+        # Shared by every caller so a batch can't exceed the provider's quota
+        self.max_concurrent_requests = max_concurrent_requests
+        self._llm_slots = asyncio.Semaphore(max_concurrent_requests)
+        self.rate_limiter = TokenBucket(requests_per_second, rate_limit_burst)
+        self._llm_in_flight = 0
+
+    def _get_genai(self):
+        # Imported on first use, the SDK adds close to a second to app import time
+        if self._genai is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=GEMINI_API_KEY)  # type: ignore
+            self._genai = genai
+        return self._genai
+
+    async def _get_model(self):
+        if self._gen_model is not None and time.monotonic() < self._gen_model_expires_at:
+            return self._gen_model
+
+        if self._gen_model_lock is None:
+            self._gen_model_lock = asyncio.Lock()
+
+        async with self._gen_model_lock:
+            if self._gen_model is None or time.monotonic() >= self._gen_model_expires_at:
+                self._gen_model = await self._build_model()
+        return self._gen_model
+
+    async def _build_model(self):
+        genai = self._get_genai()
+        generation_config = {
+            "temperature": 0.1,
+            "response_mime_type": "application/json",
+        }
+
+        if self.context_cache_ttl_seconds > 0:
+            try:
+                # Creating the cache is a blocking API call
+                cached_content = await asyncio.to_thread(
+                    genai.caching.CachedContent.create,
+                    model=f"models/{self.model}",
+                    system_instruction=self.system_prompt,
+                    ttl=datetime.timedelta(seconds=self.context_cache_ttl_seconds),
+                )
+                self._context_cache_name = cached_content.name
+                self._context_cache_failures = 0
+                # Rebuild a little before the server drops the cached tokens
+                self._gen_model_expires_at = (
+                    time.monotonic() + self.context_cache_ttl_seconds * 0.9
+                )
+                logger.info(f"Cached system prompt as {cached_content.name}")
+                return genai.GenerativeModel.from_cached_content(
+                    cached_content, generation_config=generation_config
+                )
+            except Exception as e:
+                self._context_cache_name = None
+                if _CACHE_UNSUPPORTED.search(str(e)):
+                    logger.warning(
+                        f"Context caching unavailable, sending the system prompt inline: {str(e)}"
+                    )
+                    self.context_cache_ttl_seconds = 0.0
+                else:
+                    # Rate limits and network errors: inline for now, retried later
+                    self._context_cache_failures += 1
+                    retry_in = min(
+                        _CACHE_RETRY_SECONDS * 2 ** (self._context_cache_failures - 1),
+                        _CACHE_RETRY_MAX_SECONDS,
+                    )
+                    logger.warning(
+                        f"Context cache creation failed, sending the system prompt inline "
+                        f"and retrying in {retry_in:.0f}s: {str(e)}"
+                    )
+                    self._gen_model_expires_at = time.monotonic() + retry_in
+                    return self._inline_model(genai, generation_config)
+
+        self._gen_model_expires_at = math.inf
+        return self._inline_model(genai, generation_config)
+
+    def _inline_model(self, genai, generation_config: Dict[str, Any]):
+        return genai.GenerativeModel(  # type: ignore
+            model_name=self.model,
+            system_instruction=self.system_prompt,
+            generation_config=generation_config,
+        )
 
     async def generate(
         self,
         prompt: str,
         key_mappings: List[Dict[str, Any]],
         relevant_policies: List[str],
+        prompt_embedding: Optional[np.ndarray] = None,
     ) -> Dict[str, Any]:
         logger.info(f"Generating rule for prompt: {prompt[:100]}...")
 
-        system_prompt = self._build_system_prompt()
-        user_prompt = self._build_user_prompt(prompt, key_mappings, relevant_policies)
-
-        try:
-            gen_model = genai.GenerativeModel(  # type: ignore
-                model_name=self.model,
-                system_instruction=system_prompt,
-                generation_config={
-                    "temperature": 0.1,
-                    "response_mime_type": "application/json",
-                },
+        cache_key = None
+        result = None
+        if self.rule_cache is not None:
+            cache_key = self.rule_cache.make_key(prompt, key_mappings, relevant_policies)
+            cached, tier = self.rule_cache.get(
+                cache_key, prompt, prompt_embedding, key_mappings
             )
+            if cached is not None:
+                result = self._reuse_cached(cached, tier)  # type: ignore
 
-            response = await gen_model.generate_content_async(user_prompt)
+        if result is None:
+            result = await self._generate_with_llm(prompt, key_mappings, relevant_policies)
+            result["generation_path"] = "llm"
+            # Per request, not part of the rule, so it stays out of the cache
+            prompt_tokens = result.pop("prompt_tokens", None)
 
-            response_text = response.text
-            logger.debug(f"LLM response: {response_text}")
+            self._validate_rule(result["json_logic"])
 
-        except Exception as e:
-            logger.error(f"LLM call failed: {str(e)}")
-            raise RuntimeError(f"Failed to generate rule: {str(e)}")
+            # Fails on operators the engine can't execute, and warms the compile cache
+            compile_rule(result["json_logic"])
 
-        result = self._parse_response(response_text)  # type: ignore
+            if self.rule_cache is not None:
+                self.rule_cache.put(  # type: ignore
+                    cache_key, prompt, dict(result), prompt_embedding, key_mappings
+                )
 
-        self._validate_rule(result["json_logic"])
+            result["prompt_tokens"] = prompt_tokens
 
         confidence = self._calculate_confidence(key_mappings, result["used_keys"])
         result["confidence_score"] = confidence
@@ -69,6 +208,73 @@ class RuleGenerator:
 
         return result
 
+    def _reuse_cached(
+        self, cached: Dict[str, Any], tier: str
+    ) -> Optional[Dict[str, Any]]:
+        # The allowed fields may have changed since the rule was cached
+        try:
+            self._validate_rule(cached["json_logic"])
+        except ValueError as e:
+            logger.info(f"Discarding {tier} cached rule: {str(e)}")
+            return None
+
+        logger.info(f"Reusing {tier} cached rule")
+        return {**cached, "generation_path": "cache"}
+
+    async def _generate_with_llm(
+        self,
+        prompt: str,
+        key_mappings: List[Dict[str, Any]],
+        relevant_policies: List[str],
+    ) -> Dict[str, Any]:
+        user_prompt, local_tokens = self._build_user_prompt(
+            prompt, key_mappings, relevant_policies
+        )
+
+        async with self._llm_slots:
+            await self.rate_limiter.acquire()
+            self._llm_in_flight += 1
+            try:
+                gen_model = await self._get_model()
+                response = await gen_model.generate_content_async(user_prompt)
+
+                response_text = response.text
+                logger.debug(f"LLM response: {response_text}")
+
+                usage = getattr(response, "usage_metadata", None)
+                measured_tokens = getattr(usage, "prompt_token_count", None)
+
+            except Exception as e:
+                logger.error(f"LLM call failed: {str(e)}")
+                raise RuntimeError(f"Failed to generate rule: {str(e)}")
+
+            finally:
+                self._llm_in_flight -= 1
+
+        estimated_tokens = self.prompt_budget.record(local_tokens, measured_tokens)
+        prompt_tokens = measured_tokens or estimated_tokens
+        logger.info(
+            f"Prompt used {prompt_tokens} input tokens "
+            f"({'measured' if measured_tokens else 'estimated'})"
+        )
+
+        result = self._parse_response(response_text)  # type: ignore
+        result["prompt_tokens"] = prompt_tokens
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "model": self.model,
+            "context_cache": self._context_cache_name,
+            "llm_in_flight": self._llm_in_flight,
+            "max_concurrent_requests": self.max_concurrent_requests,
+            "rate_limiter": self.rate_limiter.stats(),
+            "prompt_tokens": self.prompt_budget.stats(),
+        }
+        if self.rule_cache is not None:
+            stats["rule_cache"] = self.rule_cache.stats()
+        return stats
+
     def _build_system_prompt(self) -> str:
         keys_list = "\n".join(
             [f"  - {key['value']} ({key['label']})" for key in self.store_keys]
@@ -110,37 +316,87 @@ You MUST respond with a JSON object containing:
 6. Be concise in your explanation - mention thresholds and conditions
 """
 
+    def retrieval_limits(self) -> Tuple[int, int]:
+        """
+        How many key mappings and policy chunks to retrieve: enough of either to fill
+        the budget left after the system prompt on its own, so the budget rather than a
+        fixed top_k decides what goes in. Extra candidates only cost a top-k search.
+        Never fewer than the previous fixed 10 mappings and 3 policies.
+        """
+        budget = self.prompt_budget
+        if self._system_prompt_tokens is None:
+            self._system_prompt_tokens = budget.count_tokens(self.system_prompt)
+        if self._mapping_line_tokens is None:
+            lines = [
+                _mapping_line({"user_phrase": k["label"], "mapped_to": k["value"], "similarity": 0})
+                for k in self.store_keys
+            ]
+            self._mapping_line_tokens = sum(budget.count_tokens(l) for l in lines) / max(
+                len(lines), 1
+            )
+
+        remaining = max(
+            0,
+            budget.max_tokens
+            - budget.scale(self._system_prompt_tokens)
+            - budget.count(_TASK),
+        )
+        mapping_tokens = max(budget.scale(math.ceil(self._mapping_line_tokens)), 1)
+        policy_tokens = max(budget.scale(self.policy_chunk_tokens), 1)
+
+        key_top_k = min(max(10, remaining // mapping_tokens), max(len(self.store_keys), 1))
+        # One more than fits, fill() skips a chunk that doesn't and takes the next
+        policy_top_k = max(3, remaining // policy_tokens + 1)
+        return key_top_k, policy_top_k
+
     def _build_user_prompt(
         self,
         prompt: str,
         key_mappings: List[Dict[str, Any]],
         relevant_policies: List[str],
-    ) -> str:
-        parts = []
+    ) -> Tuple[str, int]:
+        """
+        Fills the user prompt up to the token budget left after the system prompt,
+        field mappings by similarity first, then policies in retrieval order. Returns
+        the prompt and the local token count of system plus user prompt.
+        """
+        budget = self.prompt_budget
+        if self._system_prompt_tokens is None:
+            self._system_prompt_tokens = budget.count_tokens(self.system_prompt)
+
+        request = f"## User Request\n{prompt}"
+        remaining = (
+            budget.max_tokens
+            - budget.scale(self._system_prompt_tokens)
+            - budget.count(request)
+            - budget.count(_TASK)
+        )
 
-        parts.append(f"## User Request\n{prompt}")
+        mapping_lines = [
+            _mapping_line(m)
+            for m in sorted(key_mappings, key=lambda m: m["similarity"], reverse=True)
+        ]
+        mapping_header = "\n## Suggested Field Mappings"
+        mapping_lines, used = budget.fill(mapping_lines, remaining, header=mapping_header)
+        remaining -= used
+
+        policy_header = "\n## Relevant Policies"
+        policies, _ = budget.fill(
+            list(dict.fromkeys(relevant_policies)),
+            remaining,
+            header=policy_header,
+            separator="\n---\n",
+        )
 
-        if key_mappings:
-            mappings_text = "\n".join(
-                [
-                    f'  - "{m["user_phrase"]}" → {m["mapped_to"]} (similarity: {m["similarity"]:.2f})'
-                    for m in key_mappings[:8]
-                ]
-            )
-            parts.append(f"\n## Suggested Field Mappings\n{mappings_text}")
+        parts = [request]
+        if mapping_lines:
+            parts.append(f"{mapping_header}\n" + "\n".join(mapping_lines))
+        if policies:
+            parts.append(f"{policy_header}\n" + "\n---\n".join(policies))
+        parts.append(_TASK)
 
-        if relevant_policies:
-            policy_text = "\n---\n".join(relevant_policies[:3])
-            parts.append(f"\n## Relevant Policies\n{policy_text}")
-
-        parts.append("""
-## Your Task
-Generate the JSON Logic rule based on the user's request.
-Use the suggested field mappings to identify which fields to use.
-Consider the policy guidelines when choosing thresholds.
-Respond with valid JSON only.""")
-
-        return "\n".join(parts)
+        user_prompt = "\n".join(parts)
+        return user_prompt, self._system_prompt_tokens + budget.count_tokens(user_prompt)
 
     def _parse_response(self, response_text: str) -> Dict[str, Any]:
         try:
@@ -218,3 +474,10 @@ Respond with valid JSON only.""")
 
         avg_score = sum(scores) / len(scores) if scores else 0.0
         return min(1.0, max(0.0, avg_score))
+
+
+def _mapping_line(mapping: Dict[str, Any]) -> str:
+    return (
+        f'  - "{mapping["user_phrase"]}" → {mapping["mapped_to"]} '
+        f'(similarity: {mapping["similarity"]:.2f})'
+    )
@@ -0,0 +1,397 @@
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.embedding_service import EmbeddingContext
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = r"-?\d[\d,]*(?:\.\d+)?"
+
+# Longest phrasings first so "at least" wins over "is", "<=" over "<"
+_OPERATORS: List[Tuple[str, str]] = [
+    (">=", ">="),
+    ("<=", "<="),
+    ("!=", "!="),
+    ("==", "=="),
+    (">", ">"),
+    ("<", "<"),
+    ("=", "=="),
+    ("greater than or equal to", ">="),
+    ("less than or equal to", "<="),
+    ("not more than", "<="),
+    ("not less than", ">="),
+    ("is at least", ">="),
+    ("at least", ">="),
+    ("minimum of", ">="),
+    ("minimum", ">="),
+    ("is at most", "<="),
+    ("at most", "<="),
+    ("maximum of", "<="),
+    ("maximum", "<="),
+    ("is greater than", ">"),
+    ("greater than", ">"),
+    ("more than", ">"),
+    ("exceeds", ">"),
+    ("above", ">"),
+    ("over", ">"),
+    ("is less than", "<"),
+    ("less than", "<"),
+    ("fewer than", "<"),
+    ("below", "<"),
+    ("under", "<"),
+    ("is not", "!="),
+    ("equal to", "=="),
+    ("equals", "=="),
+    ("is", "=="),
+]
+
+_OPERATOR_PATTERN = "|".join(
+    re.escape(phrase) if not phrase[0].isalpha() else rf"\b{re.escape(phrase)}\b"
+    for phrase, _ in _OPERATORS
+)
+_OPERATOR_LOOKUP = dict(_OPERATORS)
+
+_UNIT_WORDS = r"years?|yrs?|months?|days?|rupees|rs|inr"
+_UNITS = rf"(?:\s+(?:{_UNIT_WORDS}))?"
+
+
+def _unit_group(name: str) -> str:
+    return rf"(?:\s+(?P<{name}>{_UNIT_WORDS}))?"
+
+
+_CANONICAL_UNITS = {
+    "year": "years", "years": "years", "yr": "years", "yrs": "years",
+    "month": "months", "months": "months",
+    "day": "days", "days": "days",
+    "rupees": "rupees", "rs": "rupees", "inr": "rupees",
+}
+_TIME_UNITS = {"years": 12, "months": 1}
+
+# A negation left in the field ("score is not below 700") would invert the rule.
+# "no of enquiries" is the usual abbreviation of "number of", not a negation
+_NEGATION = re.compile(r"\b(?:not|never|without|no(?!\s+of\b))\b|n't\b", re.IGNORECASE)
+
+_PREFIX = re.compile(
+    r"^\s*(?:approve|reject|decline|deny|accept|allow|flag|mark|prefer|select)\b.*?"
+    r"\b(?:if|when|where|with|having)\b\s*",
+    re.IGNORECASE,
+)
+_LEADING_FILLER = re.compile(r"^(?:(?:with|having|has|the|an?)\s+)+", re.IGNORECASE)
+_BETWEEN_AND = re.compile(
+    rf"\bbetween\s+({_NUMBER}){_UNITS}\s+and\s+({_NUMBER})", re.IGNORECASE
+)
+_CONNECTOR = re.compile(r"\s+(and|or)\s+", re.IGNORECASE)
+
+_BETWEEN_CLAUSE = re.compile(
+    rf"^(?P<field>.+?)\s+(?:is\s+)?between\s+(?P<low>{_NUMBER}){_unit_group('low_unit')}"
+    rf"\s*\x00\s*(?P<high>{_NUMBER}){_unit_group('high_unit')}$",
+    re.IGNORECASE,
+)
+_TAG_CLAUSE = re.compile(
+    r"""^(?:tag(?:ged)?(?:\s+as)?|tags?\s+(?:includes?|contains?))\s+['"]?(?P<tag>[\w\- ]+?)['"]?$""",
+    re.IGNORECASE,
+)
+_COMPARISON_CLAUSE = re.compile(
+    rf"^(?P<field>.+?)\s*(?P<op>{_OPERATOR_PATTERN})\s*"
+    rf"""(?P<value>{_NUMBER}|true|false|yes|no|'[^']*'|"[^"]*"){_unit_group('unit')}$""",
+    re.IGNORECASE,
+)
+
+_SYMBOLS = {">": ">", "<": "<", ">=": ">=", "<=": "<=", "==": "=", "!=": "!="}
+
+
+class RuleParser:
+    """
+    Grammar-based fast path that compiles simple prompts straight to JSON Logic.
+
+    Handles comparisons, "between", "at least/at most", tag membership and a single
+    kind of connector ("and" or "or"). Fields resolve through exact aliases of the
+    store keys first and otherwise through the key embeddings, and every field has
+    to clear `min_similarity` with a `min_margin` lead over the runner-up key.
+    Units are converted to the resolved key's unit (months to years and back); a unit
+    that doesn't fit the key, or a negation the grammar would drop, is not parsed.
+    Anything it can't parse unambiguously returns None and goes to the LLM.
+    """
+
+    def __init__(
+        self,
+        embedding_service,
+        store_keys: List[Dict[str, str]],
+        min_similarity: float = 0.6,
+        min_margin: float = 0.05,
+    ):
+        self.embedding_service = embedding_service
+        self.store_keys = store_keys
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+
+        self.aliases = self._build_aliases(store_keys)
+        self.labels = {key["value"]: key["label"] for key in store_keys}
+
+        self._lock = threading.Lock()
+        self._parsed = 0
+        self._fallbacks = 0
+
+    @staticmethod
+    def _build_aliases(store_keys: List[Dict[str, str]]) -> Dict[str, str]:
+        candidates: Dict[str, set] = {}
+        for key in store_keys:
+            value = key["value"]
+            spaced = value.replace(".", " ").replace("_", " ")
+            last = value.split(".")[-1].replace("_", " ")
+            for alias in (value, key["label"], spaced, last):
+                alias = _normalize_field(alias)
+                candidates.setdefault(alias, set()).add(value)
+
+        # An alias shared by several keys would be a guess, leave it to the embeddings
+        return {alias: next(iter(keys)) for alias, keys in candidates.items() if len(keys) == 1}
+
+    def parse(
+        self, prompt: str, context: Optional[EmbeddingContext] = None
+    ) -> Optional[Dict[str, Any]]:
+        result = self._parse(prompt, context)
+        with self._lock:
+            if result is None:
+                self._fallbacks += 1
+            else:
+                self._parsed += 1
+        return result
+
+    def prefetch(self, prompts: List[str], context: EmbeddingContext):
+        """
+        Embeds the fields of every prompt that need the key embeddings in one call, so
+        parsing each prompt with the same `context` reads them from its memo.
+        """
+        if self.embedding_service.key_index is None:
+            return
+
+        fields = []
+        for prompt in prompts:
+            clauses, _ = self._split(prompt)
+            for clause in clauses:
+                parsed = self._parse_clause(clause)
+                if parsed is not None and parsed[0] and parsed[0] not in self.aliases:
+                    fields.append(parsed[0])
+        if fields:
+            context.embed_texts(list(dict.fromkeys(fields)))
+
+    def _parse(
+        self, prompt: str, context: Optional[EmbeddingContext]
+    ) -> Optional[Dict[str, Any]]:
+        clauses, connector = self._split(prompt)
+        if not clauses:
+            return None
+
+        parsed = [self._parse_clause(clause) for clause in clauses]
+        if any(p is None for p in parsed):
+            return None
+
+        resolved = self._resolve_fields([p[0] for p in parsed], context)  # type: ignore
+        if resolved is None:
+            return None
+
+        conditions = []
+        descriptions = []
+        key_mappings = []
+        for (field_text, unit, build, describe), (key, similarity) in zip(parsed, resolved):  # type: ignore
+            scale = _unit_scale(unit, key)
+            if scale is None:
+                logger.debug(f"Unit '{unit}' doesn't fit key '{key}'")
+                return None
+            conditions.append(build({"var": key}, scale))
+            descriptions.append(describe(self.labels[key], scale))
+            key_mappings.append(
+                {
+                    "user_phrase": field_text,
+                    "mapped_to": key,
+                    "similarity": similarity,
+                    "label": self.labels[key],
+                }
+            )
+
+        json_logic = conditions[0] if len(conditions) == 1 else {connector: conditions}
+        used_keys = list(dict.fromkeys(m["mapped_to"] for m in key_mappings))
+        scores = [m["similarity"] for m in key_mappings]
+
+        return {
+            "json_logic": json_logic,
+            "explanation": f"Matches when {f' {connector} '.join(descriptions)}.",
+            "used_keys": used_keys,
+            "key_mappings": key_mappings,
+            "confidence_score": min(1.0, sum(scores) / len(scores)),
+            "generation_path": "parser",
+        }
+
+    def _split(self, prompt: str) -> Tuple[List[str], Optional[str]]:
+        text = " ".join(prompt.split()).rstrip(".!")
+        text = _PREFIX.sub("", text, count=1)
+
+        # Hide the "and" inside "between X and Y" from the connector split
+        text = _BETWEEN_AND.sub(lambda m: m.group(0).replace(" and ", " \x00 "), text)
+
+        parts = _CONNECTOR.split(text)
+        clauses = [p.strip() for p in parts[::2]]
+        connectors = {c.lower() for c in parts[1::2]}
+
+        # Mixed and/or needs precedence the prompt doesn't spell out
+        if len(connectors) > 1 or not all(clauses):
+            return [], None
+        return clauses, next(iter(connectors), "and")
+
+    def _parse_clause(self, clause: str):
+        clause = _LEADING_FILLER.sub("", clause)
+
+        match = _TAG_CLAUSE.match(clause)
+        if match:
+            tag = match.group("tag").strip()
+            return (
+                "tags",
+                None,
+                lambda var, scale: {"in": [tag, var]},
+                lambda label, scale: f"{label} include '{tag}'",
+            )
+
+        match = _BETWEEN_CLAUSE.match(clause)
+        if match:
+            if _NEGATION.search(match.group("field")):
+                return None
+            low, high = _number(match.group("low")), _number(match.group("high"))
+            units = {_unit(match.group("low_unit")), _unit(match.group("high_unit"))} - {None}
+            if low > high or len(units) > 1:
+                return None
+            return (
+                _normalize_field(match.group("field")),
+                next(iter(units), None),
+                lambda var, scale: {
+                    "and": [{">=": [var, _scaled(low, scale)]}, {"<=": [var, _scaled(high, scale)]}]
+                },
+                lambda label, scale: (
+                    f"{label} is between {_scaled(low, scale)} and {_scaled(high, scale)}"
+                ),
+            )
+
+        match = _COMPARISON_CLAUSE.match(clause)
+        if match:
+            if _NEGATION.search(match.group("field")):
+                return None
+            op = _OPERATOR_LOOKUP[match.group("op").lower()]
+            value = _literal(match.group("value"))
+            unit = _unit(match.group("unit"))
+            if isinstance(value, (bool, str)) and (op not in ("==", "!=") or unit):
+                return None
+            return (
+                _normalize_field(match.group("field")),
+                unit,
+                lambda var, scale: {op: [var, _scaled(value, scale)]},
+                lambda label, scale: f"{label} {_SYMBOLS[op]} {_describe(_scaled(value, scale))}",
+            )
+
+        return None
+
+    def _resolve_fields(
+        self, fields: List[str], context: Optional[EmbeddingContext]
+    ) -> Optional[List[Tuple[str, float]]]:
+        if any(not f for f in fields):
+            return None
+
+        resolved: Dict[str, Tuple[str, float]] = {
+            f: (self.aliases[f], 1.0) for f in fields if f in self.aliases
+        }
+
+        unresolved = list(dict.fromkeys(f for f in fields if f not in resolved))
+        if unresolved:
+            key_index = self.embedding_service.key_index
+            if key_index is None:
+                return None
+
+            encoder = context or self.embedding_service
+            scores, indices = key_index.search(encoder.embed_texts(unresolved), 2)
+
+            for field, row_scores, row_indices in zip(unresolved, scores, indices):
+                best = float(row_scores[0])
+                runner_up = float(row_scores[1]) if len(row_scores) > 1 else -1.0
+                if best < self.min_similarity or best - runner_up < self.min_margin:
+                    logger.debug(f"Field '{field}' is ambiguous ({best:.2f} vs {runner_up:.2f})")
+                    return None
+                resolved[field] = (self.store_keys[row_indices[0]]["value"], best)
+
+        return [resolved[f] for f in fields]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._parsed + self._fallbacks
+            return {
+                "parsed": self._parsed,
+                "fallbacks": self._fallbacks,
+                "parse_rate": self._parsed / total if total else 0.0,
+            }
+
+
+def _normalize_field(text: str) -> str:
+    text = _LEADING_FILLER.sub("", text.strip().lower())
+    text = re.sub(r"[_.]", " ", text)
+    text = re.sub(r"[^\w\s]", "", text)
+    return " ".join(text.split())
+
+
+def _number(text: str) -> float:
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value  # type: ignore
+
+
+def _unit(text: Optional[str]) -> Optional[str]:
+    return _CANONICAL_UNITS[text.lower()] if text else None
+
+
+def _key_unit(key: str) -> Optional[str]:
+    """The time unit a key is stored in, from its name: "..._months", "..._in_years"."""
+    words = set(re.split(r"[._]", key.lower()))
+    if "months" in words:
+        return "months"
+    if words & {"years", "age"}:
+        return "years"
+    if words & {"days", "dpd"}:
+        return "days"
+    return None
+
+
+def _unit_scale(unit: Optional[str], key: str) -> Optional[float]:
+    """Factor taking a value in `unit` to the key's unit, None when they don't fit."""
+    if unit is None:
+        return 1
+    key_unit = _key_unit(key)
+    if unit == "rupees":
+        return 1 if key_unit is None else None
+    if unit == key_unit:
+        return 1
+    if unit in _TIME_UNITS and key_unit in _TIME_UNITS:
+        return _TIME_UNITS[unit] / _TIME_UNITS[key_unit]
+    return None
+
+
+def _scaled(value: Any, scale: float) -> Any:
+    if scale == 1 or isinstance(value, (bool, str)):
+        return value
+    value = round(value * scale, 6)
+    return int(value) if float(value).is_integer() else value
+
+
+def _literal(text: str) -> Any:
+    lowered = text.lower()
+    if lowered in ("true", "yes"):
+        return True
+    if lowered in ("false", "no"):
+        return False
+    if text[0] in "'\"":
+        return text[1:-1]
+    return _number(text)
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return f"'{value}'"
+    return str(value)
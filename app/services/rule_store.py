@@ -0,0 +1,44 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RuleStore:
+    """
+    Bounded in-memory registry of generated rules, addressed by a content hash so the
+    same rule always gets the same id and callers can evaluate it later by id.
+    """
+
+    def __init__(self, max_rules: int = 1024):
+        self.max_rules = max_rules
+        self._rules: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def rule_id(rule: Any) -> str:
+        canonical = json.dumps(rule, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+    def put(self, rule: Any) -> str:
+        rule_id = self.rule_id(rule)
+        with self._lock:
+            self._rules[rule_id] = rule
+            self._rules.move_to_end(rule_id)
+            while len(self._rules) > self.max_rules:
+                self._rules.popitem(last=False)
+        return rule_id
+
+    def get(self, rule_id: str) -> Optional[Any]:
+        with self._lock:
+            rule = self._rules.get(rule_id)
+            if rule is not None:
+                self._rules.move_to_end(rule_id)
+            return rule
+
+    def __len__(self) -> int:
+        return len(self._rules)
@@ -0,0 +1,153 @@
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.services.json_logic_vectorized import VectorizedRule, records_to_columns
+
+logger = logging.getLogger(__name__)
+
+
+class LineTooLongError(ValueError):
+    pass
+
+
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for endpoints that keep reading the request body while they stream.
+    The stock one listens for a disconnect on `receive` (before ASGI 2.4), which steals
+    the body messages and deadlocks; a disconnect surfaces through the body stream instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = 1024 * 1024
+) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a byte stream into lines without buffering more than one line.
+    Lines longer than `max_line_bytes` are skipped and reported as None.
+    """
+    buffer = b""
+    overflow = False
+
+    async for chunk in chunks:
+        parts = (buffer + chunk).split(b"\n")
+        buffer = parts.pop()
+
+        for line in parts:
+            if overflow:
+                # Tail of an oversized line that was already dropped
+                overflow = False
+                yield None
+            elif len(line) > max_line_bytes:
+                yield None
+            elif line.strip():
+                yield line
+
+        if len(buffer) > max_line_bytes:
+            overflow = True
+            buffer = b""
+
+    if overflow or len(buffer) > max_line_bytes:
+        yield None
+    elif buffer.strip():
+        yield buffer
+
+
+def _evaluate_chunk(
+    rule: VectorizedRule, records: List[Any], indices: List[int]
+) -> List[Dict[str, Any]]:
+    columns = records_to_columns(records, rule.variables)
+    mask = rule.mask(columns, n_rows=len(records))
+
+    results = []
+    for index, record, decision in zip(indices, records, mask.tolist()):
+        result: Dict[str, Any] = {"index": index, "decision": decision}
+        if isinstance(record, dict) and "id" in record:
+            result["id"] = record["id"]
+        results.append(result)
+    return results
+
+
+async def evaluate_ndjson_stream(
+    lines: AsyncIterator[Optional[bytes]],
+    rule: VectorizedRule,
+    chunk_size: int = 10000,
+) -> AsyncIterator[bytes]:
+    """
+    Evaluate NDJSON applicant records in column chunks of `chunk_size` and stream
+    back one NDJSON decision per record (in input order), then a summary line.
+    """
+    start = time.perf_counter()
+    count = 0
+    matched = 0
+    errors = 0
+
+    records: List[Any] = []
+    indices: List[int] = []
+    failures: List[Dict[str, Any]] = []
+
+    async for line in lines:
+        try:
+            if line is None:
+                raise LineTooLongError("Record exceeds the maximum line size")
+            records.append(json.loads(line))
+            indices.append(count)
+        except ValueError as e:
+            errors += 1
+            failures.append({"index": count, "error": str(e)})
+        count += 1
+
+        if len(records) + len(failures) >= chunk_size:
+            results = await _flush(rule, records, indices, failures)
+            matched += sum(1 for r in results if r.get("decision"))
+            yield _to_ndjson(results)
+            records, indices, failures = [], [], []
+
+    if records or failures:
+        results = await _flush(rule, records, indices, failures)
+        matched += sum(1 for r in results if r.get("decision"))
+        yield _to_ndjson(results)
+
+    seconds = time.perf_counter() - start
+    summary = {
+        "records": count,
+        "matched": matched,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "records_per_second": round(count / seconds, 1) if seconds > 0 else 0.0,
+    }
+    logger.info(f"Streamed rule evaluation finished: {summary}")
+    yield _to_ndjson([{"summary": summary}])
+
+
+async def _flush(
+    rule: VectorizedRule,
+    records: List[Any],
+    indices: List[int],
+    failures: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    results = list(failures)
+    if records:
+        # Column building and evaluation are CPU work, keep them off the event loop
+        results.extend(await run_in_threadpool(_evaluate_chunk, rule, records, indices))
+    results.sort(key=lambda r: r["index"])
+    return results
+
+
+def _to_ndjson(items: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(item) + "\n" for item in items).encode("utf-8")
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNONYMS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "synonyms.json"
+)
+
+
+class SynonymRegistry:
+    """
+    Aliases of store keys, read from a JSON file mapping key values to phrases
+    ({"bureau.score": ["credit score", "cibil"]}).
+
+    `reload` re-reads the file only when its modification time or size changed and
+    reports which keys' aliases differ from the previous load, so callers can
+    re-embed just those. A missing or malformed file keeps the aliases in effect.
+
+    With `commit=False` the new aliases are visible but staged: `rollback` restores
+    the previous ones and makes the next `reload` report the change again, so a
+    caller that fails to apply it retries on its next poll instead of losing it.
+    """
+
+    def __init__(self, path: str = DEFAULT_SYNONYMS_PATH):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._synonyms: Dict[str, List[str]] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._missing = False
+        self._version = 0
+        self._reloads = 0
+        self._errors = 0
+        self._last_changed: List[str] = []
+        # The committed aliases and signature while a reload is staged
+        self._previous: Optional[Tuple[Dict[str, List[str]], Optional[Tuple[int, int]]]] = None
+        self._staged_changed: List[str] = []
+
+        self.reload()
+
+    def get(self, value: str) -> List[str]:
+        return self._synonyms.get(value, [])
+
+    def snapshot(self) -> Dict[str, List[str]]:
+        return self._synonyms
+
+    def reload(self, commit: bool = True) -> List[str]:
+        """Picks up file changes. Returns the key values whose aliases changed."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError as e:
+                if not self._missing:
+                    logger.warning(f"Synonym registry {self.path} unavailable: {e}")
+                self._missing = True
+                return []
+            self._missing = False
+
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return []
+
+            try:
+                synonyms = self._read()
+            except (OSError, ValueError) as e:
+                self._errors += 1
+                # Retried on the next change, the file may be mid-write
+                self._signature = signature
+                logger.error(f"Ignoring invalid synonym registry {self.path}: {e}")
+                return []
+
+            changed = sorted(
+                value
+                for value in set(synonyms) | set(self._synonyms)
+                if synonyms.get(value) != self._synonyms.get(value)
+            )
+
+            if changed and not commit:
+                if self._previous is None:
+                    self._previous = (self._synonyms, self._signature)
+                self._staged_changed = changed
+
+            self._signature = signature
+            # Swapped whole, readers never see a half-applied file
+            self._synonyms = synonyms
+            if not changed or commit:
+                self._commit(changed)
+
+        if changed:
+            logger.info(f"Synonym registry loaded, aliases changed for {len(changed)} keys")
+        return changed
+
+    def commit(self):
+        """Makes a reload staged with `commit=False` final."""
+        with self._lock:
+            if self._previous is not None:
+                self._commit(self._staged_changed)
+
+    def rollback(self):
+        """Restores the aliases in effect before a staged reload."""
+        with self._lock:
+            if self._previous is None:
+                return
+            self._synonyms, _ = self._previous
+            # Forgetting the signature makes the next reload re-read the file
+            self._signature = None
+            self._previous = None
+            self._staged_changed = []
+        logger.warning(f"Rolled back synonym registry {self.path}")
+
+    def _commit(self, changed: List[str]):
+        self._previous = None
+        self._staged_changed = []
+        self._version += 1
+        if self._version > 1:
+            self._reloads += 1
+        self._last_changed = changed
+
+    def _read(self) -> Dict[str, List[str]]:
+        with open(self.path) as f:
+            data = json.load(f)
+
+        if not isinstance(data, dict):
+            raise ValueError("expected an object of key value -> list of aliases")
+
+        synonyms: Dict[str, List[str]] = {}
+        for value, aliases in data.items():
+            if not isinstance(aliases, list) or not all(
+                isinstance(a, str) for a in aliases
+            ):
+                raise ValueError(f"aliases of {value!r} must be a list of strings")
+            synonyms[value] = list(dict.fromkeys(a.strip() for a in aliases if a.strip()))
+        return synonyms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "keys": len(self._synonyms),
+                "version": self._version,
+                "reloads": self._reloads,
+                "errors": self._errors,
+                "last_changed_keys": len(self._last_changed),
+            }
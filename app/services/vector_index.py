@@ -0,0 +1,457 @@
+import abc
+import copy
+import logging
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.quantization import dequantize, quantize, quantized_scores
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex(abc.ABC):
+    """
+    Inner-product top-k search over a fixed matrix of normalized vectors.
+    `search` takes a (d,) or (m, d) query and returns (m, k) scores and row indices,
+    best first, with k capped at the number of vectors.
+
+    Vectors can be stored as float16 or int8 with per-vector scales (`dtype`), which
+    makes the scores approximate. Given `rerank`, a function returning the float32
+    vectors of the requested rows (e.g. from the memory-mapped embedding store), the
+    best `rerank_factor * k` candidates are re-scored exactly.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        dtype: str = "float32",
+        rerank: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        rerank_factor: int = 4,
+    ):
+        self.dtype = dtype
+        self.vectors, self.scales = quantize(vectors, dtype)
+        self.rerank = rerank
+        self.rerank_factor = rerank_factor
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = _as_matrix(queries)
+        if self.rerank is None or self.dtype == "float32":
+            return self._search(queries, k)
+
+        k = min(k, len(self))
+        if k <= 0:
+            return _empty(len(queries))
+
+        _, candidates = self._search(queries, k * self.rerank_factor)
+        # Each distinct candidate is fetched and scored once for all queries
+        items, inverse = np.unique(candidates, return_inverse=True)
+        scores = np.take_along_axis(
+            self._exact_scores(queries, items), inverse.reshape(candidates.shape), axis=1
+        )
+        return _sorted(*_top_k(scores, candidates, k))
+
+    @abc.abstractmethod
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+    def _scores(self, queries: np.ndarray, rows: Any) -> np.ndarray:
+        """Scores against the stored `rows` (a slice or index array), as quantized."""
+        scales = None if self.scales is None else self.scales[rows]
+        return quantized_scores(queries, self.vectors[rows], scales)
+
+    def _rows(self, rows: Any) -> np.ndarray:
+        return dequantize(self.vectors[rows], None if self.scales is None else self.scales[rows])
+
+    def _exact_scores(self, queries: np.ndarray, items: np.ndarray) -> np.ndarray:
+        return queries @ np.asarray(self.rerank(items), dtype=np.float32).T  # type: ignore
+
+    def replace(self, rows: np.ndarray, vectors: np.ndarray) -> "VectorIndex":
+        """A copy with `rows` overwritten by `vectors`, this index is left untouched."""
+        codes, scales = quantize(vectors, self.dtype)
+        updated = copy.copy(self)
+        updated.vectors = self.vectors.copy()
+        updated.vectors[rows] = codes
+        if self.scales is not None:
+            updated.scales = self.scales.copy()
+            updated.scales[rows] = scales
+        return updated
+
+    def _with_rows(self, codes: np.ndarray, scales: Optional[np.ndarray]) -> "VectorIndex":
+        """A copy over already quantized `codes`, which may differ in length."""
+        updated = copy.copy(self)
+        updated.vectors, updated.scales = codes, scales
+        return updated
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "size": len(self),
+            "dtype": self.dtype,
+            "bytes": self.vectors.nbytes + (0 if self.scales is None else self.scales.nbytes),
+            "rerank": self.rerank is not None and self.dtype != "float32",
+        }
+
+
+class ExactIndex(VectorIndex):
+    """
+    Brute-force search in blocks of `block_size` vectors, so memory stays at
+    queries x block_size scores, keeping a running top-k with argpartition.
+    """
+
+    def __init__(self, vectors: np.ndarray, block_size: int = 65536, **kwargs):
+        super().__init__(vectors, **kwargs)
+        self.block_size = block_size
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        if k <= 0:
+            return _empty(len(queries))
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_indices = np.empty((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, len(self), self.block_size):
+            scores = self._scores(queries, slice(start, start + self.block_size))
+            indices = np.broadcast_to(
+                np.arange(start, start + scores.shape[1]), scores.shape
+            )
+
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_indices = np.concatenate([best_indices, indices], axis=1)
+            best_scores, best_indices = _top_k(best_scores, best_indices, k)
+
+        return _sorted(best_scores, best_indices)
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: vectors are clustered around `n_lists` spherical k-means
+    centroids and a query only scans the `n_probe` closest lists. More probes trade
+    latency for recall; probing every list is exact.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        train_iterations: int = 10,
+        train_points_per_list: int = 64,
+        seed: int = 0,
+        **kwargs,
+    ):
+        super().__init__(vectors, **kwargs)
+        self.n_lists = min(n_lists or max(1, int(math.sqrt(len(self)))), max(len(self), 1))
+        self.n_probe = n_probe
+
+        rng = np.random.default_rng(seed)
+        self.centroids = self._train(rng, train_iterations, train_points_per_list)
+
+        self._group()
+
+    def _group(self):
+        # Vectors are regrouped list by list so each probe scans one contiguous slice
+        assignments = self._assign()
+        order = np.argsort(assignments, kind="stable")
+        self._ids = order
+        self._grouped = self.vectors[order]
+        self._grouped_scales = None if self.scales is None else self.scales[order]
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def _train(
+        self, rng: np.random.Generator, iterations: int, points_per_list: int
+    ) -> np.ndarray:
+        if len(self) == 0:
+            return np.zeros((0, self.vectors.shape[1]), dtype=np.float32)
+
+        # Training on a sample keeps the build linear, a few dozen points place a centroid
+        sample_size = min(len(self), self.n_lists * points_per_list)
+        sample = self._rows(rng.choice(len(self), sample_size, replace=False))
+        centroids = sample[rng.choice(len(sample), self.n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+
+            # Sum each cluster's members as one contiguous run of the sorted sample
+            order = np.argsort(assignments, kind="stable")
+            members, starts = np.unique(assignments[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[members] = np.add.reduceat(sample[order], starts, axis=0)
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        return centroids.astype(np.float32)
+
+    def _assign(self) -> np.ndarray:
+        assignments = np.empty(len(self), dtype=np.int64)
+        for start in range(0, len(self), 65536):
+            block = self._rows(slice(start, start + 65536))
+            assignments[start : start + len(block)] = np.argmax(
+                block @ self.centroids.T, axis=1
+            )
+        return assignments
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        if k <= 0:
+            return _empty(len(queries))
+
+        n_probe = min(self.n_probe, self.n_lists)
+        probe_scores = queries @ self.centroids.T
+        probes = np.argpartition(-probe_scores, n_probe - 1, axis=1)[:, :n_probe]
+
+        scores_out = np.empty((len(queries), k), dtype=np.float32)
+        indices_out = np.empty((len(queries), k), dtype=np.int64)
+
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            positions = np.concatenate(
+                [np.arange(self._offsets[l], self._offsets[l + 1]) for l in lists]
+            )
+            if len(positions) < k:
+                # Too few candidates in the probed lists, scan everything
+                positions = np.arange(len(self))
+
+            scores = quantized_scores(
+                query[None, :],
+                self._grouped[positions],
+                None if self._grouped_scales is None else self._grouped_scales[positions],
+            )[0]
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores_out[row] = scores[top]
+            indices_out[row] = self._ids[positions[top]]
+
+        return _sorted(scores_out, indices_out)
+
+    def replace(self, rows: np.ndarray, vectors: np.ndarray) -> "IVFIndex":
+        # A few changed rows don't move the centroids, reassign without retraining
+        updated = super().replace(rows, vectors)
+        updated._group()  # type: ignore
+        return updated  # type: ignore
+
+    def _with_rows(self, codes: np.ndarray, scales: Optional[np.ndarray]) -> "IVFIndex":
+        updated = super()._with_rows(codes, scales)
+        updated._group()  # type: ignore
+        return updated  # type: ignore
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"n_lists": self.n_lists, "n_probe": self.n_probe})
+        return stats
+
+
+class MultiVectorIndex(VectorIndex):
+    """
+    Several vectors per item (a store key's label and each of its synonyms), an item
+    scoring as its best-matching vector.
+
+    The vectors are one contiguous matrix grouped by item, rows
+    `offsets[i]:offsets[i + 1]` belonging to item i. A search is a matmul per block of
+    whole items and one np.maximum.reduceat over the item segments; indices returned
+    are item indices, as with the single-vector indexes. `rerank` is given vector
+    rows, not items.
+
+    With `backend` "ivf" (or "auto" from AUTO_IVF_MIN_SIZE items) the vector rows go
+    in a row index instead: it returns the top k x largest-group rows, which hold at
+    least k distinct items, each first seen at its best row.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        offsets: np.ndarray,
+        block_size: int = 65536,
+        backend: str = "exact",
+        params: Optional[Dict[str, Dict[str, Any]]] = None,
+        **kwargs,
+    ):
+        super().__init__(vectors, **kwargs)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.block_size = block_size
+
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.vectors):
+            raise ValueError("offsets must start at 0 and end at the number of vectors")
+        # reduceat over an empty segment would return a neighbour's score
+        if np.any(np.diff(self.offsets) <= 0):
+            raise ValueError("every item needs at least one vector")
+
+        if backend == "auto":
+            # Counted in items, as for single-vector keys
+            backend = "ivf" if len(self) >= AUTO_IVF_MIN_SIZE else "exact"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown vector index backend: {backend}")
+        self.backend = backend
+        self._row_index: Optional[VectorIndex] = None
+        if backend != "exact":
+            self._row_index = BACKENDS[backend](
+                vectors, dtype=self.dtype, **(params or {}).get(backend, {})
+            )
+            # One copy of the codes, shared with the row index
+            self.vectors, self.scales = self._row_index.vectors, self._row_index.scales
+
+    @classmethod
+    def from_groups(cls, groups: Sequence[np.ndarray], **kwargs) -> "MultiVectorIndex":
+        offsets = np.concatenate([[0], np.cumsum([len(g) for g in groups])])
+        return cls(np.concatenate(groups), offsets, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _segments(self, array: np.ndarray) -> List[np.ndarray]:
+        return [array[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        if k <= 0:
+            return _empty(len(queries))
+        if self._row_index is not None:
+            return self._search_rows(queries, k)
+        return self._search_exact(queries, k)
+
+    def _search_rows(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        largest_group = int(np.max(np.diff(self.offsets)))
+        row_scores, rows = self._row_index._search(  # type: ignore
+            queries, min(k * largest_group, len(self.vectors))
+        )
+        items = np.searchsorted(self.offsets, rows, side="right") - 1
+
+        scores_out = np.empty((len(queries), k), dtype=np.float32)
+        indices_out = np.empty((len(queries), k), dtype=np.int64)
+        short = []
+        for row in range(len(queries)):
+            # Rows come best first, so an item's first row is its best one
+            distinct, first = np.unique(items[row], return_index=True)
+            if len(distinct) < k:
+                short.append(row)
+                continue
+            top = np.sort(first)[:k]
+            scores_out[row] = row_scores[row, top]
+            indices_out[row] = items[row, top]
+
+        if short:
+            # The probed lists held too few items, these queries are scanned in full
+            scores_out[short], indices_out[short] = self._search_exact(queries[short], k)
+        return scores_out, indices_out
+
+    def _search_exact(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_indices = np.empty((len(queries), 0), dtype=np.int64)
+
+        start = 0
+        while start < len(self):
+            # Whole items up to block_size vectors, at least one item per block
+            end = int(
+                np.searchsorted(self.offsets, self.offsets[start] + self.block_size, "right")
+            ) - 1
+            end = min(max(end, start + 1), len(self))
+
+            low, high = self.offsets[start], self.offsets[end]
+            scores = np.maximum.reduceat(
+                self._scores(queries, slice(low, high)), self.offsets[start:end] - low, axis=1
+            )
+            indices = np.broadcast_to(np.arange(start, end), scores.shape)
+
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_indices = np.concatenate([best_indices, indices], axis=1)
+            best_scores, best_indices = _top_k(best_scores, best_indices, k)
+            start = end
+
+        return _sorted(best_scores, best_indices)
+
+    def replace(  # type: ignore[override]
+        self, rows: Sequence[int], groups: Sequence[np.ndarray]
+    ) -> "MultiVectorIndex":
+        """A copy with the vectors of items `rows` replaced by `groups`, one array per item."""
+        codes = self._segments(self.vectors)
+        scales = None if self.scales is None else self._segments(self.scales)
+        for row, group in zip(rows, groups):
+            codes[row], group_scales = quantize(group, self.dtype)
+            if scales is not None:
+                scales[row] = group_scales  # type: ignore
+
+        updated = copy.copy(self)
+        updated.vectors = np.concatenate(codes)
+        updated.scales = None if scales is None else np.concatenate(scales)
+        updated.offsets = np.concatenate([[0], np.cumsum([len(c) for c in codes])])
+        if self._row_index is not None:
+            # Rows shift when group sizes change, regrouped around the same centroids
+            updated._row_index = self._row_index._with_rows(updated.vectors, updated.scales)
+        return updated
+
+    def _exact_scores(self, queries: np.ndarray, items: np.ndarray) -> np.ndarray:
+        starts, ends = self.offsets[items], self.offsets[items + 1]
+        rows = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        vectors = np.asarray(self.rerank(rows), dtype=np.float32)  # type: ignore
+        segments = np.concatenate([[0], np.cumsum(ends - starts)[:-1]])
+        return np.maximum.reduceat(queries @ vectors.T, segments, axis=1)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["vectors"] = len(self.vectors)
+        if self._row_index is not None:
+            row_stats = self._row_index.stats()
+            stats["row_backend"] = row_stats["backend"]
+            stats.update({k: v for k, v in row_stats.items() if k in ("n_lists", "n_probe")})
+        return stats
+
+
+BACKENDS = {"exact": ExactIndex, "ivf": IVFIndex}
+
+# Below this size brute force is already sub-millisecond and exact
+AUTO_IVF_MIN_SIZE = 20000
+
+
+def build_index(
+    vectors: np.ndarray,
+    backend: str = "auto",
+    params: Optional[Dict[str, Dict[str, Any]]] = None,
+    **kwargs,
+) -> VectorIndex:
+    """
+    `params` holds constructor arguments per backend, e.g. {"ivf": {"n_probe": 16}};
+    `kwargs` (dtype, rerank) go to whichever backend is picked.
+    """
+    if backend == "auto":
+        backend = "ivf" if len(vectors) >= AUTO_IVF_MIN_SIZE else "exact"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vector index backend: {backend}")
+
+    index = BACKENDS[backend](vectors, **kwargs, **(params or {}).get(backend, {}))
+    logger.info(f"Built {backend} index over {len(vectors)} vectors")
+    return index
+
+
+def _as_matrix(queries: np.ndarray) -> np.ndarray:
+    queries = np.asarray(queries, dtype=np.float32)
+    return queries[None, :] if queries.ndim == 1 else queries
+
+
+def _empty(rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty((rows, 0), dtype=np.float32), np.empty((rows, 0), dtype=np.int64)
+
+
+def _top_k(
+    scores: np.ndarray, indices: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    if scores.shape[1] <= k:
+        return scores, indices
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return (
+        np.take_along_axis(scores, top, axis=1),
+        np.take_along_axis(indices, top, axis=1),
+    )
+
+
+def _sorted(scores: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(scores, order, axis=1),
+        np.take_along_axis(indices, order, axis=1),
+    )
@@ -0,0 +1,239 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.quantization import DTYPES, dequantize, quantize, quantized_scores
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore:
+    """
+    Growable matrix of text embeddings grouped by document id, each row carrying its
+    text and a metadata dict.
+
+    Rows live in a preallocated buffer that doubles when full, so appends are
+    amortized O(1) per row instead of copying the whole matrix. Deleting or
+    replacing a document only tombstones its rows; they are dropped by a compaction
+    once they make up more than `max_tombstone_ratio` of the buffer.
+
+    Rows can be kept as float16 or int8 with a scale per row (`dtype`) to cut memory,
+    at the cost of slightly approximate scores.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 64,
+        max_tombstone_ratio: float = 0.25,
+        dtype: str = "float32",
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.max_tombstone_ratio = max_tombstone_ratio
+        self.dtype = dtype
+
+        self._initial_capacity = max(1, initial_capacity)
+        self._vectors: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._texts: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._row_doc_ids: List[str] = []
+        self._doc_rows: Dict[str, List[int]] = {}
+        self._size = 0
+        self._tombstones = 0
+        self._compactions = 0
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of live rows."""
+        return self._size - self._tombstones
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_rows
+
+    @property
+    def doc_ids(self) -> List[str]:
+        return list(self._doc_rows)
+
+    def add(
+        self,
+        doc_id: str,
+        texts: Sequence[str],
+        vectors: np.ndarray,
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+    ):
+        """Adds a document's rows, replacing any rows already stored under `doc_id`."""
+        self.add_many([(doc_id, texts, vectors, metadata)])
+
+    def add_many(self, documents: Sequence[Tuple[Any, ...]]):
+        """Entries are (doc_id, texts, vectors), optionally followed by row metadata."""
+        with self._lock:
+            rows_needed = sum(len(document[1]) for document in documents)
+            if rows_needed:
+                dim = np.asarray(documents[0][2]).shape[-1]
+                self._reserve(self._size + rows_needed, dim)
+
+            for doc_id, texts, vectors, *rest in documents:
+                if len(texts) != len(vectors):
+                    raise ValueError(
+                        f"Document {doc_id!r} has {len(texts)} texts but {len(vectors)} vectors"
+                    )
+                metadata = (rest[0] if rest else None) or [{} for _ in texts]
+                if len(metadata) != len(texts):
+                    raise ValueError(
+                        f"Document {doc_id!r} has {len(texts)} texts but "
+                        f"{len(metadata)} metadata entries"
+                    )
+                self._delete(doc_id)
+
+                start, end = self._size, self._size + len(texts)
+                if len(texts):
+                    codes, scales = quantize(vectors, self.dtype)
+                    self._vectors[start:end] = codes  # type: ignore
+                    if scales is not None:
+                        self._scales[start:end] = scales  # type: ignore
+                self._alive[start:end] = True
+                self._texts.extend(texts)
+                self._metadata.extend(metadata)
+                self._row_doc_ids.extend([doc_id] * len(texts))
+                self._doc_rows[doc_id] = list(range(start, end))
+                self._size = end
+
+            self._maybe_compact()
+
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            deleted = self._delete(doc_id)
+            self._maybe_compact()
+            return deleted
+
+    def texts(self, doc_id: str) -> List[str]:
+        return [self._texts[row] for row in self._doc_rows.get(doc_id, [])]
+
+    def metadata(self, doc_id: str) -> List[Dict[str, Any]]:
+        return [self._metadata[row] for row in self._doc_rows.get(doc_id, [])]
+
+    def snapshot(
+        self,
+    ) -> Tuple[np.ndarray, np.ndarray, List[str], List[Dict[str, Any]]]:
+        """
+        Returns (vectors, alive mask, texts, metadata) for the current rows. Row i of
+        each belongs together; later appends or a compaction don't change a snapshot.
+        Quantized rows are returned as float32.
+        """
+        codes, scales, alive, texts, metadata = self._snapshot()
+        return dequantize(codes, scales), alive, texts, metadata
+
+    def _snapshot(self):
+        with self._lock:
+            if self._vectors is None:
+                return np.zeros((0, 0), dtype=np.float32), None, self._alive[:0], [], []
+            return (
+                self._vectors[: self._size],
+                None if self._scales is None else self._scales[: self._size],
+                self._alive[: self._size].copy(),
+                self._texts,
+                self._metadata,
+            )
+
+    def scores(
+        self, queries: np.ndarray
+    ) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]]]:
+        """Similarity of each query to every row, -inf for deleted rows."""
+        codes, scales, alive, texts, metadata = self._snapshot()
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        if not len(codes):
+            return np.zeros((len(queries), 0), dtype=np.float32), texts, metadata
+
+        scores = quantized_scores(queries, codes, scales)
+        scores[:, ~alive] = -np.inf
+        return scores, texts, metadata
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _reserve(self, rows: int, dim: int):
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Expected {self._vectors.shape[1]}-d vectors, got {dim}-d")
+
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if rows <= capacity:
+            return
+
+        new_capacity = max(capacity * 2, rows, self._initial_capacity)
+        vectors = np.empty((new_capacity, dim), dtype=self.dtype)
+        scales = np.ones(new_capacity, dtype=np.float32) if self.dtype == "int8" else None
+        alive = np.zeros(new_capacity, dtype=bool)
+        if self._vectors is not None:
+            vectors[: self._size] = self._vectors[: self._size]
+            alive[: self._size] = self._alive[: self._size]
+            if scales is not None:
+                scales[: self._size] = self._scales[: self._size]  # type: ignore
+
+        # Fresh buffers, so snapshots taken before the resize stay valid
+        self._vectors, self._scales, self._alive = vectors, scales, alive
+
+    def _delete(self, doc_id: str) -> bool:
+        rows = self._doc_rows.pop(doc_id, None)
+        if rows is None:
+            return False
+        self._alive[rows] = False
+        self._tombstones += len(rows)
+        return True
+
+    def _maybe_compact(self):
+        if self._tombstones and self._tombstones > self._size * self.max_tombstone_ratio:
+            self._compact()
+
+    def _compact(self):
+        if not self._tombstones:
+            return
+
+        keep = np.flatnonzero(self._alive[: self._size])
+        capacity = max(len(keep) * 2, self._initial_capacity)
+
+        vectors = np.empty((capacity, self._vectors.shape[1]), dtype=self.dtype)  # type: ignore
+        vectors[: len(keep)] = self._vectors[keep]  # type: ignore
+        scales = None
+        if self._scales is not None:
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[: len(keep)] = self._scales[keep]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: len(keep)] = True
+
+        texts = [self._texts[row] for row in keep]
+        metadata = [self._metadata[row] for row in keep]
+        row_doc_ids = [self._row_doc_ids[row] for row in keep]
+        doc_rows: Dict[str, List[int]] = {}
+        for row, doc_id in enumerate(row_doc_ids):
+            doc_rows.setdefault(doc_id, []).append(row)
+        # Documents without any rows still count as present
+        for doc_id, rows in self._doc_rows.items():
+            if not rows:
+                doc_rows[doc_id] = []
+
+        logger.info(f"Compacted vector store: dropped {self._tombstones} deleted rows")
+        self._vectors, self._scales, self._alive = vectors, scales, alive
+        self._texts, self._metadata = texts, metadata
+        self._row_doc_ids, self._doc_rows = row_doc_ids, doc_rows
+        self._size = len(keep)
+        self._tombstones = 0
+        self._compactions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._doc_rows),
+                "rows": self._size - self._tombstones,
+                "tombstones": self._tombstones,
+                "capacity": 0 if self._vectors is None else len(self._vectors),
+                "dtype": self.dtype,
+                "bytes": (0 if self._vectors is None else self._vectors.nbytes)
+                + (0 if self._scales is None else self._scales.nbytes),
+                "compactions": self._compactions,
+            }
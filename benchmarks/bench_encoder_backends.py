@@ -0,0 +1,121 @@
+"""
+Cold start, throughput, memory and parity of the embedding encoder backends.
+
+Each backend (torch, onnx, onnx-int8) runs in a fresh interpreter so import time,
+model load and peak RSS are measured from zero. Throughput is texts/second over
+data-dictionary style phrases; parity is the lowest cosine similarity to the torch
+embeddings of the same texts.
+
+    python -m benchmarks.bench_encoder_backends --texts 512
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+BACKENDS = {
+    "torch": ("torch", {}),
+    "onnx": ("onnx", {}),
+    "onnx-int8": ("onnx", {"quantize": True}),
+}
+
+PHRASES = [
+    "bureau score above {n}",
+    "business vintage of at least {n} years",
+    "overdue amount greater than {n} rupees",
+    "GST returns missed in the last {n} months",
+    "count of high risk suppliers over {n}",
+    "Approve if credit score > {n} and no wilful default in the last {n} months",
+]
+
+
+def make_texts(count: int):
+    return [PHRASES[i % len(PHRASES)].format(n=100 + i) for i in range(count)]
+
+
+def run_worker(name: str, model: str, count: int, vectors_path: str):
+    start = time.perf_counter()
+    from app.services.encoder_backends import create_encoder
+
+    backend, options = BACKENDS[name]
+    encoder = create_encoder(backend, model, options)
+    cold_start = time.perf_counter() - start
+
+    texts = make_texts(count)
+    encoder.encode(texts[:8])
+    start = time.perf_counter()
+    vectors = encoder.encode(texts)
+    elapsed = time.perf_counter() - start
+
+    np.save(vectors_path, vectors)
+    print(
+        json.dumps(
+            {
+                "cold_start": cold_start,
+                "texts_per_second": count / elapsed,
+                # ru_maxrss is KiB on Linux
+                "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--worker", choices=list(BACKENDS), help=argparse.SUPPRESS)
+    parser.add_argument("--vectors-path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.model, args.texts, args.vectors_path)
+        return
+
+    print(f"{'backend':>10} {'cold s':>7} {'texts/s':>9} {'RSS MB':>8} {'min cos':>8}")
+    reference = None
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.backends:
+            vectors_path = os.path.join(directory, f"{name}.npy")
+            result = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.bench_encoder_backends",
+                    "--worker", name, "--model", args.model,
+                    "--texts", str(args.texts), "--vectors-path", vectors_path,
+                ],
+                capture_output=True,
+                text=True,
+                cwd=os.path.join(os.path.dirname(__file__), ".."),
+            )
+            if result.returncode != 0:
+                error = result.stderr.strip().splitlines()[-1:] or ["failed"]
+                print(f"{name:>10} skipped: {error[0]}")
+                continue
+
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            vectors = np.load(vectors_path)
+            if reference is None and name == "torch":
+                reference = vectors
+            parity = (
+                f"{np.min(np.sum(vectors * reference, axis=1)):8.4f}"
+                if reference is not None
+                else f"{'-':>8}"
+            )
+            print(
+                f"{name:>10} {stats['cold_start']:7.2f} {stats['texts_per_second']:9.1f} "
+                f"{stats['rss_mb']:8.0f} {parity}"
+            )
+
+
+if __name__ == "__main__":
+    main()
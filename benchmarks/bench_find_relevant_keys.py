@@ -0,0 +1,136 @@
+"""
+Per-request latency of EmbeddingService.find_relevant_keys.
+
+Compares the old per-phrase path (one encode call per extracted phrase plus one
+for the prompt) against the batched path (a single encode call and one
+phrases x keys matrix multiply), and checks both return the same mappings.
+
+    python -m benchmarks.bench_find_relevant_keys --repeats 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.store_keys import SAMPLE_STORE_KEYS
+from app.services.embedding_service import EmbeddingService
+
+PROMPTS = [
+    "Approve if bureau score > 700 and business vintage at least 3 years and applicant age between 25 and 60.",
+    "Flag as high risk if wilful default is true OR overdue amount > 50000 OR bureau.dpd >= 90.",
+    "Prefer applicants with tag 'veteran' OR with monthly_income > 1,00,000.",
+    "Reject if GST missed returns > 2 or high risk suppliers count > 3.",
+    "Approve if FOIR is less than 0.5 and debt to income ratio below 0.4.",
+    "Approve if credit score >= 650, business is at least 2 years old, no suit filed, and applicant is between 21 and 65 years old.",
+]
+
+
+def per_phrase_find_relevant_keys(
+    service: EmbeddingService, prompt: str, top_k: int = 10, threshold: float = 0.3
+) -> List[Dict[str, Any]]:
+    """The pre-batching implementation, kept here as the baseline."""
+    mappings = []
+    seen_keys = set()
+
+    for phrase in service._extract_field_phrases(prompt):
+        similarities = np.dot(service.key_embeddings, service.embed_text(phrase))
+        best_idx = np.argmax(similarities)
+        best_similarity = similarities[best_idx]
+        if best_similarity >= threshold:
+            key_value = service.store_keys[best_idx]["value"]
+            if key_value not in seen_keys:
+                seen_keys.add(key_value)
+                mappings.append(
+                    {
+                        "user_phrase": phrase,
+                        "mapped_to": key_value,
+                        "similarity": float(best_similarity),
+                        "label": service.store_keys[best_idx]["label"],
+                    }
+                )
+
+    all_similarities = np.dot(service.key_embeddings, service.embed_text(prompt))
+    for idx in np.argsort(all_similarities)[::-1][: top_k * 2]:
+        if len(mappings) >= top_k:
+            break
+        key_value = service.store_keys[idx]["value"]
+        if key_value not in seen_keys and all_similarities[idx] >= threshold:
+            seen_keys.add(key_value)
+            mappings.append(
+                {
+                    "user_phrase": "prompt_context",
+                    "mapped_to": key_value,
+                    "similarity": float(all_similarities[idx]),
+                    "label": service.store_keys[idx]["label"],
+                }
+            )
+
+    mappings.sort(key=lambda x: x["similarity"], reverse=True)
+    return mappings[:top_k]
+
+
+def time_per_request(fn, repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        for prompt in PROMPTS:
+            start = time.perf_counter()
+            fn(prompt)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(name: str, timings: List[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<12} mean {statistics.mean(timings):7.2f} ms   "
+        f"p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    service = EmbeddingService(store_keys=SAMPLE_STORE_KEYS)
+    service.initialize_key_embeddings()
+
+    for prompt in PROMPTS:
+        before = per_phrase_find_relevant_keys(service, prompt)
+        after = service.find_relevant_keys(prompt, top_k=10, threshold=0.3)
+        assert [m["mapped_to"] for m in before] == [m["mapped_to"] for m in after]
+        assert np.allclose(
+            [m["similarity"] for m in before],
+            [m["similarity"] for m in after],
+            atol=1e-5,
+        )
+
+    # Warm up both paths before timing
+    time_per_request(lambda p: per_phrase_find_relevant_keys(service, p), 1)
+    time_per_request(lambda p: service.find_relevant_keys(p, top_k=10), 1)
+
+    print(f"{len(PROMPTS)} prompts x {args.repeats} repeats, {service.model_name}")
+    summarize(
+        "per-phrase",
+        time_per_request(
+            lambda p: per_phrase_find_relevant_keys(service, p), args.repeats
+        ),
+    )
+    summarize(
+        "batched",
+        time_per_request(
+            lambda p: service.find_relevant_keys(p, top_k=10), args.repeats
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
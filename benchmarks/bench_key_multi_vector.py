@@ -0,0 +1,108 @@
+"""
+Mapping precision and latency of multi-vector store keys against one vector per key.
+
+Builds synthetic keys whose label and synonyms are spread around a topic (aliases of
+one field are often far apart in embedding space), queries with perturbed aliases
+like an extracted phrase would be, and reports top-1 accuracy and per-query latency
+of a single blurred vector per key (the mean, as joining every alias into one text
+does), MultiVectorIndex searched exactly and over an IVF row index, and a per-key
+Python loop over the same vectors.
+
+    python -m benchmarks.bench_key_multi_vector --sizes 1000 10000 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.vector_index import ExactIndex, MultiVectorIndex
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def make_keys(n: int, dim: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(2, 8, n)
+    # Keys of a topic sit close together, their aliases scatter around them
+    topics = rng.normal(size=(max(1, n // 20), dim))
+    centers = topics[rng.integers(0, len(topics), n)] + rng.normal(size=(n, dim)) * 0.3
+    return [
+        normalize(center + rng.normal(size=(size, dim)) * 2.0)
+        for center, size in zip(centers, sizes)
+    ]
+
+
+def make_queries(groups, count: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    owners = rng.integers(0, len(groups), count)
+    aliases = [groups[o][rng.integers(0, len(groups[o]))] for o in owners]
+    # A paraphrase of an alias rather than the alias itself
+    queries = normalize(np.stack(aliases) + rng.normal(size=(count, len(aliases[0]))) * 0.1)
+    return queries, owners
+
+
+def per_key_loop(groups, queries):
+    best = []
+    for query in queries:
+        scores = [float(np.max(group @ query)) for group in groups]
+        best.append(int(np.argmax(scores)))
+    return np.array(best)
+
+
+def time_search(index, queries, k: int):
+    start = time.perf_counter()
+    found = np.array([index.search(query, k)[1][0, 0] for query in queries])
+    return (time.perf_counter() - start) / len(queries), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--loop-max-size", type=int, default=10000)
+    parser.add_argument("--n-probe", type=int, default=8)
+    args = parser.parse_args()
+
+    print(
+        f"{'keys':>7} {'vectors':>8} {'single acc':>10} {'single ms':>9} "
+        f"{'multi acc':>9} {'multi ms':>8} {'ivf acc':>8} {'ivf ms':>7} {'loop ms':>8}"
+    )
+    for size in args.sizes:
+        groups = make_keys(size, args.dim)
+        queries, owners = make_queries(groups, args.queries)
+
+        single = ExactIndex(normalize(np.stack([g.mean(axis=0) for g in groups])))
+        multi = MultiVectorIndex.from_groups(groups)
+        ivf = MultiVectorIndex.from_groups(
+            groups, backend="ivf", params={"ivf": {"n_probe": args.n_probe}}
+        )
+
+        single_time, single_found = time_search(single, queries, 1)
+        multi_time, multi_found = time_search(multi, queries, 1)
+        ivf_time, ivf_found = time_search(ivf, queries, 1)
+
+        loop = "-"
+        if size <= args.loop_max_size:
+            start = time.perf_counter()
+            loop_found = per_key_loop(groups, queries[:10])
+            loop = f"{(time.perf_counter() - start) / 10 * 1e3:.2f}"
+            assert (loop_found == multi_found[:10]).all()
+
+        print(
+            f"{size:>7} {len(multi.vectors):>8} {np.mean(single_found == owners):>10.3f} "
+            f"{single_time * 1e3:>9.2f} {np.mean(multi_found == owners):>9.3f} "
+            f"{multi_time * 1e3:>8.2f} {np.mean(ivf_found == owners):>8.3f} "
+            f"{ivf_time * 1e3:>7.2f} {loop:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Per-prompt cost of field phrase extraction as the data dictionary grows.
+
+Compares the old scan (a substring test per known phrase) with the precompiled
+word-boundary PhraseMatcher over synthetic catalogs of key labels and synonyms,
+and reports per-prompt latency of each.
+
+    python -m benchmarks.bench_phrase_extraction --sizes 37 5000 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.phrase_matcher import PhraseMatcher
+
+PROMPTS = [
+    "Reject if CIBIL score is below 650 or DPD above 30 in the last 12 months",
+    "Approve applicants with monthly income at least 25000 and business vintage over 3 years",
+    "Flag cases having GST turnover under 40 lakh and average bank balance below 1 lakh",
+    "Decline if wilful default is true or more than 3 cheque bounces in 6 months",
+]
+
+_WORDS = [
+    "gst", "bureau", "banking", "turnover", "balance", "income", "score", "ratio",
+    "overdue", "enquiries", "vintage", "bounces", "limit", "utilisation", "emi", "tenure",
+]
+
+
+def make_phrases(n: int):
+    phrases = []
+    for i in range(n):
+        a, b = _WORDS[i % len(_WORDS)], _WORDS[(i // len(_WORDS)) % len(_WORDS)]
+        phrases.append(f"{a} {b} {i}")
+    return phrases + ["cibil score", "dpd", "monthly income", "business vintage"]
+
+
+def naive(phrases, prompt: str):
+    prompt_lower = prompt.lower()
+    return [p for p in phrases if p in prompt_lower]
+
+
+def time_per_prompt(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for prompt in PROMPTS:
+            fn(prompt)
+    return (time.perf_counter() - start) / (repeats * len(PROMPTS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[37, 5000, 50000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'phrases':>8} {'build ms':>9} {'scan us':>9} {'matcher us':>11}")
+    for size in args.sizes:
+        phrases = make_phrases(size)
+
+        start = time.perf_counter()
+        matcher = PhraseMatcher(phrases)
+        build = time.perf_counter() - start
+
+        scan = time_per_prompt(lambda p: naive(phrases, p), args.repeats)
+        matched = time_per_prompt(matcher.find_phrases, args.repeats)
+        print(f"{len(phrases):>8} {build * 1e3:>9.1f} {scan * 1e6:>9.1f} {matched * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Memory, latency and recall of quantized vector storage against the float32 baseline.
+
+Builds synthetic clustered unit vectors (embeddings of a data dictionary cluster by
+topic), stores them as float32, float16 and int8, and reports index memory,
+per-query latency and recall@k against exact float32 search, with and without an
+exact float32 re-rank of the top candidates. Re-rank vectors are read from a
+memory-mapped file, as the service reads them from the embedding store.
+
+    python -m benchmarks.bench_quantization --sizes 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.vector_index import ExactIndex
+
+
+def make_vectors(n: int, dim: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 200), dim))
+    vectors = centers[rng.integers(0, len(centers), n)] + rng.normal(size=(n, dim)) * 0.6
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), count)] + rng.normal(
+        size=(count, vectors.shape[1])
+    ) * 0.05
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def time_queries(index, queries: np.ndarray, k: int):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, k)[1][0])
+    return (time.perf_counter() - start) / len(queries), np.array(results)
+
+
+def recall(found: np.ndarray, expected: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'size':>7} {'dtype':>8} {'rerank':>6} {'MB':>8} {'ms/query':>9} {'recall@k':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            vectors = make_vectors(size, args.dim)
+            queries = make_queries(vectors, args.queries)
+
+            path = os.path.join(directory, f"vectors-{size}.npy")
+            np.save(path, vectors)
+            stored = np.load(path, mmap_mode="r")
+
+            baseline = ExactIndex(vectors)
+            _, expected = time_queries(baseline, queries, args.k)
+
+            for dtype in ("float32", "float16", "int8"):
+                for rerank in (False, True):
+                    if dtype == "float32" and rerank:
+                        continue
+                    index = ExactIndex(
+                        vectors,
+                        dtype=dtype,
+                        rerank=(lambda rows: stored[rows]) if rerank else None,
+                        rerank_factor=args.rerank_factor,
+                    )
+                    latency, found = time_queries(index, queries, args.k)
+                    megabytes = index.stats()["bytes"] / 1024 / 1024
+                    print(
+                        f"{size:>7} {dtype:>8} {'yes' if rerank else 'no':>6} "
+                        f"{megabytes:>8.1f} {latency * 1e3:>9.2f} "
+                        f"{recall(found, expected):>9.3f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Policy ingest cost of stacking embeddings per document vs the growable vector store.
+
+Adds documents one at a time, as policy updates arrive, with synthetic chunk vectors
+so only the indexing cost is measured, and reports the total ingest time of each.
+
+    python -m benchmarks.bench_rag_ingest --documents 1000 5000 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.vector_store import VectorStore
+
+
+def make_documents(n: int, chunks: int, dim: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n * chunks, dim)).astype(np.float32)
+    return [
+        ([f"doc {i} chunk {j}" for j in range(chunks)], vectors[i * chunks : (i + 1) * chunks])
+        for i in range(n)
+    ]
+
+
+def ingest_vstack(documents) -> float:
+    started = time.perf_counter()
+    embeddings = None
+    texts = []
+    for chunk_texts, vectors in documents:
+        embeddings = vectors if embeddings is None else np.vstack([embeddings, vectors])
+        texts.extend(chunk_texts)
+    return time.perf_counter() - started
+
+
+def ingest_store(documents) -> float:
+    started = time.perf_counter()
+    store = VectorStore()
+    for i, (chunk_texts, vectors) in enumerate(documents):
+        store.add(f"doc-{i}", chunk_texts, vectors)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--chunks", type=int, default=4, help="Chunks per document")
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    print(f"{'documents':>10} {'vstack s':>10} {'store s':>10} {'speedup':>8}")
+    for n in args.documents:
+        documents = make_documents(n, args.chunks, args.dim)
+        vstack_seconds = ingest_vstack(documents)
+        store_seconds = ingest_store(documents)
+        print(
+            f"{n:>10} {vstack_seconds:>10.3f} {store_seconds:>10.3f} "
+            f"{vstack_seconds / store_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency and recall of the store-key vector index backends at catalog scale.
+
+Builds synthetic clustered unit vectors (embeddings of a data dictionary cluster by
+topic), queries with perturbed copies of random keys one at a time like a request
+does, and reports per-query latency and recall@k of each backend against the
+exact index.
+
+    python -m benchmarks.bench_vector_index --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.vector_index import ExactIndex, IVFIndex
+
+
+def make_keys(n: int, dim: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 200), dim))
+    vectors = centers[rng.integers(0, len(centers), n)] + rng.normal(size=(n, dim)) * 0.6
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_queries(keys: np.ndarray, count: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    queries = keys[rng.integers(0, len(keys), count)] + rng.normal(
+        size=(count, keys.shape[1])
+    ) * 0.03
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def time_queries(index, queries: np.ndarray, k: int):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(index.search(query, k)[1][0])
+    return (time.perf_counter() - start) / len(queries), np.array(results)
+
+
+def recall(found: np.ndarray, expected: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        keys = make_keys(size, args.dim)
+        queries = make_queries(keys, args.queries)
+
+        exact = ExactIndex(keys)
+        exact_seconds, expected = time_queries(exact, queries, args.k)
+        print(f"\n{size:,} keys")
+        print(f"  exact          {exact_seconds * 1e3:8.3f} ms/query   recall@{args.k} 1.000")
+
+        start = time.perf_counter()
+        ivf = IVFIndex(keys)
+        build_seconds = time.perf_counter() - start
+
+        for n_probe in args.probes:
+            ivf.n_probe = n_probe
+            seconds, found = time_queries(ivf, queries, args.k)
+            print(
+                f"  ivf probe={n_probe:<3}  {seconds * 1e3:8.3f} ms/query   "
+                f"recall@{args.k} {recall(found, expected):.3f}   "
+                f"({ivf.n_lists} lists, built in {build_seconds:.2f}s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+class TestTokenize:
+    def test_numbers_drop_grouping_commas(self):
+        assert tokenize("Overdue amount > ₹1,00,000 or FOIR 0.7") == [
+            "overdue",
+            "amount",
+            "100000",
+            "foir",
+            "0.7",
+        ]
+
+    def test_keeps_dotted_and_snake_case_terms(self):
+        assert tokenize("gst.supplier_concentration_ratio") == [
+            "gst",
+            "supplier_concentration_ratio",
+        ]
+
+
+class TestBM25Index:
+    def make_index(self):
+        index = BM25Index()
+        index.add("ratios", ["Maximum FOIR for approval is 0.7", "Debt to income below 0.4"])
+        index.add("risk", ["DPD of 90 days or more is high risk", "Overdue amount > ₹50,000"])
+        return index
+
+    def test_exact_term_ranks_first(self):
+        index = self.make_index()
+
+        assert index.search("what FOIR do we allow", 1)[0][0] == "Maximum FOIR for approval is 0.7"
+        assert index.search("overdue above 50000", 1)[0][0] == "Overdue amount > ₹50,000"
+
+    def test_only_matching_chunks_returned(self):
+        assert self.make_index().search("vintage", 5) == []
+
+    def test_rarer_terms_weigh_more(self):
+        index = BM25Index()
+        index.add("a", ["score common", "score common", "score rare"])
+
+        (best, _, _), *_ = index.search("common rare", 3)
+        assert best == "score rare"
+
+    def test_replace_and_delete_keep_postings_in_step(self):
+        index = self.make_index()
+        index.add("ratios", ["Debt service coverage above 1.25"])
+
+        assert index.search("FOIR", 5) == []
+        assert index.search("coverage", 1)[0][0] == "Debt service coverage above 1.25"
+
+        assert index.delete("risk")
+        assert index.search("DPD", 5) == []
+        assert index.stats()["chunks"] == 1
+        assert not index.delete("risk")
+
+    def test_search_returns_metadata(self):
+        index = BM25Index()
+        index.add("a", ["FOIR below 0.5", "Age above 21"], [{"section": "Ratios"}, {}])
+
+        (text, score, metadata), = index.search("FOIR", 1)
+        assert text == "FOIR below 0.5"
+        assert score > 0
+        assert metadata == {"section": "Ratios"}
+
+    def test_score_texts_uses_index_statistics(self):
+        index = self.make_index()
+
+        scores = index.score_texts("FOIR limit", ["FOIR capped at 0.6", "Age above 21"])
+
+        assert scores[0] > 0
+        assert scores[1] == 0
+
+
+class TestReciprocalRankFusion:
+    def test_items_in_both_rankings_win(self):
+        fused = reciprocal_rank_fusion([["a", "b"], ["c", "b"]])
+
+        assert [item for item, _ in fused] == ["b", "a", "c"]
+
+    def test_weights_favor_a_ranking(self):
+        fused = reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 2.0])
+
+        assert fused[0][0] == "b"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
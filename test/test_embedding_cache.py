@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.embedding_cache import EmbeddingCache
+
+MODEL = "all-MiniLM-L6-v2"
+
+
+class TestEmbeddingCache:
+    def test_hit_after_put(self):
+        cache = EmbeddingCache()
+        vector = np.arange(4, dtype=np.float32)
+
+        assert cache.get(MODEL, "credit score") is None
+        cache.put(MODEL, "credit score", vector)
+
+        assert np.array_equal(cache.get(MODEL, "credit score"), vector)
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_normalizes_whitespace_and_scopes_by_model(self):
+        cache = EmbeddingCache()
+        cache.put(MODEL, "  credit   score ", np.ones(4, dtype=np.float32))
+
+        assert cache.get(MODEL, "credit score") is not None
+        assert cache.get("other-model", "credit score") is None
+
+    def test_evicts_least_recently_used(self):
+        vector = np.ones(16, dtype=np.float32)
+        entry_size = vector.nbytes + len(MODEL) + len("phrase 0")
+        cache = EmbeddingCache(max_bytes=entry_size * 2)
+
+        cache.put(MODEL, "phrase 0", vector)
+        cache.put(MODEL, "phrase 1", vector)
+        cache.get(MODEL, "phrase 0")
+        cache.put(MODEL, "phrase 2", vector)
+
+        assert cache.get(MODEL, "phrase 1") is None
+        assert cache.get(MODEL, "phrase 0") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] <= cache.max_bytes
+
+    def test_float16_storage(self):
+        cache = EmbeddingCache(dtype="float16")
+        vector = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+        cache.put(MODEL, "monthly income", vector)
+
+        cached = cache.get(MODEL, "monthly income")
+        assert cached.dtype == np.float32
+        assert np.allclose(cached, vector, atol=1e-2)
+        assert cache.stats()["bytes"] < vector.nbytes
+
+    def test_rejects_unknown_dtype(self):
+        with pytest.raises(ValueError):
+            EmbeddingCache(dtype="int8")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -35,6 +35,13 @@ class TestEmbeddingService:
         assert embeddings.shape[0] == 3
         assert embeddings.ndim == 2
 
+    def test_embed_texts_matches_single(self, embedding_service):
+        texts = ["credit score", "business vintage", "Approve if bureau score > 700"]
+        batched = embedding_service.embed_texts(texts)
+        single = np.stack([embedding_service.embed_text(t) for t in texts])
+
+        assert np.allclose(batched, single, atol=1e-5)
+
     def test_cosine_similarity(self, embedding_service):
         vec1 = embedding_service.embed_text("credit score")
         vec2 = embedding_service.embed_text("bureau score")
@@ -98,6 +105,37 @@ class TestEmbeddingService:
 
         assert len(mappings_low) >= len(mappings_high)
 
+    def test_context_embeds_each_text_once(self, embedding_service):
+        encoded = []
+        original = embedding_service.embed_texts
+
+        def counting_embed_texts(texts):
+            encoded.extend(texts)
+            return original(texts)
+
+        embedding_service.embed_texts = counting_embed_texts
+        context = embedding_service.create_context()
+
+        prompt = "Approve if credit score is above 700"
+        embedding_service.find_relevant_keys(prompt=prompt, top_k=3, context=context)
+        prompt_embedding = context.embed_text(prompt)
+
+        assert encoded.count(prompt) == 1
+        assert np.allclose(prompt_embedding, original([prompt])[0], atol=1e-5)
+
+    def test_find_relevant_keys_many_matches_single(self, embedding_service):
+        prompts = [
+            "Approve if credit score is above 700",
+            "Reject if GST missed returns > 2 or dpd >= 90",
+        ]
+        batched = embedding_service.find_relevant_keys_many(prompts, top_k=5)
+
+        for prompt, mappings in zip(prompts, batched):
+            single = embedding_service.find_relevant_keys(prompt, top_k=5)
+            assert [m["mapped_to"] for m in mappings] == [m["mapped_to"] for m in single]
+            for a, b in zip(mappings, single):
+                assert a["similarity"] == pytest.approx(b["similarity"], abs=1e-4)
+
     def test_suggestions_for_unknown_field(self, embedding_service):
         suggestions = embedding_service.get_suggestions_for_unknown_field(
             "loan amount", top_k=3
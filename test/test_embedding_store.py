@@ -0,0 +1,93 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.embedding_store import EmbeddingStore
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def vectors_for(texts):
+    return np.array([[len(t), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+
+class TestEmbeddingStore:
+    def test_round_trip_across_instances(self, tmp_path):
+        texts = ["Bureau Score bureau score bureau", "Primary Applicant Age"]
+        EmbeddingStore(str(tmp_path), MODEL).put_many(texts, vectors_for(texts))
+
+        reopened = EmbeddingStore(str(tmp_path), MODEL)
+        found = reopened.get_many(texts + ["unknown text"])
+
+        assert len(reopened) == 2
+        assert np.array_equal(np.stack(found[:2]), vectors_for(texts))
+        assert found[2] is None
+
+    def test_only_appends_new_content(self, tmp_path):
+        store = EmbeddingStore(str(tmp_path), MODEL)
+        store.put_many(["a", "b"], vectors_for(["a", "b"]))
+        store.put_many(["b", "c"], np.array([[9, 9], [3, 3]], dtype=np.float32))
+
+        found = store.get_many(["a", "b", "c"])
+
+        assert len(store) == 3
+        assert found[1].tolist() == [1, 1]
+        assert found[2].tolist() == [3, 3]
+
+    def test_scoped_by_model(self, tmp_path):
+        EmbeddingStore(str(tmp_path), MODEL).put_many(["a"], vectors_for(["a"]))
+
+        assert EmbeddingStore(str(tmp_path), "other-model").get_many(["a"]) == [None]
+
+    def test_vectors_are_memory_mapped(self, tmp_path):
+        EmbeddingStore(str(tmp_path), MODEL).put_many(["a"], vectors_for(["a"]))
+
+        segments = EmbeddingStore(str(tmp_path), MODEL)._segments
+        assert all(isinstance(s, np.memmap) for s in segments.values())
+
+    def test_each_put_writes_one_new_segment(self, tmp_path):
+        store = EmbeddingStore(str(tmp_path), MODEL)
+        store.put_many(["a", "b"], vectors_for(["a", "b"]))
+        first = set(store._segment_names())
+        store.put_many(["c"], vectors_for(["c"]))
+
+        assert len(store._segment_names()) == 2
+        assert first < set(store._segment_names())
+
+    def test_concurrent_writers_keep_each_others_rows(self, tmp_path):
+        # Two replicas opened on the same directory before either wrote
+        a = EmbeddingStore(str(tmp_path), MODEL)
+        b = EmbeddingStore(str(tmp_path), MODEL)
+        a.put_many(["a"], np.array([[1, 1]], dtype=np.float32))
+        b.put_many(["b"], np.array([[2, 2]], dtype=np.float32))
+
+        assert a.get_many(["b"])[0].tolist() == [2, 2]
+        reopened = EmbeddingStore(str(tmp_path), MODEL)
+        assert [v.tolist() for v in reopened.get_many(["a", "b"])] == [[1, 1], [2, 2]]
+
+    def test_ignores_partial_writes(self, tmp_path):
+        store = EmbeddingStore(str(tmp_path), MODEL)
+        store.put_many(["a"], vectors_for(["a"]))
+        with open(os.path.join(store.directory, ".segment-9-1-x.npy.tmp"), "wb") as f:
+            f.write(b"\x93NUMPY")
+
+        assert EmbeddingStore(str(tmp_path), MODEL).get_many(["a"])[0] is not None
+
+    def test_compacts_small_segments(self, tmp_path):
+        store = EmbeddingStore(str(tmp_path), MODEL, max_segments=4)
+        texts = [f"text {i}" for i in range(20)]
+        for i, text in enumerate(texts):
+            store.put_many([text], np.array([[i, i]], dtype=np.float32))
+
+        assert len(store._segment_names()) <= 4
+        reopened = EmbeddingStore(str(tmp_path), MODEL)
+        assert len(reopened) == 20
+        assert [v[0] for v in reopened.get_many(texts)] == list(range(20))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
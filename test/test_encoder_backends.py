@@ -0,0 +1,169 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.encoder_backends import (
+    QUANTIZE_CONFIG,
+    EncoderBackend,
+    OnnxEncoder,
+    _quantized_path,
+    create_encoder,
+)
+
+PROMPTS = [
+    "Approve if bureau score > 700 and business vintage at least 3 years",
+    "Flag as high risk if wilful default is true OR overdue amount > 50000",
+    "credit score",
+    "Reject if GST missed returns > 2 or high risk suppliers count > 3.",
+]
+
+
+class FakeTokenizer:
+    """Whitespace tokens, ids from a growing vocabulary, padded to the longest text."""
+
+    def __init__(self, with_token_type_ids=True):
+        self.vocab = {}
+        self.with_token_type_ids = with_token_type_ids
+
+    def encode(self, text, add_special_tokens=True):
+        return [self.vocab.setdefault(w, len(self.vocab) + 1) for w in text.split()]
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        ids = [self.encode(text)[:max_length] for text in texts]
+        width = max(len(i) for i in ids)
+        input_ids = np.zeros((len(ids), width), dtype=np.int64)
+        mask = np.zeros_like(input_ids)
+        for row, tokens in enumerate(ids):
+            input_ids[row, : len(tokens)] = tokens
+            mask[row, : len(tokens)] = 1
+        encoded = {"input_ids": input_ids, "attention_mask": mask}
+        if self.with_token_type_ids:
+            encoded["token_type_ids"] = np.zeros_like(input_ids)
+        return encoded
+
+
+class FakeSession:
+    """Token embeddings are a fixed random row per id, padding gets a large vector."""
+
+    def __init__(self, dim=8):
+        self.table = np.random.default_rng(0).normal(size=(1000, dim)).astype(np.float32)
+        self.table[0] = 100.0
+        self.feeds = []
+
+    def get_inputs(self):
+        names = ["input_ids", "attention_mask", "token_type_ids"]
+        return [SimpleNamespace(name=name) for name in names]
+
+    def get_outputs(self):
+        return [SimpleNamespace(shape=["batch", "sequence", self.table.shape[1]])]
+
+    def run(self, output_names, feed):
+        self.feeds.append(feed)
+        return [self.table[feed["input_ids"]]]
+
+
+class TestOnnxEncoder:
+    def make_encoder(self, **kwargs):
+        tokenizer = kwargs.pop("tokenizer", FakeTokenizer())
+        return OnnxEncoder(FakeSession(), tokenizer, **kwargs)
+
+    def test_mean_pools_real_tokens_and_normalizes(self):
+        encoder = self.make_encoder()
+
+        vectors = encoder.encode(["a b", "a b c d e"])
+
+        expected = encoder.session.table[[1, 2]].mean(axis=0)
+        assert np.allclose(vectors[0], expected / np.linalg.norm(expected), atol=1e-6)
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    def test_batching_by_length_keeps_input_order(self):
+        texts = ["x " * n for n in (5, 1, 9, 3, 7, 2)]
+        batched = self.make_encoder(batch_size=2)
+        single = self.make_encoder(batch_size=100, tokenizer=batched.tokenizer)
+
+        assert np.allclose(batched.encode(texts), single.encode(texts), atol=1e-6)
+        assert np.allclose(batched.encode(texts)[1], batched.encode([texts[1]])[0], atol=1e-6)
+        assert len(batched.session.feeds) >= 3
+
+    def test_fills_token_type_ids_when_tokenizer_omits_them(self):
+        encoder = self.make_encoder(tokenizer=FakeTokenizer(with_token_type_ids=False))
+
+        encoder.encode(["credit score"])
+
+        feed = encoder.session.feeds[0]
+        assert not feed["token_type_ids"].any()
+        assert feed["token_type_ids"].shape == feed["input_ids"].shape
+
+    def test_truncates_to_max_seq_length(self):
+        encoder = self.make_encoder(max_seq_length=3)
+        encoder.encode(["a b c d e f"])
+        assert encoder.session.feeds[0]["input_ids"].shape == (1, 3)
+
+    def test_empty_input_and_token_count(self):
+        encoder = self.make_encoder()
+        assert encoder.encode([]).shape == (0, 8)
+        assert encoder.count_tokens("bureau score above 700") == 4
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_encoder("tensorrt", "all-MiniLM-L6-v2")
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class EncodeOnly(EncoderBackend):
+            def encode(self, texts):
+                return np.zeros((len(texts), 8), dtype=np.float32)
+
+        with pytest.raises(TypeError):
+            EncodeOnly()
+
+
+class TestQuantizedCache:
+    def test_key_covers_source_revision_and_config(self, tmp_path):
+        model = tmp_path / "model.onnx"
+        model.write_bytes(b"weights")
+        cache = str(tmp_path / "cache")
+
+        def path(**kwargs):
+            return _quantized_path(str(model), "org/model", cache, **kwargs)
+
+        base = path()
+        assert path() == base
+        assert base.startswith(os.path.join(cache, "org__model", "model_qint8_"))
+
+        assert path(revision="v2") != base
+        assert path(config={**QUANTIZE_CONFIG, "per_channel": True}) != base
+
+        # A replaced source file is quantized again
+        model.write_bytes(b"new weights")
+        assert path() != base
+
+
+@pytest.fixture(scope="module")
+def reference():
+    pytest.importorskip("sentence_transformers")
+    return create_encoder("torch", "all-MiniLM-L6-v2").encode(PROMPTS)
+
+
+class TestBackendParity:
+    """Needs torch, sentence-transformers, onnxruntime and the hub model files."""
+
+    @pytest.mark.parametrize("quantize,min_cosine", [(False, 0.9999), (True, 0.98)])
+    def test_onnx_matches_torch(self, reference, tmp_path, quantize, min_cosine):
+        pytest.importorskip("onnxruntime")
+        encoder = create_encoder(
+            "onnx", "all-MiniLM-L6-v2", {"quantize": quantize, "cache_dir": str(tmp_path)}
+        )
+
+        vectors = encoder.encode(PROMPTS)
+
+        assert vectors.shape == reference.shape
+        assert np.min(np.sum(vectors * reference, axis=1)) >= min_cosine
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
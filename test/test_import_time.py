@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Generous enough for slow CI machines, far below the cost of loading torch
+IMPORT_BUDGET_SECONDS = 3.0
+
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "onnxruntime",
+    "google.generativeai",
+]
+
+
+def measure_import(module: str):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    seconds, loaded = result.stdout.splitlines()[-2:]
+    return float(seconds), [m for m in loaded.split(",") if m]
+
+
+class TestImportTime:
+    def test_app_main_imports_within_budget(self):
+        seconds, _ = measure_import("app.main")
+        assert seconds < IMPORT_BUDGET_SECONDS
+
+    def test_app_main_does_not_load_models(self):
+        _, loaded = measure_import("app.main")
+        assert loaded == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
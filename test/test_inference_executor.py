@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.inference_executor import ExecutorSaturatedError, InferenceExecutor
+
+
+class TestInferenceExecutor:
+    def test_runs_off_event_loop(self):
+        executor = InferenceExecutor(max_workers=2, max_queue_size=4)
+
+        async def run():
+            return await executor.run(threading.current_thread)
+
+        worker_thread = asyncio.run(run())
+        executor.shutdown()
+
+        assert worker_thread is not threading.main_thread()
+        assert executor.stats()["completed"] == 1
+
+    def test_rejects_when_queue_is_full(self):
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+        release = threading.Event()
+
+        async def run():
+            blocking = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(lambda: "rejected")
+
+            assert executor.stats()["queue_depth"] == 1
+            release.set()
+            return await asyncio.gather(blocking, queued)
+
+        results = asyncio.run(run())
+        executor.shutdown()
+
+        stats = executor.stats()
+        assert results == [True, "queued"]
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        assert stats["queue_depth"] == 0
+        assert stats["max_queue_depth"] == 1
+
+    def test_cancelled_waiting_job_frees_its_slot(self):
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+        release = threading.Event()
+        ran = []
+
+        async def run():
+            blocking = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(executor.run(lambda: ran.append("queued")))
+            await asyncio.sleep(0.05)
+
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            depth = executor.stats()["queue_depth"]
+
+            release.set()
+            await blocking
+            assert depth == 0
+            return await executor.run(lambda: "after")
+
+        assert asyncio.run(run()) == "after"
+        executor.shutdown()
+
+        stats = executor.stats()
+        assert ran == []
+        assert stats["queue_depth"] == 0
+        assert stats["running"] == 0
+        assert stats["completed"] == 2
+
+    def test_counts_failures(self):
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+
+        def boom():
+            raise ValueError("bad input")
+
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(boom))
+        executor.shutdown()
+
+        assert executor.stats()["failed"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
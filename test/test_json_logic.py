@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.json_logic import JsonLogicError, compile_rule, evaluate
+
+APPLICANT = {
+    "bureau": {"score": 720, "dpd": 0, "wilful_default": False},
+    "business": {"vintage_in_years": 4},
+    "primary_applicant": {"age": 30, "tags": ["veteran"], "monthly_income": 80000},
+}
+
+
+class TestJsonLogic:
+    def test_readme_example(self):
+        rule = {
+            "and": [
+                {">": [{"var": "bureau.score"}, 700]},
+                {">=": [{"var": "business.vintage_in_years"}, 3]},
+                {
+                    "and": [
+                        {">=": [{"var": "primary_applicant.age"}, 25]},
+                        {"<=": [{"var": "primary_applicant.age"}, 60]},
+                    ]
+                },
+            ]
+        }
+
+        assert evaluate(rule, APPLICANT) is True
+        assert evaluate(rule, {**APPLICANT, "bureau": {"score": 650}}) is False
+
+    @pytest.mark.parametrize(
+        "rule, expected",
+        [
+            ({"<": [{"var": "bureau.score"}, 700]}, False),
+            ({"==": [{"var": "bureau.dpd"}, 0]}, True),
+            ({"!=": [{"var": "bureau.dpd"}, 0]}, False),
+            ({"==": [{"var": "bureau.score"}, "720"]}, True),
+            ({"===": [{"var": "bureau.score"}, "720"]}, False),
+            ({"!": {"var": "bureau.wilful_default"}}, True),
+            ({"!!": [{"var": "primary_applicant.tags"}]}, True),
+            ({"in": ["veteran", {"var": "primary_applicant.tags"}]}, True),
+            ({"in": ["student", {"var": "primary_applicant.tags"}]}, False),
+            ({"in": [{"var": "bureau.dpd"}, [0, 30]]}, True),
+            ({"<=": [25, {"var": "primary_applicant.age"}, 60]}, True),
+            ({"<": [30, {"var": "primary_applicant.age"}, 60]}, False),
+        ],
+    )
+    def test_operators(self, rule, expected):
+        assert evaluate(rule, APPLICANT) is expected
+
+    def test_and_or_return_json_logic_values(self):
+        assert evaluate({"or": [0, {"var": "bureau.score"}]}, APPLICANT) == 720
+        assert evaluate({"and": [1, 0, 2]}, APPLICANT) == 0
+
+    def test_if_chain(self):
+        rule = {
+            "if": [
+                {"<": [{"var": "bureau.score"}, 600]},
+                "reject",
+                {"<": [{"var": "bureau.score"}, 750]},
+                "review",
+                "approve",
+            ]
+        }
+
+        assert evaluate(rule, APPLICANT) == "review"
+        assert evaluate(rule, {"bureau": {"score": 800}}) == "approve"
+
+    def test_missing_values(self):
+        rule = {">": [{"var": "bureau.score"}, 700]}
+
+        assert evaluate(rule, {}) is False
+        assert evaluate({"<": [{"var": "bureau.score"}, 700]}, {}) is False
+        assert evaluate({"!=": [{"var": "bureau.score"}, 700]}, {}) is True
+        assert evaluate({"var": ["bureau.score", 650]}, {}) == 650
+        assert evaluate({"in": ["veteran", {"var": "primary_applicant.tags"}]}, {}) is False
+
+    def test_flat_dotted_records(self):
+        rule = {">": [{"var": "bureau.score"}, 700]}
+        assert evaluate(rule, {"bureau.score": 720}) is True
+
+    def test_compiled_rule_is_cached_and_lists_variables(self):
+        rule = {"and": [{">": [{"var": "bureau.score"}, 700]}, {"var": "bureau.is_ntc"}]}
+        compiled = compile_rule(rule)
+
+        assert compile_rule({"and": rule["and"]}) is compiled
+        assert compiled.variables == {"bureau.score", "bureau.is_ntc"}
+        assert compiled.evaluate_many([APPLICANT, {}]) == [False, False]
+
+    def test_rejects_unknown_operator(self):
+        with pytest.raises(JsonLogicError):
+            compile_rule({"regex": [{"var": "bureau.score"}, "7.*"]})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.json_logic import compile_rule
+from app.services.json_logic_vectorized import (
+    compile_vectorized,
+    evaluate_columns,
+    records_to_columns,
+)
+
+RECORDS = [
+    {"bureau": {"score": 720, "dpd": 0}, "primary_applicant": {"age": 30, "tags": ["veteran"]}},
+    {"bureau": {"score": 650, "dpd": 95}, "primary_applicant": {"age": 70, "tags": []}},
+    {"bureau": {"dpd": 30}, "primary_applicant": {"age": 45, "tags": None}},
+    {"bureau": {"score": 780, "dpd": None}, "primary_applicant": {"age": None}},
+]
+
+
+def assert_matches_scalar_engine(rule):
+    vectorized = compile_vectorized(rule)
+    columns = records_to_columns(RECORDS, vectorized.variables)
+
+    expected = [bool(compile_rule(rule)(record)) for record in RECORDS]
+    assert vectorized.mask(columns).tolist() == expected
+
+
+MIXED_SCORES = [720, 650.5, "720", "700", "650", "n/a", "", None, True, [700]]
+
+
+class TestVectorizedJsonLogic:
+    def test_numeric_columns(self):
+        columns = {
+            "bureau.score": np.array([720, 650, np.nan, 780]),
+            "primary_applicant.age": np.array([30, 70, 45, np.nan]),
+        }
+        rule = {
+            "and": [
+                {">": [{"var": "bureau.score"}, 700]},
+                {"<=": [25, {"var": "primary_applicant.age"}, 60]},
+            ]
+        }
+
+        assert evaluate_columns(rule, columns).tolist() == [True, False, False, False]
+
+    @pytest.mark.parametrize(
+        "rule",
+        [
+            {">": [{"var": "bureau.score"}, 700]},
+            {"<": [{"var": "bureau.score"}, 700]},
+            {"!=": [{"var": "bureau.score"}, 720]},
+            {"==": [{"var": "bureau.score"}, None]},
+            {"or": [{">=": [{"var": "bureau.dpd"}, 90]}, {"<": [{"var": "primary_applicant.age"}, 40]}]},
+            {"in": ["veteran", {"var": "primary_applicant.tags"}]},
+            {"in": [{"var": "bureau.dpd"}, [0, 30]]},
+            {"!": {"var": "primary_applicant.tags"}},
+            {">": [{"var": ["bureau.score", 800]}, 750]},
+            {
+                "if": [
+                    {"<": [{"var": "bureau.score"}, 700]},
+                    False,
+                    {"<=": [{"var": "primary_applicant.age"}, 60]},
+                ]
+            },
+        ],
+    )
+    def test_matches_scalar_engine(self, rule):
+        assert_matches_scalar_engine(rule)
+
+    @pytest.mark.parametrize("op", [">", ">=", "<", "<=", "==", "!=", "===", "!=="])
+    @pytest.mark.parametrize("literal", [700, "700", 700.0, "n/a", True])
+    def test_rows_match_scalar_engine_in_any_chunk(self, op, literal):
+        rule = {op: [{"var": "bureau.score"}, literal]}
+        scalar = compile_rule(rule)
+        vectorized = compile_vectorized(rule)
+
+        # Each value alone, with every other value, and all together: a row's result
+        # must not depend on which other rows share its column
+        chunks = [[v] for v in MIXED_SCORES]
+        chunks += [[a, b] for a in MIXED_SCORES for b in MIXED_SCORES]
+        chunks.append(MIXED_SCORES)
+        for chunk in chunks:
+            records = [{"bureau": {"score": v}} for v in chunk]
+            columns = records_to_columns(records, vectorized.variables)
+            expected = [bool(scalar(record)) for record in records]
+            assert vectorized.mask(columns).tolist() == expected, chunk
+
+    def test_missing_column_is_all_missing(self):
+        rule = {"or": [{">": [{"var": "bureau.score"}, 700]}, {"!=": [{"var": "gst.turnover"}, 0]}]}
+        columns = {"bureau.score": np.array([650.0, 720.0])}
+
+        assert evaluate_columns(rule, columns).tolist() == [True, True]
+
+    def test_records_to_columns_types(self):
+        columns = records_to_columns(
+            RECORDS, ["bureau.score", "primary_applicant.tags"]
+        )
+
+        assert columns["bureau.score"].dtype == np.float64
+        assert np.isnan(columns["bureau.score"][2])
+        assert columns["primary_applicant.tags"].dtype == object
+
+    def test_constant_rule_broadcasts(self):
+        columns = {"bureau.score": np.array([1.0, 2.0, 3.0])}
+        assert evaluate_columns({"!!": [True]}, columns).tolist() == [True] * 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.micro_batcher import MicroBatcher
+
+
+def length_encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(t), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+    return encode
+
+
+class TestMicroBatcher:
+    def test_returns_rows_for_each_caller(self):
+        batcher = MicroBatcher(length_encoder([]), max_wait_ms=1)
+        vectors = batcher.encode(["ab", "abcd"])
+        batcher.close()
+
+        assert vectors[:, 0].tolist() == [2, 4]
+
+    def test_concurrent_callers_share_a_batch(self):
+        calls = []
+        batcher = MicroBatcher(length_encoder(calls), max_wait_ms=200)
+        start = threading.Barrier(4)
+        results = {}
+
+        def caller(i):
+            start.wait()
+            results[i] = batcher.encode(["x" * (i + 1), "shared"])
+
+        threads = [threading.Thread(target=caller, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        batcher.close()
+
+        assert len(calls) == 1
+        assert sorted(calls[0]) == sorted(["x", "xx", "xxx", "xxxx", "shared"])
+        for i in range(4):
+            assert results[i][:, 0].tolist() == [i + 1, 6]
+        assert batcher.stats()["requests"] == 4
+        assert batcher.stats()["encoded_texts"] == 5
+
+    def test_respects_max_batch_size(self):
+        calls = []
+        batcher = MicroBatcher(length_encoder(calls), max_wait_ms=50, max_batch_size=2)
+        futures = [batcher.submit([str(i) * 3]) for i in range(4)]
+        for future in futures:
+            future.result()
+        batcher.close()
+
+        assert all(len(c) <= 2 for c in calls)
+
+    def test_propagates_encode_errors(self):
+        def failing_encode(texts):
+            raise RuntimeError("model unavailable")
+
+        batcher = MicroBatcher(failing_encode, max_wait_ms=1)
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            batcher.encode(["credit score"])
+        batcher.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.store_keys import SAMPLE_STORE_KEYS
+from app.services.embedding_service import EmbeddingService
+from app.services.phrase_matcher import PhraseMatcher, normalize_phrase
+
+
+class TestPhraseMatcher:
+    def make_matcher(self):
+        return PhraseMatcher(["credit score", "cibil", "cibil score", "age", "Monthly_Income"])
+
+    def test_matches_whole_words_only(self):
+        matcher = self.make_matcher()
+        assert matcher.find_phrases("average bank balance above 50000") == []
+        assert matcher.find_phrases("applicant age above 21") == ["age"]
+
+    def test_nested_matches_are_dropped(self):
+        matcher = self.make_matcher()
+        assert matcher.find_phrases("CIBIL score at least 700") == ["cibil score"]
+        assert (0, 1, "cibil") in matcher.find("cibil score at least 700")
+
+    def test_phrases_in_order_of_appearance(self):
+        matcher = self.make_matcher()
+        assert matcher.find_phrases("monthly income > 30k and credit score > 700, age 25") == [
+            "monthly income",
+            "credit score",
+            "age",
+        ]
+
+    def test_normalizes_phrases(self):
+        matcher = self.make_matcher()
+        assert normalize_phrase("Monthly_Income") == "monthly income"
+        assert "monthly  income" in matcher
+        assert "income" not in matcher
+        assert len(matcher) == 5
+
+    def test_cost_does_not_grow_with_catalog(self):
+        prompt = "Reject if credit score below 650 or monthly income under 25000 " * 4
+        small = PhraseMatcher(["credit score", "monthly income"])
+        large = PhraseMatcher(
+            ["credit score", "monthly income"]
+            + [f"segment {i} metric {i % 97} value" for i in range(50000)]
+        )
+
+        def elapsed(matcher):
+            start = time.perf_counter()
+            for _ in range(200):
+                matcher.find_phrases(prompt)
+            return time.perf_counter() - start
+
+        elapsed(small), elapsed(large)
+        assert large.find_phrases(prompt) == small.find_phrases(prompt)
+        assert elapsed(large) < elapsed(small) * 5
+
+
+class TestEmbeddingServicePhrases:
+    def test_extracts_known_terms_labels_and_synonyms(self):
+        service = EmbeddingService(store_keys=SAMPLE_STORE_KEYS)
+        phrases = service._extract_field_phrases(
+            "Approve if the borrower has years in business of 3 and no lawsuit"
+        )
+        assert "years in business" in phrases
+        assert "lawsuit" in phrases
+        assert "age" not in service._extract_field_phrases("average balance above 1 lakh")
+
+    def test_matcher_is_built_without_the_model(self):
+        service = EmbeddingService(store_keys=SAMPLE_STORE_KEYS)
+        assert len(service.phrase_matcher) > 0
+        assert service._model is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
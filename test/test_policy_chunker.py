@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.policy_docs import POLICY_DOCUMENTS
+from app.services.policy_chunker import (
+    ESTIMATE_SAFETY_MARGIN,
+    PolicyChunker,
+    estimate_tokens,
+)
+
+DOCUMENT = """
+    ## Credit Score Requirements
+
+    Bureau score is a critical factor.
+
+    - **Minimum acceptable bureau score**: 600
+    - **Good credit score**: Above 700
+
+    ## Bounces
+
+    ### Inward
+    - Inward bounces > 3 in last 6 months: Moderate risk
+    """
+
+
+class TestPolicyChunker:
+    def test_headings_stay_with_their_lists(self):
+        chunks = PolicyChunker().chunk(DOCUMENT, doc_id="policy-0")
+
+        assert [c["section"] for c in chunks] == [
+            "Credit Score Requirements",
+            "Bounces > Inward",
+        ]
+        assert chunks[0]["text"] == (
+            "Credit Score Requirements\n"
+            "Bureau score is a critical factor.\n"
+            "- **Minimum acceptable bureau score**: 600\n"
+            "- **Good credit score**: Above 700"
+        )
+        assert all(c["doc_id"] == "policy-0" for c in chunks)
+        assert [c["index"] for c in chunks] == [0, 1]
+
+    def test_short_rules_are_kept(self):
+        chunks = PolicyChunker().chunk("Minimum age is 21")
+
+        assert [(c["text"], c["section"], c["tokens"]) for c in chunks] == [
+            ("Minimum age is 21", "", 4)
+        ]
+
+    def test_windows_respect_budget_and_overlap(self):
+        items = "\n".join(f"- Rule number {i} applies to every applicant" for i in range(20))
+        chunker = PolicyChunker(max_tokens=40, overlap_tokens=10, safety_margin=1.0)
+
+        chunks = chunker.chunk(f"## Rules\n{items}")
+
+        assert len(chunks) > 1
+        assert all(c["tokens"] <= 40 for c in chunks)
+        for previous, current in zip(chunks, chunks[1:]):
+            # The last rule of a window opens the next one
+            assert current["text"].split("\n")[1] == previous["text"].split("\n")[-1]
+
+    def test_long_paragraph_splits_by_sentence(self):
+        paragraph = " ".join(f"Sentence {i} has a few words in it." for i in range(30))
+
+        chunks = PolicyChunker(max_tokens=32, overlap_tokens=0).chunk(paragraph)
+
+        assert all(c["tokens"] <= 32 for c in chunks)
+        assert " ".join(c["text"].replace("\n", " ") for c in chunks) == paragraph
+
+    def test_policy_documents_chunk_by_section(self):
+        chunker = PolicyChunker(count_tokens=lambda text: len(text.split()))
+        chunks = [c for doc in POLICY_DOCUMENTS for c in chunker.chunk(doc)]
+
+        assert len(chunks) == len(POLICY_DOCUMENTS)
+        assert any("Wilful default" in c["text"] for c in chunks)
+        assert all(c["tokens"] <= chunker.max_tokens for c in chunks)
+
+    def test_estimated_windows_leave_a_safety_margin(self):
+        chunker = PolicyChunker()
+        chunks = [c for doc in POLICY_DOCUMENTS for c in chunker.chunk(doc)]
+
+        assert chunker.safety_margin == ESTIMATE_SAFETY_MARGIN
+        assert len(chunks) > len(POLICY_DOCUMENTS)
+        assert all(
+            c["tokens"] * ESTIMATE_SAFETY_MARGIN <= chunker.max_tokens for c in chunks
+        )
+
+        # A real tokenizer is trusted up to max_tokens
+        assert PolicyChunker(count_tokens=len).safety_margin == 1.0
+
+    def test_rejects_overlap_not_below_budget(self):
+        with pytest.raises(ValueError):
+            PolicyChunker(max_tokens=10, overlap_tokens=10)
+
+
+def test_estimate_tokens_counts_words_and_punctuation():
+    assert estimate_tokens("FOIR < 0.5 (50%)") == 9
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.prompt_budget import PromptBudget
+
+
+def words(text):
+    return len(text.split())
+
+
+class TestPromptBudget:
+    def test_fill_takes_items_in_order_while_they_fit(self):
+        budget = PromptBudget(max_tokens=100, count_tokens=words)
+
+        chosen, used = budget.fill(["one two three", "four five six seven", "eight"], 5)
+
+        # The second item doesn't fit, a later smaller one still does
+        assert chosen == ["one two three", "eight"]
+        assert used == 4
+        assert budget.stats()["dropped_items"] == 1
+
+    def test_header_and_separators_only_paid_once_used(self):
+        budget = PromptBudget(max_tokens=100, count_tokens=words)
+
+        assert budget.fill(["a b c"], 3, header="## Header") == ([], 0)
+        assert budget.fill(["a", "b"], 10, header="## Header", separator="- - -") == (
+            ["a", "b"],
+            7,
+        )
+
+    def test_measured_counts_calibrate_estimates(self):
+        budget = PromptBudget(max_tokens=100, count_tokens=words, calibration_weight=0.5)
+
+        assert budget.record(100, measured_tokens=200) == 100
+        assert budget.stats()["calibration_ratio"] == 1.5
+        assert budget.count("one two") == 3
+        assert budget.record(100) == 150
+
+        stats = budget.stats()
+        assert stats["requests"] == 2
+        assert stats["avg_estimated_tokens"] == 125
+        assert stats["avg_measured_tokens"] == 200
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
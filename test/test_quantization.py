@@ -0,0 +1,115 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.embedding_service import EmbeddingService
+from app.services.quantization import dequantize, quantize, quantized_scores
+from app.services.synonym_registry import SynonymRegistry
+
+
+def random_unit_vectors(n, d=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, d)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestQuantize:
+    @pytest.mark.parametrize("dtype,tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+    def test_round_trip_is_close(self, dtype, tolerance):
+        vectors = random_unit_vectors(100)
+
+        codes, scales = quantize(vectors, dtype)
+
+        assert codes.dtype == np.dtype(dtype)
+        assert (scales is not None) == (dtype == "int8")
+        assert np.abs(dequantize(codes, scales) - vectors).max() < tolerance
+
+    def test_float32_is_stored_as_is(self):
+        vectors = random_unit_vectors(10)
+        codes, scales = quantize(vectors, "float32")
+        assert codes is vectors and scales is None
+
+    def test_zero_vectors_keep_a_scale(self):
+        codes, scales = quantize(np.zeros((2, 4)), "int8")
+        assert scales.tolist() == [1.0, 1.0] and not codes.any()
+
+    @pytest.mark.parametrize("dtype", ["float16", "int8"])
+    def test_scores_match_float32(self, dtype):
+        vectors = random_unit_vectors(10000)
+        queries = random_unit_vectors(5, seed=1)
+
+        scores = quantized_scores(queries, *quantize(vectors, dtype))
+
+        assert scores.dtype == np.float32
+        assert np.abs(scores - queries @ vectors.T).max() < 0.02
+
+    def test_unknown_dtype(self):
+        with pytest.raises(ValueError):
+            quantize(random_unit_vectors(2), "int4")
+
+
+class TestQuantizedKeyIndex:
+    STORE_KEYS = [
+        {"value": f"group.field_{i}", "label": f"Field {i}", "group": "group"}
+        for i in range(30)
+    ]
+
+    def fake_encode(self, texts):
+        vectors = np.array(
+            [np.random.default_rng(abs(hash(t)) % 2**32).normal(size=16) for t in texts],
+            dtype=np.float32,
+        )
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def make_service(self, tmp_path, **kwargs):
+        path = tmp_path / "synonyms.json"
+        path.write_text('{"group.field_3": ["third field", "field three"]}')
+        service = EmbeddingService(
+            store_keys=self.STORE_KEYS,
+            synonym_registry=SynonymRegistry(str(path)),
+            embedding_store_dir=str(tmp_path / "store"),
+            **kwargs,
+        )
+        service._encode = self.fake_encode
+        service.initialize_key_embeddings()
+        return service
+
+    @pytest.mark.parametrize("multi_vector_keys", [False, True])
+    def test_int8_with_rerank_scores_exactly(self, tmp_path, multi_vector_keys):
+        service = self.make_service(
+            tmp_path,
+            multi_vector_keys=multi_vector_keys,
+            key_index_dtype="int8",
+            key_index_rerank_factor=4,
+        )
+        # "field three" with multi-vector keys, the whole key text otherwise
+        query = self.fake_encode([service.key_vector_texts[3][-1]])
+
+        scores, indices = service.key_index.search(query, 3)
+
+        assert service.key_embeddings is None
+        assert service.key_index.stats()["rerank"] is True
+        expected = float(np.max(self.fake_encode(service.key_vector_texts[3]) @ query[0]))
+        assert indices[0, 0] == 3
+        assert scores[0, 0] == pytest.approx(expected, abs=1e-6) == pytest.approx(1.0)
+
+    def test_without_store_searches_quantized_only(self, tmp_path):
+        service = EmbeddingService(
+            store_keys=self.STORE_KEYS,
+            synonym_registry=SynonymRegistry(str(tmp_path / "missing.json")),
+            key_index_dtype="float16",
+            key_index_rerank_factor=4,
+        )
+        service._encode = self.fake_encode
+        service.initialize_key_embeddings()
+
+        stats = service.key_index.stats()
+        assert stats["rerank"] is False
+        assert stats["bytes"] == 30 * 16 * 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,40 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.rate_limiter import TokenBucket
+
+
+class TestTokenBucket:
+    def test_burst_then_refill_rate(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        async def run():
+            start = time.perf_counter()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.perf_counter() - start
+
+        # Two tokens are available at once, the other two refill at 20/s
+        elapsed = asyncio.run(run())
+        assert 0.09 <= elapsed < 0.5
+        assert bucket.stats()["acquired"] == 4
+
+    def test_zero_rate_disables_limiting(self):
+        bucket = TokenBucket(rate=0)
+
+        async def run():
+            await asyncio.gather(*(bucket.acquire() for _ in range(100)))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        assert time.perf_counter() - start < 0.1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
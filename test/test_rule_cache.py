@@ -0,0 +1,209 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.store_keys import SAMPLE_STORE_KEYS
+from app.services.rule_cache import RuleCache
+from app.services.rule_generator import RuleGenerator
+
+PROMPT = "Approve if bureau score > 700"
+MAPPINGS = [{"user_phrase": "bureau score", "mapped_to": "bureau.score", "similarity": 0.9}]
+POLICIES = ["Minimum bureau score is 650"]
+RESULT = {
+    "json_logic": {">": [{"var": "bureau.score"}, 700]},
+    "explanation": "Bureau score above 700.",
+    "used_keys": ["bureau.score"],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestRuleCache:
+    def test_exact_hit_ignores_whitespace(self):
+        cache = RuleCache()
+        cache.put(RuleCache.make_key(PROMPT, MAPPINGS, POLICIES), PROMPT, RESULT)
+
+        key = RuleCache.make_key("  Approve if  bureau score > 700 ", MAPPINGS, POLICIES)
+        assert cache.get(key, PROMPT) == (RESULT, "exact")
+
+    def test_exact_key_depends_on_mappings_and_policies(self):
+        key = RuleCache.make_key(PROMPT, MAPPINGS, POLICIES)
+
+        assert key != RuleCache.make_key(PROMPT, [], POLICIES)
+        assert key != RuleCache.make_key(PROMPT, MAPPINGS, [])
+
+    def test_semantic_hit_above_threshold(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        cache.put("a", PROMPT, RESULT, embedding=unit(1, 0, 0))
+
+        similar = "Approve when the bureau score is above 700"
+        assert cache.get("b", similar, unit(1, 0.1, 0)) == (RESULT, "semantic")
+        assert cache.get("c", similar, unit(1, 1, 0)) == (None, None)
+
+    def test_semantic_hit_requires_same_numbers(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        cache.put("a", PROMPT, RESULT, embedding=unit(1, 0, 0))
+
+        assert cache.get("b", "Approve if bureau score > 750", unit(1, 0, 0)) == (None, None)
+
+    def test_semantic_hit_requires_same_operators(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        cache.put("a", PROMPT, RESULT, embedding=unit(1, 0, 0))
+
+        assert cache.get("b", "Approve if bureau score < 700", unit(1, 0, 0)) == (None, None)
+        assert cache.get("c", "Approve if bureau score at least 700", unit(1, 0, 0)) == (
+            None,
+            None,
+        )
+        assert cache.get("d", "Approve if bureau score over 700", unit(1, 0, 0)) == (
+            RESULT,
+            "semantic",
+        )
+
+    def test_semantic_hit_requires_same_action_and_negation(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        cache.put("a", PROMPT, RESULT, embedding=unit(1, 0, 0))
+
+        for prompt in [
+            "Reject if bureau score > 700",
+            "Flag if bureau score > 700",
+            "Do not approve if bureau score > 700",
+            "Approve if bureau score isn't > 700",
+        ]:
+            assert cache.get(prompt, prompt, unit(1, 0, 0)) == (None, None), prompt
+
+    def test_semantic_hit_requires_same_units(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        prompt = "Approve if age at least 2 years"
+        cache.put("a", prompt, RESULT, embedding=unit(1, 0, 0))
+
+        for other in [
+            "Approve if age at least 2 months",
+            "Approve if age at least 2",
+            "Approve if turnover at least 2 crore",
+        ]:
+            assert cache.get(other, other, unit(1, 0, 0)) == (None, None), other
+        assert cache.get("b", "Approve if age at least 2 yrs", unit(1, 0, 0)) == (
+            RESULT,
+            "semantic",
+        )
+
+    def test_semantic_hit_requires_same_quoted_literals(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        prompt = "Approve if the applicant's status == 'active'"
+        cache.put("a", prompt, RESULT, embedding=unit(1, 0, 0))
+
+        for other in [
+            "Approve if the applicant's status == 'inactive'",
+            "Approve if the applicant's status == 'Active'",
+        ]:
+            assert cache.get(other, other, unit(1, 0, 0)) == (None, None), other
+        same = 'Approve if the applicant\'s status == "active"'
+        assert cache.get("b", same, unit(1, 0, 0)) == (RESULT, "semantic")
+
+    def test_semantic_hit_requires_same_mapped_keys(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        cache.put("a", PROMPT, RESULT, embedding=unit(1, 0, 0), key_mappings=MAPPINGS)
+
+        other = [{"user_phrase": "bureau score", "mapped_to": "gst.score", "similarity": 0.9}]
+        assert cache.get("b", PROMPT, unit(1, 0, 0), other) == (None, None)
+        assert cache.get("c", PROMPT, unit(1, 0, 0), MAPPINGS) == (RESULT, "semantic")
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = RuleCache(ttl_seconds=10, clock=clock)
+        cache.put("a", PROMPT, RESULT)
+
+        clock.now = 9
+        assert cache.get("a", PROMPT)[0] is not None
+        clock.now = 10
+        assert cache.get("a", PROMPT)[0] is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = RuleCache(max_entries=2)
+        cache.put("a", PROMPT, RESULT)
+        cache.put("b", PROMPT, RESULT)
+        cache.get("a", PROMPT)
+        cache.put("c", PROMPT, RESULT)
+
+        assert cache.get("b", PROMPT)[0] is None
+        assert cache.get("a", PROMPT)[0] is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_stats_report_per_tier_hit_rates(self):
+        cache = RuleCache(similarity_threshold=0.95)
+        cache.put("a", PROMPT, RESULT, embedding=unit(1, 0, 0))
+        cache.get("a", PROMPT)
+        cache.get("b", PROMPT, unit(1, 0, 0))
+        cache.get("c", "Reject if age < 21", unit(0, 1, 0))
+        cache.get("d", "Reject if age < 21")
+
+        stats = cache.stats()
+        assert stats["exact_hit_rate"] == 0.25
+        assert stats["semantic_hit_rate"] == 0.25
+        assert stats["misses"] == 2
+
+
+class NoSuggestions:
+    def get_suggestions_for_unknown_field(self, field):
+        return []
+
+
+class StubGenerator(RuleGenerator):
+    def __init__(self, rule_cache, result=RESULT):
+        super().__init__(NoSuggestions(), None, SAMPLE_STORE_KEYS, rule_cache=rule_cache)
+        self.result = result
+        self.llm_calls = 0
+
+    async def _generate_with_llm(self, prompt, key_mappings, relevant_policies):
+        self.llm_calls += 1
+        return dict(self.result)
+
+
+class TestRuleGeneratorCache:
+    def test_repeated_prompt_skips_llm(self):
+        generator = StubGenerator(RuleCache())
+
+        async def run():
+            first = await generator.generate(PROMPT, MAPPINGS, POLICIES)
+            second = await generator.generate(PROMPT, MAPPINGS, POLICIES)
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert generator.llm_calls == 1
+        assert (first["generation_path"], second["generation_path"]) == ("llm", "cache")
+        assert first["json_logic"] == second["json_logic"]
+        assert second["confidence_score"] == pytest.approx(0.9)
+
+    def test_cached_rule_with_removed_field_is_regenerated(self):
+        cache = RuleCache()
+        stale = {**RESULT, "json_logic": {">": [{"var": "bureau.legacy_score"}, 1]}}
+        cache.put(RuleCache.make_key(PROMPT, MAPPINGS, POLICIES), PROMPT, stale)
+        generator = StubGenerator(cache)
+
+        result = asyncio.run(generator.generate(PROMPT, MAPPINGS, POLICIES))
+
+        assert generator.llm_calls == 1
+        assert result["json_logic"] == RESULT["json_logic"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.store_keys import SAMPLE_STORE_KEYS
+from app.services.prompt_budget import PromptBudget
+from app.services.rule_generator import RuleGenerator
+
+RESPONSE = {
+    "json_logic": {">": [{"var": "bureau.score"}, 700]},
+    "explanation": "Bureau score above 700.",
+    "used_keys": ["bureau.score"],
+}
+
+
+class FakeModel:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    async def generate_content_async(self, prompt):
+        return types.SimpleNamespace(text=json.dumps(RESPONSE))
+
+
+def fake_genai(created, cache_error=None):
+    def model(**kwargs):
+        created.append(kwargs)
+        return FakeModel(**kwargs)
+
+    def from_cached_content(cached_content, **kwargs):
+        created.append({"cached_content": cached_content.name, **kwargs})
+        return FakeModel(**kwargs)
+
+    def create_cache(**kwargs):
+        if isinstance(cache_error, list) and cache_error:
+            raise cache_error.pop(0)
+        if isinstance(cache_error, Exception):
+            raise cache_error
+        return types.SimpleNamespace(name="cachedContents/system-prompt")
+
+    model.from_cached_content = from_cached_content
+    return types.SimpleNamespace(
+        GenerativeModel=model,
+        caching=types.SimpleNamespace(
+            CachedContent=types.SimpleNamespace(create=create_cache)
+        ),
+    )
+
+
+def generate_twice(generator):
+    async def run():
+        for _ in range(2):
+            await generator.generate("Approve if bureau score > 700", [], [])
+
+    asyncio.run(run())
+
+
+class TestRuleGeneratorModel:
+    def test_model_and_system_prompt_built_once(self):
+        created = []
+        generator = RuleGenerator(None, None, SAMPLE_STORE_KEYS)
+        generator._genai = fake_genai(created)
+
+        generate_twice(generator)
+
+        assert len(created) == 1
+        assert created[0]["system_instruction"] is generator.system_prompt
+        assert "bureau.score" in generator.system_prompt
+
+    def test_system_prompt_uses_context_cache(self):
+        created = []
+        generator = RuleGenerator(
+            None, None, SAMPLE_STORE_KEYS, context_cache_ttl_seconds=600
+        )
+        generator._genai = fake_genai(created)
+
+        generate_twice(generator)
+
+        assert created == [
+            {
+                "cached_content": "cachedContents/system-prompt",
+                "generation_config": created[0]["generation_config"],
+            }
+        ]
+        assert generator.stats()["context_cache"] == "cachedContents/system-prompt"
+
+    def test_falls_back_when_context_cache_is_rejected(self):
+        created = []
+        generator = RuleGenerator(
+            None, None, SAMPLE_STORE_KEYS, context_cache_ttl_seconds=600
+        )
+        generator._genai = fake_genai(created, cache_error=ValueError("too small"))
+
+        generate_twice(generator)
+
+        assert len(created) == 1
+        assert created[0]["system_instruction"] is generator.system_prompt
+        assert generator.stats()["context_cache"] is None
+
+
+    def test_retries_context_cache_after_transient_error(self):
+        created = []
+        errors = [RuntimeError("429 Resource has been exhausted")]
+        generator = RuleGenerator(
+            None, None, SAMPLE_STORE_KEYS, context_cache_ttl_seconds=600
+        )
+        generator._genai = fake_genai(created, cache_error=errors)
+
+        generate_twice(generator)
+
+        assert len(created) == 1
+        assert created[0]["system_instruction"] is generator.system_prompt
+        assert generator.context_cache_ttl_seconds == 600
+        assert generator._gen_model_expires_at - time.monotonic() <= 30
+
+        # Once the backoff has passed the cache is created again
+        generator._gen_model_expires_at = 0.0
+        generate_twice(generator)
+
+        assert created[-1]["cached_content"] == "cachedContents/system-prompt"
+        assert generator.stats()["context_cache"] == "cachedContents/system-prompt"
+
+
+class TestRuleGeneratorLimits:
+    def test_concurrent_llm_calls_are_capped(self):
+        active = []
+        peak = []
+
+        class SlowModel(FakeModel):
+            async def generate_content_async(self, prompt):
+                active.append(prompt)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                active.remove(prompt)
+                return await super().generate_content_async(prompt)
+
+        generator = RuleGenerator(None, None, SAMPLE_STORE_KEYS, max_concurrent_requests=2)
+        generator._genai = types.SimpleNamespace(GenerativeModel=SlowModel)
+
+        async def run():
+            await asyncio.gather(
+                *(
+                    generator.generate(f"Approve if bureau score > {700 + i}", [], [])
+                    for i in range(6)
+                )
+            )
+
+        asyncio.run(run())
+
+        assert max(peak) == 2
+        assert generator.stats()["llm_in_flight"] == 0
+
+
+def words(text):
+    return len(text.split())
+
+
+class TestRuleGeneratorPromptBudget:
+    mappings = [
+        {"user_phrase": "age", "mapped_to": "primary_applicant.age", "similarity": 0.5},
+        {"user_phrase": "bureau score", "mapped_to": "bureau.score", "similarity": 0.9},
+    ]
+    policies = ["Minimum bureau score is 600 " * 10, "Maximum age is 65"]
+
+    def make_generator(self, max_tokens):
+        generator = RuleGenerator(
+            None,
+            None,
+            SAMPLE_STORE_KEYS,
+            prompt_budget=PromptBudget(max_tokens=max_tokens, count_tokens=words),
+        )
+        return generator, words(generator.system_prompt)
+
+    def test_everything_fits_in_a_large_budget(self):
+        generator, _ = self.make_generator(100000)
+
+        user_prompt, _ = generator._build_user_prompt(
+            "score > 700", self.mappings, self.policies
+        )
+
+        # Mappings ordered by similarity
+        assert user_prompt.index("bureau.score") < user_prompt.index(
+            "primary_applicant.age"
+        )
+        assert all(p in user_prompt for p in self.policies)
+
+    def test_budget_drops_what_does_not_fit(self):
+        generator, system_tokens = self.make_generator(10000)
+        full_prompt, full_tokens = generator._build_user_prompt(
+            "score > 700", self.mappings, self.policies
+        )
+
+        # Room for everything except the long policy
+        generator.prompt_budget.max_tokens = full_tokens - 10
+        user_prompt, tokens = generator._build_user_prompt(
+            "score > 700", self.mappings, self.policies
+        )
+
+        assert tokens <= generator.prompt_budget.max_tokens
+        assert self.policies[0] not in user_prompt
+        assert self.policies[1] in user_prompt
+        assert "bureau.score" in user_prompt
+
+        # Nothing but the request and the task once the system prompt takes it all
+        generator.prompt_budget.max_tokens = system_tokens
+        user_prompt, _ = generator._build_user_prompt(
+            "score > 700", self.mappings, self.policies
+        )
+        assert "Suggested Field Mappings" not in user_prompt
+        assert "Relevant Policies" not in user_prompt
+
+    def test_retrieval_limits_grow_with_the_budget(self):
+        generator, system_tokens = self.make_generator(0)
+        generator.prompt_budget.max_tokens = system_tokens
+        assert generator.retrieval_limits() == (10, 3)
+
+        generator.prompt_budget.max_tokens = system_tokens + 4000
+        key_top_k, policy_top_k = generator.retrieval_limits()
+        assert key_top_k == len(SAMPLE_STORE_KEYS)
+        # 4000 tokens less the task, in 160 token chunks
+        assert 20 <= policy_top_k <= 26
+
+    def test_records_measured_prompt_tokens(self):
+        class MeteredModel(FakeModel):
+            async def generate_content_async(self, prompt):
+                response = await super().generate_content_async(prompt)
+                response.usage_metadata = types.SimpleNamespace(prompt_token_count=1234)
+                return response
+
+        generator, _ = self.make_generator(100000)
+        generator._genai = types.SimpleNamespace(GenerativeModel=MeteredModel)
+
+        result = asyncio.run(generator.generate("Approve if bureau score > 700", [], []))
+
+        assert result["prompt_tokens"] == 1234
+        stats = generator.stats()["prompt_tokens"]
+        assert stats["requests"] == 1
+        assert stats["avg_measured_tokens"] == 1234
+        assert stats["calibration_ratio"] > 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,199 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.store_keys import SAMPLE_STORE_KEYS
+from app.services.embedding_service import EmbeddingContext
+from app.services.json_logic import compile_rule
+from app.services.rule_parser import RuleParser
+from app.services.vector_index import ExactIndex
+
+KEY_INDEX = {key["value"]: i for i, key in enumerate(SAMPLE_STORE_KEYS)}
+
+
+class StubEmbeddingService:
+    """One-hot key embeddings; phrases embed onto the keys listed in `phrases`."""
+
+    def __init__(self, phrases):
+        self.key_index = ExactIndex(np.eye(len(SAMPLE_STORE_KEYS), dtype=np.float32))
+        self.phrases = phrases
+        self.embedded = []
+
+    def embed_texts(self, texts):
+        self.embedded.extend(texts)
+        vectors = np.zeros((len(texts), len(SAMPLE_STORE_KEYS)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for key, weight in self.phrases.get(text, {}).items():
+                vectors[row, KEY_INDEX[key]] = weight
+        return vectors
+
+
+@pytest.fixture
+def parser():
+    service = StubEmbeddingService(
+        {
+            "business vintage": {"business.vintage_in_years": 0.85},
+            "applicant age": {"primary_applicant.age": 0.8},
+            "credit score": {"bureau.score": 0.7, "business.commercial_cibil_score": 0.68},
+            # Negated fields still embed close to the key
+            "bureau score is not": {"bureau.score": 0.9},
+            "bureau score never": {"bureau.score": 0.9},
+        }
+    )
+    return RuleParser(service, SAMPLE_STORE_KEYS, min_similarity=0.6, min_margin=0.05)
+
+
+class TestRuleParser:
+    def test_readme_example(self, parser):
+        result = parser.parse(
+            "Approve if bureau score > 700 and business vintage at least 3 years "
+            "and applicant age between 25 and 60."
+        )
+
+        assert result["json_logic"] == {
+            "and": [
+                {">": [{"var": "bureau.score"}, 700]},
+                {">=": [{"var": "business.vintage_in_years"}, 3]},
+                {
+                    "and": [
+                        {">=": [{"var": "primary_applicant.age"}, 25]},
+                        {"<=": [{"var": "primary_applicant.age"}, 60]},
+                    ]
+                },
+            ]
+        }
+        assert result["generation_path"] == "parser"
+        assert result["used_keys"] == [
+            "bureau.score",
+            "business.vintage_in_years",
+            "primary_applicant.age",
+        ]
+        assert result["confidence_score"] == pytest.approx((1.0 + 0.85 + 0.8) / 3)
+        # Only the phrases without an exact alias go through the embeddings
+        assert parser.embedding_service.embedded == ["business vintage", "applicant age"]
+
+    def test_or_with_boolean_and_key_path(self, parser):
+        result = parser.parse(
+            "Flag as high risk if wilful default is true OR overdue amount > 50000 "
+            "OR bureau.dpd >= 90"
+        )
+
+        assert result["json_logic"] == {
+            "or": [
+                {"==": [{"var": "bureau.wilful_default"}, True]},
+                {">": [{"var": "bureau.overdue_amount"}, 50000]},
+                {">=": [{"var": "bureau.dpd"}, 90]},
+            ]
+        }
+
+    def test_tag_membership_and_grouped_digits(self, parser):
+        result = parser.parse(
+            "Prefer applicants with tag 'veteran' OR with monthly_income > 1,00,000."
+        )
+
+        assert result["json_logic"] == {
+            "or": [
+                {"in": ["veteran", {"var": "primary_applicant.tags"}]},
+                {">": [{"var": "primary_applicant.monthly_income"}, 100000]},
+            ]
+        }
+        rule = compile_rule(result["json_logic"])
+        assert rule.matches({"primary_applicant": {"tags": ["veteran"]}})
+
+    def test_word_operators(self, parser):
+        result = parser.parse("Approve if FOIR is less than 0.5 and debt to income below 0.4")
+
+        assert result["json_logic"] == {
+            "and": [
+                {"<": [{"var": "foir"}, 0.5]},
+                {"<": [{"var": "debt_to_income"}, 0.4]},
+            ]
+        }
+
+    def test_units_convert_to_the_key_unit(self, parser):
+        result = parser.parse(
+            "Approve if registration age months at least 2 years and vintage in years at least 36 months"
+        )
+
+        assert result["json_logic"] == {
+            "and": [
+                {">=": [{"var": "gst.registration_age_months"}, 24]},
+                {">=": [{"var": "business.vintage_in_years"}, 3]},
+            ]
+        }
+
+    def test_units_convert_in_between(self, parser):
+        result = parser.parse("Approve if registration age months between 1 and 2 years")
+
+        assert result["json_logic"] == {
+            "and": [
+                {">=": [{"var": "gst.registration_age_months"}, 12]},
+                {"<=": [{"var": "gst.registration_age_months"}, 24]},
+            ]
+        }
+
+    @pytest.mark.parametrize(
+        "prompt",
+        [
+            # Units that don't fit the resolved key
+            "Approve if bureau score > 700 days",
+            "Approve if vintage in years > 90 days",
+            "Approve if registration age months > 5000 rupees",
+            # Negation the grammar would drop, inverting the rule
+            "Approve if bureau score is not below 700",
+            "Approve if bureau score never below 700",
+        ],
+    )
+    def test_rejects_unit_conflicts_and_negations(self, parser, prompt):
+        assert parser.parse(prompt) is None
+
+    @pytest.mark.parametrize(
+        "prompt",
+        [
+            # Mixed connectors without explicit precedence
+            "Approve if bureau score > 700 and dpd < 30 or foir < 0.5",
+            # Field the embeddings can't separate from its runner-up
+            "Approve if credit score > 700",
+            # Field with no good match at all
+            "Approve if loan amount > 500000",
+            # Clause outside the grammar
+            "Approve if bureau score > 700 and not wilful default",
+            # Unit the grammar doesn't understand
+            "Approve if monthly income > 1 lakh",
+            "Reject if GST missed returns",
+        ],
+    )
+    def test_falls_back_when_unsure(self, parser, prompt):
+        assert parser.parse(prompt) is None
+
+    def test_prefetch_embeds_every_prompts_fields_at_once(self, parser):
+        service = parser.embedding_service
+        calls = []
+        embed_texts = service.embed_texts
+        service.embed_texts = lambda texts: calls.append(list(texts)) or embed_texts(texts)
+        context = EmbeddingContext(service)
+        prompts = [
+            "Approve if business vintage at least 3 years",
+            "Reject if applicant age < 21 or bureau score < 600",
+        ]
+
+        parser.prefetch(prompts, context)
+        results = [parser.parse(prompt, context=context) for prompt in prompts]
+
+        # Aliases resolve without embeddings, the two other fields share one call
+        assert calls == [["business vintage", "applicant age"]]
+        assert results[1]["used_keys"] == ["primary_applicant.age", "bureau.score"]
+
+    def test_stats(self, parser):
+        parser.parse("Approve if bureau score > 700")
+        parser.parse("Approve if loan amount > 500000")
+
+        assert parser.stats() == {"parsed": 1, "fallbacks": 1, "parse_rate": 0.5}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
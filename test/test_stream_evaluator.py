@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.json_logic_vectorized import compile_vectorized
+from app.services.rule_store import RuleStore
+from app.services.stream_evaluator import evaluate_ndjson_stream, iter_ndjson_lines
+
+RULE = {
+    "and": [
+        {">": [{"var": "bureau.score"}, 700]},
+        {"<=": [25, {"var": "primary_applicant.age"}, 60]},
+    ]
+}
+
+
+async def byte_chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def collect(data: bytes, chunk_bytes: int = 7, chunk_size: int = 2, max_line_bytes: int = 1024):
+    async def run():
+        lines = iter_ndjson_lines(byte_chunks(data, chunk_bytes), max_line_bytes)
+        stream = evaluate_ndjson_stream(lines, compile_vectorized(RULE), chunk_size)
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(run())
+    return chunks, [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def ndjson(records):
+    return "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+
+
+class TestStreamEvaluator:
+    def test_decisions_in_input_order(self):
+        records = [
+            {"id": "a", "bureau": {"score": 720}, "primary_applicant": {"age": 30}},
+            {"id": "b", "bureau": {"score": 650}, "primary_applicant": {"age": 30}},
+            {"bureau": {"score": 780}, "primary_applicant": {"age": 45}},
+            {"id": "d", "bureau": {}, "primary_applicant": {"age": 45}},
+            {"id": "e", "bureau": {"score": 710}, "primary_applicant": {"age": 61}},
+        ]
+        chunks, results = collect(ndjson(records))
+
+        decisions = results[:-1]
+        assert [r["index"] for r in decisions] == [0, 1, 2, 3, 4]
+        assert [r["decision"] for r in decisions] == [True, False, True, False, False]
+        assert [r.get("id") for r in decisions] == ["a", "b", None, "d", "e"]
+        # Two records per chunk plus the summary line
+        assert len(chunks) == 4
+
+        summary = results[-1]["summary"]
+        assert summary["records"] == 5
+        assert summary["matched"] == 2
+        assert summary["errors"] == 0
+
+    def test_bad_lines_are_reported_without_stopping(self):
+        data = (
+            b'{"bureau": {"score": 720}, "primary_applicant": {"age": 30}}\n'
+            b"not json\n"
+            b"\n"
+            b'{"bureau": {"score": 720}, "primary_applicant": {"age": 30}, "pad": "'
+            + b"x" * 200
+            + b'"}\n'
+            b'{"bureau": {"score": 800}, "primary_applicant": {"age": 40}}'
+        )
+        _, results = collect(data, max_line_bytes=100)
+
+        assert results[0] == {"index": 0, "decision": True}
+        assert results[1]["index"] == 1 and "error" in results[1]
+        assert results[2]["index"] == 2 and "error" in results[2]
+        assert results[3] == {"index": 3, "decision": True}
+        assert results[-1]["summary"]["errors"] == 2
+
+    def test_empty_body(self):
+        _, results = collect(b"")
+
+        assert results == [results[0]]
+        assert results[0]["summary"]["records"] == 0
+
+
+class TestRuleStore:
+    def test_same_rule_same_id(self):
+        store = RuleStore()
+        reordered = {"and": [RULE["and"][0], RULE["and"][1]]}
+
+        assert store.put(RULE) == store.put(reordered)
+        assert store.get(store.rule_id(RULE)) == RULE
+        assert len(store) == 1
+
+    def test_evicts_least_recently_used(self):
+        store = RuleStore(max_rules=2)
+        first = store.put({"var": "a"})
+        second = store.put({"var": "b"})
+        store.get(first)
+        store.put({"var": "c"})
+
+        assert store.get(first) is not None
+        assert store.get(second) is None
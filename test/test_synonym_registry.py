@@ -0,0 +1,202 @@
+import importlib
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.embedding_service import EmbeddingService
+from app.services.synonym_registry import DEFAULT_SYNONYMS_PATH, SynonymRegistry
+
+STORE_KEYS = [
+    {"value": "bureau.score", "label": "Bureau Score", "group": "bureau"},
+    {"value": "bureau.dpd", "label": "DPD", "group": "bureau"},
+    {"value": "business.vintage_in_years", "label": "Business Vintage", "group": "business"},
+]
+
+
+def write(path, synonyms, mtime=None):
+    with open(path, "w") as f:
+        json.dump(synonyms, f)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def fake_encode(texts):
+    # Deterministic unit vectors per text, enough to tell re-embedded rows apart
+    vectors = np.array(
+        [np.random.default_rng(abs(hash(t)) % 2**32).normal(size=16) for t in texts],
+        dtype=np.float32,
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestSynonymRegistry:
+    def test_reload_reports_changed_keys_only(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil"], "bureau.dpd": ["days past due"]}, 1)
+        registry = SynonymRegistry(str(path))
+
+        assert registry.get("bureau.score") == ["cibil"]
+        assert registry.reload() == []
+
+        write(path, {"bureau.score": ["cibil", "credit score"], "bureau.dpd": ["days past due"]}, 2)
+        assert registry.reload() == ["bureau.score"]
+        assert registry.get("bureau.score") == ["cibil", "credit score"]
+
+        write(path, {"bureau.score": ["cibil", "credit score"]}, 3)
+        assert registry.reload() == ["bureau.dpd"]
+        assert registry.get("bureau.dpd") == []
+        assert registry.stats()["reloads"] == 2
+
+    def test_invalid_file_keeps_previous_aliases(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil"]}, 1)
+        registry = SynonymRegistry(str(path))
+
+        path.write_text('{"bureau.score": "cibil"}')
+        assert registry.reload() == []
+        path.write_text("{not json")
+        os.utime(path, ns=(5, 5))
+        assert registry.reload() == []
+
+        assert registry.get("bureau.score") == ["cibil"]
+        assert registry.stats()["errors"] == 2
+
+    def test_missing_file_has_no_aliases(self, tmp_path):
+        registry = SynonymRegistry(str(tmp_path / "missing.json"))
+
+        assert registry.get("bureau.score") == []
+        assert registry.reload() == []
+
+
+    def test_default_path_does_not_depend_on_working_directory(self, tmp_path, monkeypatch):
+        from app.config import settings
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv("SYNONYMS_PATH", raising=False)
+        path = importlib.reload(settings).SYNONYMS_PATH
+
+        assert os.path.samefile(path, DEFAULT_SYNONYMS_PATH)
+        assert SynonymRegistry(path).snapshot()
+
+    def test_rollback_reports_the_change_again(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil"]}, 1)
+        registry = SynonymRegistry(str(path))
+
+        write(path, {"bureau.score": ["cibil", "credit score"]}, 2)
+        assert registry.reload(commit=False) == ["bureau.score"]
+        assert registry.get("bureau.score") == ["cibil", "credit score"]
+        registry.rollback()
+
+        assert registry.get("bureau.score") == ["cibil"]
+        assert registry.stats()["version"] == 1
+        assert registry.reload(commit=False) == ["bureau.score"]
+        registry.commit()
+        assert registry.reload() == []
+        assert registry.get("bureau.score") == ["cibil", "credit score"]
+        assert registry.stats()["reloads"] == 1
+
+
+class TestEmbeddingServiceReload:
+    def make_service(self, path, multi_vector_keys=False):
+        service = EmbeddingService(
+            store_keys=STORE_KEYS,
+            synonym_registry=SynonymRegistry(str(path)),
+            multi_vector_keys=multi_vector_keys,
+        )
+        service._encode = fake_encode
+        service.initialize_key_embeddings()
+        return service
+
+    def test_only_changed_keys_are_re_embedded(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil"], "bureau.dpd": ["overdue days"]}, 1)
+        service = self.make_service(path)
+        before = service.key_embeddings.copy()
+        old_index = service.key_index
+
+        encoded = []
+        service._encode = lambda texts: encoded.extend(texts) or fake_encode(texts)
+        write(path, {"bureau.score": ["cibil", "credit rating"], "bureau.dpd": ["overdue days"]}, 2)
+
+        assert service.reload_synonyms() == ["bureau.score"]
+        assert encoded == [service.key_texts[0]]
+        assert "credit rating" in service.key_texts[0]
+        assert np.allclose(service.key_embeddings[1:], before[1:])
+        assert not np.allclose(service.key_embeddings[0], before[0])
+
+        # The previous index is left intact for requests still holding it
+        assert service.key_index is not old_index
+        assert np.allclose(old_index.vectors, before)
+        assert service.key_index.search(service.key_embeddings[0], 1)[1][0, 0] == 0
+
+    def test_reload_updates_phrase_matcher(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil"]}, 1)
+        service = self.make_service(path)
+        assert "hard pulls" not in service.phrase_matcher
+
+        write(path, {"bureau.score": ["cibil"], "bureau.dpd": ["hard pulls"]}, 2)
+        service.reload_synonyms()
+
+        assert "hard pulls" in service.phrase_matcher
+        assert service._extract_field_phrases("fewer than 3 hard pulls") == ["hard pulls"]
+
+    def test_multi_vector_keys_map_synonyms_exactly(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil", "credit rating"]}, 1)
+        service = self.make_service(path, multi_vector_keys=True)
+
+        assert service.key_vector_texts[0][1:] == ["Bureau Score", "cibil", "credit rating"]
+        assert service.key_index.stats()["vectors"] == 4 + 2 + 2
+        scores, indices = service.key_index.search(fake_encode(["credit rating"]), 1)
+        assert indices[0, 0] == 0 and scores[0, 0] == pytest.approx(1.0)
+
+        encoded = []
+        service._encode = lambda texts: encoded.extend(texts) or fake_encode(texts)
+        write(path, {"bureau.score": ["cibil", "credit rating"], "bureau.dpd": ["days past due"]}, 2)
+
+        assert service.reload_synonyms() == ["bureau.dpd"]
+        assert encoded == service.key_vector_texts[1]
+        assert service.key_index.search(fake_encode(["days past due"]), 1)[1][0, 0] == 1
+
+    def test_failed_reload_is_retried_on_next_poll(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil"]}, 1)
+        service = self.make_service(path)
+        index = service.key_index
+
+        def failing_encode(texts):
+            raise RuntimeError("encoder unavailable")
+
+        service._encode = failing_encode
+        write(path, {"bureau.score": ["cibil", "credit rating"]}, 2)
+        with pytest.raises(RuntimeError):
+            service.reload_synonyms()
+
+        assert service.key_index is index
+        assert "credit rating" not in service.key_texts[0]
+        assert service.synonym_registry.get("bureau.score") == ["cibil"]
+
+        service._encode = fake_encode
+        assert service.reload_synonyms() == ["bureau.score"]
+        assert "credit rating" in service.key_texts[0]
+        assert service.key_index is not index
+
+    def test_unchanged_file_is_a_no_op(self, tmp_path):
+        path = tmp_path / "synonyms.json"
+        write(path, {"bureau.score": ["cibil"]}, 1)
+        service = self.make_service(path)
+        index = service.key_index
+
+        assert service.reload_synonyms() == []
+        assert service.key_index is index
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
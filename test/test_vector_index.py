@@ -0,0 +1,241 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.vector_index import (
+    ExactIndex,
+    IVFIndex,
+    MultiVectorIndex,
+    VectorIndex,
+    build_index,
+)
+
+
+def random_unit_vectors(n, d=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, d)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def brute_force(vectors, queries, k):
+    scores = queries @ vectors.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+class TestExactIndex:
+    @pytest.mark.parametrize("block_size", [7, 64, 65536])
+    def test_matches_brute_force(self, block_size):
+        vectors = random_unit_vectors(500)
+        queries = random_unit_vectors(20, seed=1)
+
+        scores, indices = ExactIndex(vectors, block_size=block_size).search(queries, 10)
+
+        assert indices.tolist() == brute_force(vectors, queries, 10).tolist()
+        assert np.all(np.diff(scores, axis=1) <= 0)
+
+    def test_single_query_and_k_above_size(self):
+        vectors = random_unit_vectors(5)
+
+        scores, indices = ExactIndex(vectors).search(vectors[2], 10)
+
+        assert scores.shape == (1, 5)
+        assert indices[0, 0] == 2
+
+
+class TestIVFIndex:
+    def test_probing_every_list_is_exact(self):
+        vectors = random_unit_vectors(2000)
+        queries = random_unit_vectors(20, seed=1)
+
+        index = IVFIndex(vectors, n_lists=16, n_probe=16)
+        _, indices = index.search(queries, 10)
+
+        assert indices.tolist() == brute_force(vectors, queries, 10).tolist()
+
+    def test_finds_near_duplicates_with_few_probes(self):
+        vectors = random_unit_vectors(5000)
+        noise = random_unit_vectors(100, seed=2) * 0.05
+        queries = vectors[:100] + noise
+
+        _, indices = IVFIndex(vectors, n_lists=64, n_probe=4).search(queries, 1)
+
+        recall = np.mean(indices[:, 0] == np.arange(100))
+        assert recall >= 0.95
+
+    def test_small_probe_falls_back_to_full_scan(self):
+        vectors = random_unit_vectors(50)
+
+        _, indices = IVFIndex(vectors, n_lists=25, n_probe=1).search(vectors[:3], 10)
+
+        assert indices.shape == (3, 10)
+        assert indices[:, 0].tolist() == [0, 1, 2]
+
+
+class TestReplace:
+    @pytest.mark.parametrize("make", [ExactIndex, lambda v: IVFIndex(v, n_lists=8, n_probe=8)])
+    def test_replaced_rows_are_found_and_original_is_untouched(self, make):
+        vectors = random_unit_vectors(200)
+        index = make(vectors)
+        moved = random_unit_vectors(2, seed=5)
+
+        updated = index.replace(np.array([3, 7]), moved)
+
+        assert updated.search(moved, 1)[1][:, 0].tolist() == [3, 7]
+        assert index.search(vectors[[3, 7]], 1)[1][:, 0].tolist() == [3, 7]
+        assert np.allclose(index.vectors, vectors)
+
+
+class TestMultiVectorIndex:
+    def make_groups(self, n=60, seed=0):
+        sizes = np.random.default_rng(seed).integers(1, 6, n)
+        vectors = random_unit_vectors(int(sizes.sum()), seed=seed)
+        return np.split(vectors, np.cumsum(sizes)[:-1])
+
+    @pytest.mark.parametrize("block_size", [1, 7, 65536])
+    def test_items_score_as_their_best_vector(self, block_size):
+        groups = self.make_groups()
+        queries = random_unit_vectors(10, seed=3)
+        expected = np.stack([(queries @ g.T).max(axis=1) for g in groups], axis=1)
+
+        index = MultiVectorIndex.from_groups(groups, block_size=block_size)
+        scores, indices = index.search(queries, 5)
+
+        assert len(index) == len(groups)
+        assert indices.tolist() == np.argsort(-expected, axis=1, kind="stable")[:, :5].tolist()
+        assert np.allclose(scores, np.take_along_axis(expected, indices, axis=1))
+
+    def test_any_vector_of_an_item_finds_it(self):
+        groups = self.make_groups()
+        index = MultiVectorIndex.from_groups(groups)
+
+        _, indices = index.search(groups[17], 1)
+
+        assert indices[:, 0].tolist() == [17] * len(groups[17])
+
+    def test_replace_swaps_item_vectors(self):
+        groups = self.make_groups()
+        index = MultiVectorIndex.from_groups(groups)
+        new_group = random_unit_vectors(3, seed=9)
+
+        updated = index.replace([4], [new_group])
+
+        assert updated.search(new_group, 1)[1][:, 0].tolist() == [4, 4, 4]
+        assert index.search(groups[4], 1)[1][:, 0].tolist() == [4] * len(groups[4])
+        assert updated.stats()["vectors"] == index.stats()["vectors"] - len(groups[4]) + 3
+
+    def test_items_need_a_vector(self):
+        with pytest.raises(ValueError):
+            MultiVectorIndex(random_unit_vectors(3), np.array([0, 2, 2, 3]))
+
+    def test_ivf_rows_probing_every_list_is_exact(self):
+        groups = self.make_groups()
+        queries = random_unit_vectors(10, seed=3)
+        exact = MultiVectorIndex.from_groups(groups)
+        ivf = MultiVectorIndex.from_groups(
+            groups, backend="ivf", params={"ivf": {"n_lists": 8, "n_probe": 8}}
+        )
+
+        assert ivf.stats()["row_backend"] == "IVFIndex"
+        for actual, expected in zip(ivf.search(queries, 5), exact.search(queries, 5)):
+            assert np.allclose(actual, expected)
+
+    def test_ivf_rows_find_items_and_survive_replace(self):
+        groups = self.make_groups()
+        index = MultiVectorIndex.from_groups(
+            groups, backend="ivf", params={"ivf": {"n_lists": 8, "n_probe": 1}}
+        )
+        assert index.search(groups[17], 1)[1][:, 0].tolist() == [17] * len(groups[17])
+
+        new_group = random_unit_vectors(3, seed=9)
+        updated = index.replace([4], [new_group])
+
+        assert updated.search(new_group, 1)[1][:, 0].tolist() == [4, 4, 4]
+        # Items after the replaced one moved rows and are still found
+        assert updated.search(groups[40], 1)[1][:, 0].tolist() == [40] * len(groups[40])
+        assert index.search(groups[4], 1)[1][:, 0].tolist() == [4] * len(groups[4])
+
+    def test_auto_backend_counts_items(self, monkeypatch):
+        import app.services.vector_index as vector_index
+
+        groups = self.make_groups()
+        monkeypatch.setattr(vector_index, "AUTO_IVF_MIN_SIZE", len(groups) + 1)
+        assert MultiVectorIndex.from_groups(groups, backend="auto").backend == "exact"
+
+        monkeypatch.setattr(vector_index, "AUTO_IVF_MIN_SIZE", len(groups))
+        assert MultiVectorIndex.from_groups(groups, backend="auto").backend == "ivf"
+
+
+class TestQuantizedIndex:
+    @pytest.mark.parametrize("dtype", ["float16", "int8"])
+    @pytest.mark.parametrize(
+        "make",
+        [
+            lambda v, **kw: ExactIndex(v, block_size=300, **kw),
+            lambda v, **kw: IVFIndex(v, n_lists=8, n_probe=8, **kw),
+        ],
+    )
+    def test_rerank_restores_exact_order(self, make, dtype):
+        vectors = random_unit_vectors(1000)
+        queries = random_unit_vectors(20, seed=1)
+        expected = brute_force(vectors, queries, 10)
+
+        index = make(vectors, dtype=dtype, rerank=lambda rows: vectors[rows])
+        scores, indices = index.search(queries, 10)
+
+        assert index.stats()["bytes"] < vectors.nbytes
+        assert indices.tolist() == expected.tolist()
+        assert np.allclose(scores, np.take_along_axis(queries @ vectors.T, indices, axis=1))
+
+    def test_multi_vector_rerank_gets_vector_rows(self):
+        groups = TestMultiVectorIndex().make_groups()
+        vectors = np.concatenate(groups)
+        queries = random_unit_vectors(10, seed=3)
+        best = np.stack([(queries @ g.T).max(axis=1) for g in groups], axis=1)
+
+        index = MultiVectorIndex.from_groups(
+            groups, dtype="int8", rerank=lambda rows: vectors[rows], rerank_factor=3
+        )
+        scores, indices = index.search(queries, 5)
+
+        assert indices.tolist() == np.argsort(-best, axis=1, kind="stable")[:, :5].tolist()
+        assert np.allclose(scores, np.take_along_axis(best, indices, axis=1))
+
+    def test_replace_quantizes_new_rows(self):
+        vectors = random_unit_vectors(50)
+        index = ExactIndex(vectors, dtype="int8")
+        moved = random_unit_vectors(1, seed=4)
+
+        updated = index.replace(np.array([10]), moved)
+
+        assert updated.vectors.dtype == np.int8
+        assert updated.search(moved, 1)[1][0, 0] == 10
+
+
+class TestBuildIndex:
+    def test_auto_picks_backend_by_size(self):
+        assert isinstance(build_index(random_unit_vectors(100)), ExactIndex)
+        assert isinstance(build_index(random_unit_vectors(20000, d=8)), IVFIndex)
+
+    def test_params_are_per_backend(self):
+        params = {"ivf": {"n_probe": 3}}
+
+        assert isinstance(build_index(random_unit_vectors(10), "exact", params), ExactIndex)
+        assert build_index(random_unit_vectors(100), "ivf", params).n_probe == 3
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            build_index(random_unit_vectors(10), "hnsw")
+
+    def test_index_without_search_cannot_be_created(self):
+        class Unsearchable(VectorIndex):
+            pass
+
+        with pytest.raises(TypeError):
+            Unsearchable(random_unit_vectors(10))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
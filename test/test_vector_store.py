@@ -0,0 +1,254 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.rag_service import RAGService
+from app.services.vector_store import VectorStore
+
+
+def one_hot(*indices, dim=8):
+    vectors = np.zeros((len(indices), dim), dtype=np.float32)
+    vectors[np.arange(len(indices)), indices] = 1.0
+    return vectors
+
+
+class TestVectorStore:
+    def test_grows_by_doubling(self):
+        store = VectorStore(initial_capacity=2)
+        for i in range(5):
+            store.add(f"doc-{i}", [f"chunk {i}"], one_hot(i))
+
+        assert len(store) == 5
+        assert store.stats()["capacity"] == 8
+
+        scores, texts, _ = store.scores(one_hot(3)[0])
+        assert texts[int(np.argmax(scores[0]))] == "chunk 3"
+
+    def test_replace_tombstones_previous_rows(self):
+        store = VectorStore(max_tombstone_ratio=1.0)
+        store.add("a", ["old 1", "old 2"], one_hot(0, 1))
+        store.add("a", ["new"], one_hot(2))
+
+        assert store.texts("a") == ["new"]
+        assert len(store) == 1
+        assert store.stats()["tombstones"] == 2
+
+        scores, _, _ = store.scores(one_hot(0)[0])
+        assert np.isneginf(scores[0, :2]).all()
+
+    def test_compacts_when_tombstones_pile_up(self):
+        store = VectorStore(max_tombstone_ratio=0.5)
+        store.add_many([(f"doc-{i}", [f"chunk {i}"], one_hot(i)) for i in range(4)])
+        store.delete("doc-0")
+        store.delete("doc-1")
+        assert store.stats()["compactions"] == 0
+
+        store.delete("doc-2")
+
+        stats = store.stats()
+        assert stats["compactions"] == 1
+        assert stats["tombstones"] == 0
+        assert store.doc_ids == ["doc-3"]
+        scores, texts, _ = store.scores(one_hot(3)[0])
+        assert texts == ["chunk 3"] and scores[0, 0] == 1.0
+
+    def test_snapshot_survives_later_writes(self):
+        store = VectorStore(initial_capacity=1, max_tombstone_ratio=0.0)
+        store.add("a", ["chunk a"], one_hot(0))
+        vectors, alive, texts, _ = store.snapshot()
+
+        store.add_many([(f"doc-{i}", [f"chunk {i}"], one_hot(i)) for i in range(1, 6)])
+        store.delete("a")
+
+        assert vectors.shape == (1, 8)
+        assert alive.tolist() == [True]
+        assert texts[0] == "chunk a"
+
+    def test_rejects_mismatched_rows(self):
+        with pytest.raises(ValueError):
+            VectorStore().add("a", ["one", "two"], one_hot(0))
+
+    @pytest.mark.parametrize("dtype", ["float16", "int8"])
+    def test_quantized_rows_survive_growth_and_compaction(self, dtype):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(6, 8)).astype(np.float32) * np.arange(1, 7)[:, None]
+        store = VectorStore(initial_capacity=1, max_tombstone_ratio=0.3, dtype=dtype)
+        store.add_many([(f"doc-{i}", [f"chunk {i}"], vectors[i : i + 1]) for i in range(6)])
+        store.delete("doc-0")
+        store.delete("doc-1")
+
+        query = rng.normal(size=8).astype(np.float32)
+        scores, texts, _ = store.scores(query)
+
+        stats = store.stats()
+        assert stats["compactions"] == 1 and stats["dtype"] == dtype
+        assert texts == [f"chunk {i}" for i in range(2, 6)]
+        assert np.allclose(scores[0], vectors[2:] @ query, rtol=0.02, atol=0.05)
+        assert np.allclose(store.snapshot()[0], vectors[2:], rtol=0.02, atol=0.05)
+
+
+class CountingEmbeddingService:
+    def __init__(self):
+        self.corpus_calls = []
+        self.text_calls = []
+
+    def embed_corpus(self, texts):
+        self.corpus_calls.append(list(texts))
+        return one_hot(*[int(t.split()[-1]) for t in texts])
+
+    def embed_texts(self, texts):
+        self.text_calls.append(list(texts))
+        return one_hot(*[int(t.split()[-1]) for t in texts])
+
+
+def chunk(number):
+    return f"Section {number}\nPolicy paragraph under its own heading, number {number}"
+
+
+def policy(*numbers):
+    return "\n\n".join(
+        f"## Section {n}\n\nPolicy paragraph under its own heading, number {n}"
+        for n in numbers
+    )
+
+
+class TestRAGServiceDocuments:
+    def test_batched_ingest_and_replace(self):
+        service = CountingEmbeddingService()
+        rag = RAGService(service, [policy(0, 1), policy(2)])
+        rag.initialize_policy_embeddings()
+
+        assert len(service.corpus_calls) == 1
+        assert len(rag.store) == 3
+
+        rag.add_document(policy(3), doc_id="policy-1")
+
+        assert rag.retrieve_relevant_policies("query 2") == []
+        assert rag.retrieve_relevant_policies("query 3", top_k=1) == [chunk(3)]
+        assert rag.store.texts("policy-0") == [chunk(0), chunk(1)]
+        assert [m["section"] for m in rag.store.metadata("policy-0")] == [
+            "Section 0",
+            "Section 1",
+        ]
+
+    def test_chunks_carry_document_and_section(self):
+        rag = RAGService(CountingEmbeddingService(), [policy(0, 1)])
+        rag.initialize_policy_embeddings()
+
+        (chunks,) = rag.retrieve_relevant_chunks_many(
+            ["query 1"], top_k=1, context_docs=["## Extra\nMinimum age is 2"]
+        )
+
+        assert chunks == [
+            {
+                "text": chunk(1),
+                "doc_id": "policy-0",
+                "section": "Section 1",
+                "index": 1,
+                "tokens": 11,
+            }
+        ]
+
+    def test_delete_document(self):
+        rag = RAGService(CountingEmbeddingService(), [])
+        doc_id = rag.add_document(policy(4))
+
+        assert rag.retrieve_relevant_policies("query 4") == [chunk(4)]
+        assert rag.delete_document(doc_id)
+        assert rag.retrieve_relevant_policies("query 4") == []
+        assert not rag.delete_document(doc_id)
+
+
+class TestRAGServiceContextDocs:
+    def test_context_docs_searched_without_touching_store(self):
+        service = CountingEmbeddingService()
+        rag = RAGService(service, [policy(0)])
+        rag.initialize_policy_embeddings()
+        before = rag.store.stats()
+
+        result = rag.retrieve_relevant_policies(
+            "query 5", context_docs=["Minimum age is 5", policy(0)]
+        )
+
+        assert result == ["Minimum age is 5"]
+        assert rag.store.stats() == before
+        assert rag.retrieve_relevant_policies("query 5") == []
+
+    def test_context_docs_embedded_once_per_content(self):
+        service = CountingEmbeddingService()
+        rag = RAGService(service, [])
+        docs = ["Minimum age is 6", "Minimum age is 7"]
+
+        rag.retrieve_relevant_policies_many(["query 6", "query 7"], context_docs=docs)
+        rag.retrieve_relevant_policies("query 7", context_docs=docs + docs)
+
+        chunk_calls = [c for c in service.text_calls if not c[0].startswith("query")]
+        assert chunk_calls == [docs]
+        assert rag.stats()["context_doc_cache"]["hits"] == 2
+
+    def test_context_doc_cache_is_bounded(self):
+        rag = RAGService(CountingEmbeddingService(), [], context_doc_cache_size=1)
+        rag.retrieve_relevant_policies("query 1", context_docs=["Minimum age is 1"])
+        rag.retrieve_relevant_policies("query 2", context_docs=["Minimum age is 2"])
+
+        assert rag.stats()["context_doc_cache"]["entries"] == 1
+
+
+class KeywordBlindEmbeddingService(CountingEmbeddingService):
+    """Embeds every text to the same vector, so only the keyword side can rank."""
+
+    def embed_corpus(self, texts):
+        return np.tile(one_hot(0), (len(texts), 1))
+
+    def embed_texts(self, texts):
+        return np.tile(one_hot(0), (len(texts), 1))
+
+
+class TestRAGServiceHybrid:
+    documents = {
+        "ratios": "Maximum FOIR for approval is 0.7 of the monthly income of the applicant",
+        "risk": "Overdue amount above 50,000 rupees is flagged as a high risk application",
+    }
+
+    def test_keyword_match_ranks_first(self):
+        rag = RAGService(KeywordBlindEmbeddingService(), [])
+        rag.add_documents(self.documents)
+
+        assert rag.retrieve_relevant_policies("FOIR limit", top_k=1) == [self.documents["ratios"]]
+        assert rag.retrieve_relevant_policies("overdue 50000", top_k=1) == [self.documents["risk"]]
+
+    def test_dense_only_when_sparse_weight_is_zero(self):
+        rag = RAGService(KeywordBlindEmbeddingService(), [], sparse_weight=0)
+        rag.add_documents(self.documents)
+
+        # Every chunk scores the same, keywords in the query no longer change the ranking
+        assert rag.bm25 is None
+        assert rag.retrieve_relevant_policies(
+            "FOIR limit", top_k=1
+        ) == rag.retrieve_relevant_policies("overdue 50000", top_k=1)
+
+    def test_deleted_document_leaves_keyword_index(self):
+        rag = RAGService(KeywordBlindEmbeddingService(), [])
+        rag.add_documents(self.documents)
+        rag.delete_document("risk")
+
+        assert rag.retrieve_relevant_policies("overdue 50000") == [self.documents["ratios"]]
+        assert rag.stats()["bm25"]["chunks"] == 1
+
+    def test_context_docs_scored_by_keywords(self):
+        rag = RAGService(KeywordBlindEmbeddingService(), [])
+        rag.add_documents(self.documents)
+
+        result = rag.retrieve_relevant_policies(
+            "DPD limit", top_k=1, context_docs=["DPD above 90 days is rejected"]
+        )
+
+        assert result == ["DPD above 90 days is rejected"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])